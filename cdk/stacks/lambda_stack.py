@@ -1,10 +1,36 @@
 """
 AWS CDK stack for Food Lens Strands Agent Lambda function.
+
+Capacity is driven by CDK context (cdk.json or --context):
+
+- timeout_seconds, memory_size: function timeout (default 90) and memory in MB
+  (default 1024)
+- reserved_concurrency: concurrency reserved for the function (unset: shared
+  account pool)
+- alias_name: alias published for each new version (default "live"); callers
+  invoke "food-lens-strands-agent:<alias>" to use provisioned concurrency
+- provisioned_concurrency: pre-initialized environments on the alias (default
+  0, none)
+- autoscaling_max_capacity: enables Application Auto Scaling of provisioned
+  concurrency between provisioned_concurrency and this maximum
+- autoscaling_target_utilization: provisioned concurrency utilization to
+  track, e.g. 0.7 (unset: no utilization scaling); needs
+  provisioned_concurrency of at least 1, since the utilization metric only
+  exists while some concurrency is provisioned
+- autoscaling_schedules: JSON list of scheduled capacity changes, e.g.
+  [{"name": "lunch", "schedule": "cron(30 10 * * ? *)", "min_capacity": 10,
+  "max_capacity": 40, "time_zone": "Europe/London"}]
 """
 
+import json
+import os
+from typing import Any, Dict, List, Optional
+
 from aws_cdk import (
     Stack,
     Duration,
+    TimeZone,
+    aws_applicationautoscaling,
     aws_lambda,
     aws_iam,
     aws_logs,
@@ -12,7 +38,9 @@ from aws_cdk import (
     BundlingOptions
 )
 from constructs import Construct
-import os
+
+# Directory containing the Lambda source, next to the cdk directory
+LAMBDA_SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "lambda")
 
 
 class FoodLensLambdaStack(Stack):
@@ -23,6 +51,27 @@ class FoodLensLambdaStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        timeout_seconds = self._context_int("timeout_seconds", 90)
+        memory_size = self._context_int("memory_size", 1024)
+        reserved_concurrency = self._context_int("reserved_concurrency")
+        provisioned_concurrency = self._context_int("provisioned_concurrency", 0)
+        max_capacity = self._context_int("autoscaling_max_capacity")
+        target_utilization = self._context_float("autoscaling_target_utilization")
+        schedules = self._context_schedules("autoscaling_schedules")
+
+        if (target_utilization is not None or schedules) and max_capacity is None:
+            raise ValueError("autoscaling_target_utilization and autoscaling_schedules need autoscaling_max_capacity")
+        if max_capacity is not None and max_capacity < max(provisioned_concurrency, 1):
+            raise ValueError("autoscaling_max_capacity must be at least provisioned_concurrency and at least 1")
+        if target_utilization is not None and not 0 < target_utilization < 1:
+            raise ValueError("autoscaling_target_utilization must be between 0 and 1")
+        if target_utilization is not None and provisioned_concurrency < 1:
+            # Scaled down to 0 there is no utilization metric, so the policy never scales up again
+            raise ValueError("autoscaling_target_utilization needs provisioned_concurrency of at least 1")
+        peak_provisioned = max([provisioned_concurrency, max_capacity or 0] + [s["max_capacity"] for s in schedules])
+        if reserved_concurrency is not None and peak_provisioned > reserved_concurrency:
+            raise ValueError("Provisioned concurrency cannot exceed reserved_concurrency")
+
         # Create Lambda execution role with necessary permissions
         lambda_role = aws_iam.Role(
             self, "FoodLensLambdaRole",
@@ -68,7 +117,7 @@ class FoodLensLambdaStack(Stack):
             runtime=aws_lambda.Runtime.PYTHON_3_12,
             handler="agent_handler.handler",
             code=aws_lambda.Code.from_asset(
-                "../lambda",  # Path relative to cdk directory
+                LAMBDA_SOURCE_DIR,
                 bundling=BundlingOptions(
                     image=aws_lambda.Runtime.PYTHON_3_12.bundling_image,
                     command=[
@@ -79,8 +128,9 @@ class FoodLensLambdaStack(Stack):
                 )
             ),
             role=lambda_role,
-            timeout=Duration.seconds(90),  # Increased for AI processing with API calls
-            memory_size=1024,  # Increased for Strands SDK
+            timeout=Duration.seconds(timeout_seconds),  # Increased for AI processing with API calls
+            memory_size=memory_size,  # Increased for Strands SDK
+            reserved_concurrent_executions=reserved_concurrency,
             architecture=aws_lambda.Architecture.ARM_64,
             environment={
                 # Environment variables will be set during deployment
@@ -93,6 +143,31 @@ class FoodLensLambdaStack(Stack):
             description="Food Lens AI Food Advisor using Strands Agents SDK"
         )
 
+        # Publish a version on every code or configuration change and point the
+        # alias at it; provisioned concurrency applies to alias invocations
+        alias = aws_lambda.Alias(
+            self, "FoodLensLambdaAlias",
+            alias_name=self.node.try_get_context("alias_name") or "live",
+            version=lambda_function.current_version,
+            provisioned_concurrent_executions=provisioned_concurrency or None
+        )
+
+        if max_capacity is not None:
+            scaling = alias.add_auto_scaling(
+                min_capacity=provisioned_concurrency,
+                max_capacity=max_capacity
+            )
+            if target_utilization is not None:
+                scaling.scale_on_utilization(utilization_target=target_utilization)
+            for schedule in schedules:
+                scaling.scale_on_schedule(
+                    schedule["name"],
+                    schedule=aws_applicationautoscaling.Schedule.expression(schedule["schedule"]),
+                    min_capacity=schedule["min_capacity"],
+                    max_capacity=schedule["max_capacity"],
+                    time_zone=TimeZone.of(schedule["time_zone"]) if schedule.get("time_zone") else None
+                )
+
         # Create CloudWatch Log Group with retention
         log_group = aws_logs.LogGroup(
             self, "FoodLensLambdaLogGroup",
@@ -113,5 +188,44 @@ class FoodLensLambdaStack(Stack):
             description="Name of the Food Lens Strands Agent Lambda function"
         )
 
-        # Store function reference for potential cross-stack references
-        self.lambda_function = lambda_function
\ No newline at end of file
+        CfnOutput(
+            self, "LambdaAliasArn",
+            value=alias.function_arn,
+            description="ARN of the alias to invoke (uses provisioned concurrency)"
+        )
+
+        # Store function and alias references for potential cross-stack references
+        self.lambda_function = lambda_function
+        self.lambda_alias = alias
+
+    def _context_int(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        """Read an integer from CDK context, which is a string when given with --context."""
+        value = self.node.try_get_context(key)
+        if value is None or value == "":
+            return default
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Context value {key} must be an integer, got {value!r}")
+
+    def _context_float(self, key: str) -> Optional[float]:
+        """Read a number from CDK context."""
+        value = self.node.try_get_context(key)
+        if value is None or value == "":
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Context value {key} must be a number, got {value!r}")
+
+    def _context_schedules(self, key: str) -> List[Dict[str, Any]]:
+        """Read scheduled scaling actions from CDK context (a list, or JSON text)."""
+        value = self.node.try_get_context(key)
+        if not value:
+            return []
+        schedules = json.loads(value) if isinstance(value, str) else value
+        for schedule in schedules:
+            missing = {"name", "schedule", "min_capacity", "max_capacity"} - set(schedule)
+            if missing:
+                raise ValueError(f"Scaling schedule {schedule!r} is missing {', '.join(sorted(missing))}")
+        return schedules
\ No newline at end of file
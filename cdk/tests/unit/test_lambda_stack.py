@@ -0,0 +1,115 @@
+"""
+Synth assertions for FoodLensLambdaStack capacity settings.
+
+Bundling is skipped (no Docker needed), so these run with:
+    cd cdk && pip install -r requirements.txt -r requirements-dev.txt && pytest
+"""
+
+import json
+
+import aws_cdk as cdk
+import pytest
+from aws_cdk.assertions import Match, Template
+
+from stacks.lambda_stack import FoodLensLambdaStack
+
+
+def synth(**context) -> Template:
+    app = cdk.App(context={"aws:cdk:bundling-stacks": [], **context})
+    stack = FoodLensLambdaStack(app, "TestStack", env=cdk.Environment(account="123456789012", region="us-east-1"))
+    return Template.from_stack(stack)
+
+
+def test_defaults_publish_alias_without_provisioned_concurrency():
+    template = synth()
+
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "Timeout": 90,
+        "MemorySize": 1024,
+        "ReservedConcurrentExecutions": Match.absent()
+    })
+    template.resource_count_is("AWS::Lambda::Version", 1)
+    template.has_resource_properties("AWS::Lambda::Alias", {
+        "Name": "live",
+        "ProvisionedConcurrencyConfig": Match.absent()
+    })
+    template.resource_count_is("AWS::ApplicationAutoScaling::ScalableTarget", 0)
+
+
+def test_context_sets_timeout_memory_and_reserved_concurrency():
+    template = synth(timeout_seconds="60", memory_size="512", reserved_concurrency="50")
+
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "Timeout": 60,
+        "MemorySize": 512,
+        "ReservedConcurrentExecutions": 50
+    })
+
+
+def test_provisioned_concurrency_on_alias():
+    template = synth(alias_name="prod", provisioned_concurrency="5")
+
+    template.has_resource_properties("AWS::Lambda::Alias", {
+        "Name": "prod",
+        "ProvisionedConcurrencyConfig": {"ProvisionedConcurrentExecutions": 5}
+    })
+
+
+def test_utilization_and_scheduled_scaling():
+    schedules = [
+        {"name": "lunch", "schedule": "cron(30 10 * * ? *)", "min_capacity": 10, "max_capacity": 40,
+         "time_zone": "Europe/London"},
+        {"name": "night", "schedule": "cron(0 22 * * ? *)", "min_capacity": 2, "max_capacity": 10}
+    ]
+    template = synth(
+        provisioned_concurrency="2",
+        autoscaling_max_capacity="20",
+        autoscaling_target_utilization="0.7",
+        autoscaling_schedules=json.dumps(schedules)
+    )
+
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "MinCapacity": 2,
+        "MaxCapacity": 20,
+        "ScalableDimension": "lambda:function:ProvisionedConcurrency",
+        "ScheduledActions": [
+            {
+                "ScheduledActionName": "lunch",
+                "Schedule": "cron(30 10 * * ? *)",
+                "ScalableTargetAction": {"MinCapacity": 10, "MaxCapacity": 40},
+                "Timezone": "Europe/London"
+            },
+            {
+                "ScheduledActionName": "night",
+                "Schedule": "cron(0 22 * * ? *)",
+                "ScalableTargetAction": {"MinCapacity": 2, "MaxCapacity": 10}
+            }
+        ]
+    })
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalingPolicy", {
+        "PolicyType": "TargetTrackingScaling",
+        "TargetTrackingScalingPolicyConfiguration": Match.object_like({
+            "TargetValue": 0.7,
+            "PredefinedMetricSpecification": {"PredefinedMetricType": "LambdaProvisionedConcurrencyUtilization"}
+        })
+    })
+
+
+def test_alias_arn_is_an_output():
+    template = synth()
+
+    template.has_output("LambdaAliasArn", {"Value": {"Ref": Match.string_like_regexp("FoodLensLambdaAlias")}})
+
+
+@pytest.mark.parametrize("context, message", [
+    ({"autoscaling_target_utilization": "0.7"}, "need autoscaling_max_capacity"),
+    ({"provisioned_concurrency": "10", "autoscaling_max_capacity": "5"}, "at least provisioned_concurrency"),
+    ({"autoscaling_max_capacity": "5", "autoscaling_target_utilization": "70"}, "between 0 and 1"),
+    ({"autoscaling_max_capacity": "5", "autoscaling_target_utilization": "0.7"}, "provisioned_concurrency of at least 1"),
+    ({"reserved_concurrency": "5", "provisioned_concurrency": "10"}, "cannot exceed reserved_concurrency"),
+    ({"memory_size": "lots"}, "must be an integer"),
+    ({"autoscaling_max_capacity": "5", "autoscaling_schedules": '[{"name": "lunch"}]'}, "is missing"),
+])
+def test_invalid_context_is_rejected(context, message):
+    with pytest.raises(ValueError, match=message):
+        synth(**context)
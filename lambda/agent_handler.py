@@ -4,48 +4,103 @@ Provides AI-powered food advisory with custom tools for dish information,
 nutrition lookup, and dietary advice.
 """
 
+import asyncio
+import concurrent.futures
 import json
-import os
 import logging
-from typing import Dict, Any
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import get_settings
+from memory_profile import MemoryTracker, start_tracing
+from structured_logging import configure_logging, flush_logs, log_payload, log_summary, should_sample
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging(get_settings().log_level)
 logger = logging.getLogger(__name__)
 
+# Trace Python allocations from import on when MEMORY_TRACKING=tracemalloc
+start_tracing(get_settings().memory_tracking)
+
 try:
-    from strands import Agent
+    from strands import Agent, tool
+    from strands.models import BedrockModel
+    from strands.tools.executors import ConcurrentToolExecutor
+    from config import RequestContext, current_request
+    from deadline import Deadline, current_deadline
+    from faq_bank import FaqBank, classify_intent
+    from model_router import (
+        MIN_FALLBACK_SECONDS, STANDARD_TIER, TIER_STATS,
+        classify_request, tier_model_config, tier_timeout, tier_tools
+    )
+    from profiler import RequestProfiler, profiling_mode
+    from session_store import create_session_store
+    from tool_executor import as_async
+    from tool_memo import ToolMemo, current_memo, memoized
+    from voice import prepare_speech, render_phrase
+    import warm_state
     from tools.dish_info import get_dish_info
     from tools.smart_nutrition import smart_nutrition_lookup
     from tools.dietary_advice import dietary_advice
+    from tools.http_client import close_http_client
 except ImportError as e:
     logger.error(f"Failed to import required modules: {e}")
     raise
 
-# System prompt for the Food Lens AI advisor
-FOOD_ADVISOR_SYSTEM_PROMPT = """You are a friendly food advisor for Food Lens restaurants. You help customers understand menu items, provide nutritional information, and offer dietary guidance.
+# System prompt for the Food Lens AI advisor. It is static (no per-request
+# content) so that, together with the tool specs, it forms a prefix that
+# Bedrock caches between requests (see model_router.tier_model_config);
+# per-request context goes in the user message
+FOOD_ADVISOR_SYSTEM_PROMPT = """You are a friendly food advisor for Food Lens restaurants. You help customers understand menu items, nutrition and dietary choices.
+
+Use tools for facts instead of memory:
+- get_dish_info for menu items. When the message gives a dish_id, call it with that dish_id and restaurant_id before answering.
+- smart_nutrition_lookup for every nutrition question, including uncommon foods.
+- dietary_advice, when available, for health, allergy and diet guidance.
+
+Responses are read aloud: keep them short and friendly, in plain sentences without markdown, lists or symbols. Always give a helpful answer, never an empty one. Put food safety first and include a medical disclaimer when discussing allergies or medical conditions."""
 
-When responding:
-- Be concise and friendly (responses should be suitable for voice synthesis)
-- ALWAYS provide a helpful response - never return empty or "no response" answers
-- Use fast_nutrition_lookup for ALL nutritional queries - it provides instant responses
-- Always include medical disclaimers for health/allergy questions
-- Format responses for voice synthesis (avoid special characters, use natural language)
-- Focus on the specific restaurant's menu items using get_dish_info when relevant
-- Use dietary_advice tool for health-related guidance with proper disclaimers
+# Conversation sessions shared by all requests in this container
+SESSION_STORE = create_session_store()
 
-Available tools:
-- get_dish_info: Get detailed information about specific menu items from the restaurant
-- smart_nutrition_lookup: Get comprehensive nutritional data for any food item (uses cache + API + web search)
-- dietary_advice: Provide dietary guidance with appropriate medical disclaimers
+# Restore menu and nutrition caches from the latest snapshot during init
+warm_state.warm_up()
 
-Tool usage strategy:
-1. Use smart_nutrition_lookup for ALL nutritional queries - it tries multiple sources for comprehensive coverage
-2. Always provide helpful information, even for uncommon foods
-3. Keep responses concise but informative
-4. Always provide helpful information - never return empty responses
+# Precomputed answers to common per-dish questions (see faq_bank.py)
+SHARED_FAQ_BANK = FaqBank.load() if get_settings().faq_bank else FaqBank()
 
-Always prioritize food safety and include disclaimers when discussing allergies or medical conditions."""
+# Event loop reused by synchronous invocations, so that the tools' pooled
+# HTTP connections survive from one request to the next
+_HANDLER_LOOP = asyncio.new_event_loop()
+_HANDLER_LOOP_LOCK = threading.Lock()
+
+_shared_models: Dict[str, BedrockModel] = {}
+
+
+def get_shared_model(tier: str = STANDARD_TIER) -> BedrockModel:
+    """
+    Get the Bedrock model of a tier, shared by all agents in this process.
+    
+    Agents hold per-request conversation state and are created per request;
+    each tier's model (and its Bedrock client) is built once and reused.
+    """
+    model = _shared_models.get(tier)
+    if model is None:
+        model = _shared_models[tier] = BedrockModel(**tier_model_config(tier))
+    return model
+
+# Tools registered with the agent. All are async so that the calls of one
+# model turn run concurrently; repeated calls within one invocation are
+# answered from the invocation's ToolMemo
+AGENT_TOOLS = [
+    tool(memoized(as_async(t.__wrapped__)))
+    for t in (get_dish_info, smart_nutrition_lookup, dietary_advice)
+]
+
+# Dish lookup for the FAQ bank; memoized like the agent's, so the agent
+# reuses the result when the bank cannot answer
+_lookup_dish = memoized(as_async(get_dish_info.__wrapped__))
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -60,85 +115,409 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         Dict containing response and context information
     """
     try:
-        logger.info(f"Received event: {json.dumps(event, default=str)}")
+        return _run_sync(handler_async(event, context))
+    finally:
+        flush_logs()
+
+
+async def handler_async(event: Dict[str, Any], context: Any, use_faq_bank: bool = True,
+                        tier: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Asyncio-native request path behind :func:`handler`.
+    
+    The request deadline is derived from the Lambda context and published to
+    the tools through :data:`deadline.current_deadline`. When it runs out, the
+    agent task is cancelled (which cancels in-flight upstream requests) and
+    whatever tool results were already gathered are returned.
+    
+    Requests with a "profile" flag (unless PROFILE_FLAG=0), or all requests
+    with PROFILE_REQUESTS, are profiled; a hot-function summary is added to
+    the response body.
+    
+    Args:
+        event: Lambda event containing prompt and context
+        context: Lambda context object
+        use_faq_bank: Whether common dish questions may be answered from the
+            FAQ bank (off while the bank itself is generated)
+        tier: Model tier to answer on, instead of the one the prompt is
+            classified into
+        
+    Returns:
+        Dict containing response and context information
+    """
+    settings = get_settings()
+    mode = profiling_mode(event, settings.profile_requests, allow_flag=settings.profile_flag is not False)
+    if mode is None:
+        return await _handle_request(event, context, use_faq_bank, tier)
+    
+    with RequestProfiler(mode, getattr(context, 'aws_request_id', None)) as profiler:
+        result = await _handle_request(event, context, use_faq_bank, tier)
+    
+    try:
+        report = profiler.report()
+        body = json.loads(result['body'])
+        body['profile'] = report
+        result['body'] = json.dumps(body)
+        logger.info("Profiled request, hottest function: %s", report['hot_functions'][:1])
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Could not attach request profile: %s", e)
+    return result
+
+
+async def _handle_request(event: Dict[str, Any], context: Any, use_faq_bank: bool = True,
+                          tier: Optional[str] = None) -> Dict[str, Any]:
+    """Handle one request; see :func:`handler_async`."""
+    started = time.perf_counter()
+    sampled = should_sample(get_settings().log_sample_rate)
+    summary: Dict[str, Any] = {'request_id': getattr(context, 'aws_request_id', None)}
+    result: Dict[str, Any] = {'statusCode': 500}
+    
+    deadline = Deadline.from_lambda_context(context)
+    deadline_token = current_deadline.set(deadline)
+    memo = ToolMemo()
+    memo_token = current_memo.set(memo)
+    memory = MemoryTracker(get_settings().memory_tracking)
+    
+    # Per-request overrides (e.g. the menu API endpoint) are visible to this
+    # request's tools only, so concurrent requests cannot interfere
+    request_context = event.get('context') or {}
+    request_token = current_request.set(RequestContext(
+        menu_api_endpoint=request_context.get('menuApiEndpoint'),
+        restaurant_id=request_context.get('restaurantId')
+    ))
+    
+    try:
+        memory.begin('prepare')
+        log_payload(logger, 'Received event', event, sampled)
         
         # Extract prompt and context from event
         prompt = event.get('prompt', '')
         restaurant_context = event.get('context', {})
         
         if not prompt:
-            return {
+            result = {
                 'statusCode': 400,
                 'body': json.dumps({
                     'error': 'Missing prompt in request'
                 })
             }
-        
-        # Set API endpoint from context if available
-        if restaurant_context.get('menuApiEndpoint'):
-            os.environ['FOOD_LENS_API_ENDPOINT'] = restaurant_context['menuApiEndpoint']
-        
-        # Initialize Strands Agent with smart tools
-        agent = Agent(
-            system_prompt=FOOD_ADVISOR_SYSTEM_PROMPT,
-            tools=[get_dish_info, smart_nutrition_lookup, dietary_advice],
-        )
+            return result
         
         # Add context to prompt if available
-        enhanced_prompt = prompt
-        if restaurant_context.get('dishId'):
-            enhanced_prompt = f"""Context: Restaurant ID {restaurant_context['restaurantId']}, Dish ID {restaurant_context['dishId']}, Dish Name: {restaurant_context.get('dishName', 'Unknown')}. 
-
-Customer Query: {prompt}
-
-Instructions: Use get_dish_info tool with dish_id="{restaurant_context['dishId']}" and restaurant_id="{restaurant_context['restaurantId']}" to get detailed information about this specific menu item before answering."""
-        elif restaurant_context.get('restaurantId'):
-            enhanced_prompt = f"Context: Restaurant ID {restaurant_context['restaurantId']}. Customer Query: {prompt}"
+        enhanced_prompt = _request_prompt(prompt, restaurant_context)
         
-        logger.info(f"Processing enhanced prompt: {enhanced_prompt}")
+        # Carry the conversation over from earlier requests in the same
+        # session; session IDs are issued here and only valid for the caller
+        # that started the session
+        session_id = event.get('sessionId') or restaurant_context.get('sessionId')
+        session = SESSION_STORE.load(session_id, owner=str(event.get('callerId') or ''))
+        memo.results.update(session.tool_results)
+        session_context = session.context_block()
+        if session_context:
+            enhanced_prompt = f"{session_context}\n\n{enhanced_prompt}"
         
-        # Get response from agent with timeout handling
-        import signal
+        log_payload(logger, 'Processing enhanced prompt', enhanced_prompt, sampled)
         
-        def timeout_handler(signum, frame):
-            raise TimeoutError("Agent processing timed out")
+        # Common questions about the dish in context are answered from the
+        # FAQ bank while the dish is unchanged since the answers were generated;
+        # answers are stored as the agent wrote them and prepared for speech here
+        faq = await _faq_answer(prompt, restaurant_context) if use_faq_bank else None
+        if faq is not None:
+            intent, response_text = faq
+            _, speech_chunks = prepare_speech(response_text)
+            summary.update(faq_intent=intent, prompt_chars=len(prompt), response_chars=len(response_text))
+            body = {
+                'response': response_text,
+                'context': restaurant_context,
+                'partial': False,
+                'speechChunks': [chunk.to_dict() for chunk in speech_chunks]
+            }
+            session.add_turn(prompt, response_text)
+            SESSION_STORE.save(session)
+            body['sessionId'] = session.session_id
+            result = {
+                'statusCode': 200,
+                'body': json.dumps(body)
+            }
+            return result
+        
+        memory.begin('agent')
         
-        # Set a 80-second timeout (10 seconds before Lambda timeout)
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(80)
+        # Simple queries go to the fast tier; if it fails, times out or says
+        # nothing, the standard tier answers (tool results are memoized, so
+        # tools already called are not called again)
+        tier = tier or classify_request(prompt)
+        agent = _create_agent(tier)
+        fallback_from = None
+        tier_started = time.perf_counter()
         
+        # Get response from agent, cancelling it when the deadline runs out
+        partial = False
+        first_text_ms = None
         try:
-            response = agent(enhanced_prompt)
-            signal.alarm(0)  # Cancel the alarm
+            try:
+                response_text, first_text_ms = await _invoke_agent(agent, enhanced_prompt, tier_timeout(tier, deadline.remaining()), sampled)
+                if not response_text and tier != STANDARD_TIER:
+                    raise ValueError('Empty response')
+            except Exception as e:
+                if tier == STANDARD_TIER or deadline.remaining() < MIN_FALLBACK_SECONDS:
+                    raise
+                logger.warning("Model tier %s failed (%s), falling back to %s", tier, type(e).__name__, STANDARD_TIER)
+                TIER_STATS.record(tier, (time.perf_counter() - tier_started) * 1000, fell_back=True)
+                fallback_from, tier = tier, STANDARD_TIER
+                agent = _create_agent(tier)
+                tier_started = time.perf_counter()
+                response_text, first_text_ms = await _invoke_agent(agent, enhanced_prompt, deadline.remaining(), sampled)
             
-            logger.info(f"Agent response: {str(response)}")
+            TIER_STATS.record(tier, (time.perf_counter() - tier_started) * 1000)
             
             # Ensure we always have a valid response
-            response_text = str(response).strip()
-            if not response_text or response_text.lower() in ['none', 'null', '']:
-                response_text = "I apologize, but I'm having trouble processing your request right now. Please try rephrasing your question, and I'll do my best to help you with nutritional information or menu guidance."
+            if not response_text:
+                response_text = render_phrase('empty_response')
                 
-        except TimeoutError:
-            signal.alarm(0)  # Cancel the alarm
-            logger.warning("Agent processing timed out, providing fallback response")
-            response_text = f"I understand you're asking about {prompt}. While I'm processing your request, I can tell you that I'm here to help with nutritional information and menu guidance. Please try asking about specific food items or nutritional aspects, and I'll provide detailed information."
+        except asyncio.TimeoutError:
+            logger.warning("Agent processing timed out, providing partial response")
+            partial = True
+            response_text = _partial_response(prompt, [tool_result for _, _, tool_result in _collect_tool_calls(agent)])
         
-        return {
+        memory.begin('respond')
+        
+        # Speech-ready text, split into chunks for incremental synthesis; the
+        # response itself is returned as written, for display
+        _, speech_chunks = prepare_speech(response_text)
+        
+        tool_calls = _collect_tool_calls(agent)
+        memo_stats = memo.stats()
+        usage = agent.event_loop_metrics.accumulated_usage
+        summary.update(
+            partial=partial,
+            model_tier=tier,
+            tier_fallback_from=fallback_from,
+            prompt_chars=len(prompt),
+            response_chars=len(response_text),
+            tools=[tool_name for tool_name, _, _ in tool_calls],
+            memo_hits=memo_stats['hits'],
+            memo_misses=memo_stats['misses'],
+            model_cycles=agent.event_loop_metrics.cycle_count,
+            input_tokens=usage.get('inputTokens', 0),
+            output_tokens=usage.get('outputTokens', 0),
+            cache_read_tokens=usage.get('cacheReadInputTokens', 0),
+            cache_write_tokens=usage.get('cacheWriteInputTokens', 0),
+            first_text_ms=first_text_ms
+        )
+        
+        body = {
+            'response': response_text,
+            'context': restaurant_context,
+            'partial': partial,
+            'speechChunks': [chunk.to_dict() for chunk in speech_chunks]
+        }
+        
+        for tool_name, tool_input, tool_result in tool_calls:
+            session.add_tool_result(tool_name, tool_input, tool_result)
+        session.add_turn(prompt, response_text)
+        SESSION_STORE.save(session)
+        body['sessionId'] = session.session_id
+        
+        # Persist newly cached menus and nutrition for the next cold start,
+        # without holding up the response
+        warm_state.save_in_background()
+        
+        result = {
             'statusCode': 200,
-            'body': json.dumps({
-                'response': response_text,
-                'context': restaurant_context
-            })
+            'body': json.dumps(body)
         }
+        return result
         
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}", exc_info=True)
-        return {
+        summary['error'] = type(e).__name__
+        result = {
             'statusCode': 500,
             'body': json.dumps({
                 'error': f'Internal server error: {str(e)}'
             })
         }
+        return result
+    finally:
+        summary['status'] = result['statusCode']
+        summary['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        memory_summary = memory.summary()
+        if memory_summary is not None:
+            summary['memory'] = memory_summary
+        log_summary(logger, summary)
+        current_request.reset(request_token)
+        current_memo.reset(memo_token)
+        current_deadline.reset(deadline_token)
+
+
+async def _faq_answer(prompt: str, restaurant_context: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Answer a question from the FAQ bank, if it is a common one about the dish in context.
+    
+    Returns:
+        (intent, answer), or None when the agent has to answer
+    """
+    restaurant_id = restaurant_context.get('restaurantId')
+    dish_id = restaurant_context.get('dishId')
+    if not (restaurant_id and dish_id) or not SHARED_FAQ_BANK.has_dish(restaurant_id, dish_id):
+        return None
+    intent = classify_intent(prompt)
+    if intent is None:
+        return None
+    
+    # The current menu item decides whether the stored answers still apply
+    dish_info = await _lookup_dish(dish_id, restaurant_id)
+    answer = SHARED_FAQ_BANK.lookup(restaurant_id, dish_id, intent, dish_info.get('dish'))
+    return (intent, answer) if answer else None
+
+
+def _create_agent(tier: str) -> Agent:
+    """Create a request's agent with the model and tools of a tier."""
+    return Agent(
+        model=get_shared_model(tier),
+        system_prompt=FOOD_ADVISOR_SYSTEM_PROMPT,
+        tools=tier_tools(tier, AGENT_TOOLS),
+        tool_executor=ConcurrentToolExecutor(),
+        # Text is streamed by _invoke_agent; the default handler would also
+        # print it to stdout, interleaved with the JSON log lines
+        callback_handler=None,
+    )
+
+
+def _request_prompt(prompt: str, restaurant_context: Dict[str, Any]) -> str:
+    """
+    Build the user message: a compact context line followed by the query.
+    
+    Instructions live in the system prompt, so only the IDs vary per request.
+    """
+    fields = []
+    if restaurant_context.get('restaurantId'):
+        fields.append(f"restaurant_id={restaurant_context['restaurantId']}")
+    if restaurant_context.get('dishId'):
+        fields.append(f"dish_id={restaurant_context['dishId']}")
+        if restaurant_context.get('dishName'):
+            fields.append(f"dish_name={json.dumps(restaurant_context['dishName'])}")
+    return f"[{' '.join(fields)}]\n{prompt}" if fields else prompt
+
+
+async def _invoke_agent(agent: Agent, prompt: str, timeout: float, sampled: bool) -> Tuple[str, Optional[float]]:
+    """
+    Run the agent on a prompt, cancelling it after timeout seconds.
+    
+    Returns:
+        Stripped response text (empty when the model returned nothing) and the
+        milliseconds until the first text was streamed, if any
+    """
+    started = time.perf_counter()
+    first_text_ms = None
+    
+    async def run() -> Any:
+        nonlocal first_text_ms
+        result = None
+        # Consume the whole stream; closing it early breaks Strands' tracing
+        async for event in agent.stream_async(prompt):
+            if first_text_ms is None and event.get('data'):
+                first_text_ms = round((time.perf_counter() - started) * 1000, 1)
+            result = event.get('result', result)
+        return result
+    
+    response = await asyncio.wait_for(run(), timeout=timeout)
+    log_payload(logger, 'Agent response', str(response), sampled)
+    response_text = str(response).strip()
+    return ('' if response_text.lower() in ('none', 'null') else response_text), first_text_ms
+
+
+def _run_sync(coro: Any) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    Runs on the module's persistent event loop, falling back to a worker
+    thread when the caller already has a running event loop (e.g. local test
+    scripts driven by asyncio.run) or the persistent loop is busy.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        if _HANDLER_LOOP_LOCK.acquire(blocking=False):
+            try:
+                return _HANDLER_LOOP.run_until_complete(coro)
+            finally:
+                _HANDLER_LOOP_LOCK.release()
+    
+    async def run_isolated():
+        try:
+            return await coro
+        finally:
+            await close_http_client()
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, run_isolated()).result()
+
+
+def _collect_tool_calls(agent: Agent) -> List[Tuple[str, Dict[str, Any], Any]]:
+    """
+    Collect the tool calls that completed during an agent run.
+    
+    Args:
+        agent: Agent whose conversation to inspect
+        
+    Returns:
+        List of (tool name, tool input, result) tuples, oldest first; results
+        are parsed from JSON where possible
+    """
+    tool_uses = {}
+    calls = []
+    for message in agent.messages:
+        for block in message.get('content', []):
+            tool_use = block.get('toolUse')
+            if tool_use:
+                tool_uses[tool_use.get('toolUseId')] = tool_use
+            
+            tool_result = block.get('toolResult')
+            if not tool_result or tool_result.get('status') != 'success':
+                continue
+            tool_use = tool_uses.get(tool_result.get('toolUseId'), {})
+            for content in tool_result.get('content', []):
+                if 'json' in content:
+                    result = content['json']
+                elif 'text' in content:
+                    try:
+                        result = json.loads(content['text'])
+                    except ValueError:
+                        result = content['text']
+                else:
+                    continue
+                calls.append((tool_use.get('name', ''), tool_use.get('input', {}), result))
+    return calls
+
+
+def _partial_response(prompt: str, tool_results: List[Any]) -> str:
+    """
+    Build a response from the tool results gathered before a timeout.
+    
+    Args:
+        prompt: Original customer query
+        tool_results: Results returned by tools so far
+        
+    Returns:
+        Response text suitable for voice synthesis
+    """
+    findings = []
+    for result in tool_results:
+        if isinstance(result, str):
+            findings.append(result)
+        elif isinstance(result, dict):
+            if result.get('nutritional_info'):
+                findings.append(result['nutritional_info'])
+            elif isinstance(result.get('dish'), dict):
+                dish = result['dish']
+                findings.append(' '.join(part for part in [dish.get('name', ''), dish.get('description', '')] if part))
+    
+    if findings:
+        return render_phrase('partial_intro') + "\n\n" + "\n\n".join(findings)
+    
+    return f"I understand you're asking about {prompt}. While I'm processing your request, I can tell you that I'm here to help with nutritional information and menu guidance. Please try asking about specific food items or nutritional aspects, and I'll provide detailed information."
 
 
 # For local testing
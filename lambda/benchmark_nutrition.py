@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Latency and accuracy benchmark for the nutrition lookup tools.
+
+A deterministic corpus of several thousand food names is generated from a
+reference table: common foods, regional dishes (amala, fufu, egusi soup, ...),
+misspellings and multi-word dishes, with repeats and case variants as in real
+traffic. Every name is run through smart_nutrition_lookup and
+fast_nutrition_lookup, with USDA FoodData Central and DuckDuckGo replaced by
+local stand-ins that answer from the same reference table with simulated
+latency and errors.
+
+The report lists latency percentiles, the mix of answer sources (cache, USDA,
+web search, estimate), errors and the nutrient error against the reference
+values, per tool and corpus category. Each tool runs --repeats times from
+empty caches; the overall latency figures are the median over the runs, so
+that one noisy run does not decide the comparison. With --baseline the run
+fails (exit status 1) when latency, accuracy or errors regress beyond the
+thresholds.
+
+Usage:
+    python benchmark_nutrition.py [--size 3000] [--save report.json]
+    python benchmark_nutrition.py --baseline report.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+# Add current directory to Python path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('USDA_API_KEY', 'benchmark')
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+import httpx
+
+from tools import rate_limit
+from tools.fast_nutrition import fast_nutrition_lookup
+from tools.http_client import use_http_client
+from tools.nutrition_cache import SHARED_NUTRITION_CACHE, normalize_food_name
+from tools.smart_nutrition import smart_nutrition_lookup
+from tools.web_search import clear_search_cache
+
+# Reference values per 100g: (calories, protein g, fat g, carbs g)
+COMMON_FOODS = {
+    'apple': (52, 0.3, 0.2, 14.0), 'banana': (89, 1.1, 0.3, 23.0), 'orange': (47, 0.9, 0.1, 12.0),
+    'mango': (60, 0.8, 0.4, 15.0), 'grapes': (69, 0.7, 0.2, 18.0), 'strawberries': (32, 0.7, 0.3, 7.7),
+    'rice': (130, 2.7, 0.3, 28.0), 'brown rice': (112, 2.3, 0.8, 24.0), 'pasta': (131, 5.0, 1.1, 25.0),
+    'bread': (265, 9.0, 3.2, 49.0), 'oats': (389, 17.0, 7.0, 66.0), 'quinoa': (120, 4.4, 1.9, 22.0),
+    'chicken': (165, 31.0, 3.6, 0.0), 'chicken breast': (165, 31.0, 3.6, 0.0), 'beef': (250, 26.0, 15.0, 0.0),
+    'pork': (242, 27.0, 14.0, 0.0), 'turkey': (189, 29.0, 7.0, 0.0), 'lamb': (294, 25.0, 21.0, 0.0),
+    'fish': (206, 22.0, 12.0, 0.0), 'salmon': (208, 20.0, 13.0, 0.0), 'tuna': (132, 28.0, 1.3, 0.0),
+    'shrimp': (99, 24.0, 0.3, 0.2), 'egg': (155, 13.0, 11.0, 1.1), 'tofu': (76, 8.0, 4.8, 1.9),
+    'milk': (42, 3.4, 1.0, 5.0), 'cheese': (402, 25.0, 33.0, 1.3), 'yogurt': (59, 10.0, 0.4, 3.6),
+    'butter': (717, 0.9, 81.0, 0.1), 'olive oil': (884, 0.0, 100.0, 0.0), 'avocado': (160, 2.0, 15.0, 9.0),
+    'almonds': (579, 21.0, 50.0, 22.0), 'peanuts': (567, 26.0, 49.0, 16.0), 'beans': (127, 8.7, 0.5, 23.0),
+    'black beans': (132, 8.9, 0.5, 24.0), 'lentils': (116, 9.0, 0.4, 20.0), 'chickpeas': (164, 8.9, 2.6, 27.0),
+    'potato': (77, 2.0, 0.1, 17.0), 'sweet potato': (86, 1.6, 0.1, 20.0), 'corn': (86, 3.3, 1.4, 19.0),
+    'broccoli': (34, 2.8, 0.4, 7.0), 'spinach': (23, 2.9, 0.4, 3.6), 'carrot': (41, 0.9, 0.2, 10.0),
+    'tomato': (18, 0.9, 0.2, 3.9), 'cabbage': (25, 1.3, 0.1, 5.8), 'lettuce': (15, 1.4, 0.2, 2.9),
+    'cucumber': (15, 0.7, 0.1, 3.6), 'onion': (40, 1.1, 0.1, 9.3), 'mushrooms': (22, 3.1, 0.3, 3.3),
+    'pizza': (266, 11.0, 10.4, 33.0), 'hamburger': (295, 17.0, 14.0, 24.0), 'french fries': (312, 3.4, 15.0, 41.0),
+}
+
+REGIONAL_FOODS = {
+    'amala': (118, 1.2, 0.2, 27.0), 'fufu': (267, 1.9, 0.2, 65.0), 'eba': (160, 0.6, 0.3, 38.0),
+    'pounded yam': (118, 1.5, 0.2, 28.0), 'jollof rice': (150, 3.5, 2.0, 30.0), 'fried rice': (163, 4.0, 4.5, 27.0),
+    'egusi soup': (200, 9.0, 16.0, 6.0), 'ogbono soup': (180, 7.0, 14.0, 7.0), 'efo riro': (120, 6.0, 8.0, 6.0),
+    'pepper soup': (75, 9.0, 3.0, 3.0), 'suya': (270, 27.0, 16.0, 4.0), 'moi moi': (135, 8.0, 5.0, 15.0),
+    'akara': (270, 10.0, 17.0, 20.0), 'plantain': (122, 1.3, 0.4, 32.0), 'dodo': (230, 1.2, 11.0, 32.0),
+    'yam': (118, 1.5, 0.2, 28.0), 'garri': (360, 1.0, 0.5, 88.0), 'tuwo shinkafa': (130, 2.5, 0.3, 29.0),
+    'ofada rice': (120, 2.6, 0.9, 25.0), 'kelewele': (200, 1.5, 8.0, 32.0), 'waakye': (155, 6.0, 1.5, 29.0),
+    'banku': (150, 2.0, 0.8, 33.0), 'kenkey': (140, 2.5, 0.9, 30.0), 'injera': (166, 5.8, 1.0, 33.0),
+    'ugali': (120, 2.5, 0.5, 26.0), 'chapati': (297, 7.0, 10.0, 45.0), 'puff puff': (340, 6.0, 14.0, 47.0),
+    'chin chin': (480, 7.0, 22.0, 62.0), 'edikang ikong': (110, 7.0, 7.0, 5.0), 'nkwobi': (210, 18.0, 14.0, 3.0),
+}
+
+PREPARATIONS = ['grilled', 'fried', 'boiled', 'baked', 'steamed', 'roasted', 'spicy', 'fresh']
+
+CATEGORIES = ('common', 'regional', 'misspelled', 'multi-word')
+
+# Simulated stand-in behaviour: (median latency in seconds, error rate)
+USDA_STAND_IN = (0.18, 0.02)
+WEB_STAND_IN = (0.25, 0.03)
+
+# Regression thresholds used with --baseline
+MAX_LATENCY_REGRESSION = 0.20  # Relative increase of p50/p90 latency...
+MIN_LATENCY_REGRESSION_MS = 5.0  # ...that is also at least this large (cache hits take microseconds)
+MAX_ACCURACY_REGRESSION = 3.0  # Percentage points of calorie error
+MAX_ERROR_RATE_REGRESSION = 1.0  # Percentage points of failed lookups
+
+# Overall figures taken as the median over repeated runs
+LATENCY_METRICS = ('throughput_per_s', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms')
+
+
+def _misspell(name: str, rng: random.Random) -> str:
+    """Apply one typo: drop, double, swap or replace a letter."""
+    positions = [i for i, char in enumerate(name) if char.isalpha()]
+    i = rng.choice(positions)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return name[:i] + name[i + 1:]
+    if kind == 1:
+        return name[:i] + name[i] + name[i:]
+    if kind == 2 and i + 1 < len(name) and name[i + 1].isalpha():
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice('aeiou') + name[i + 1:]
+
+
+def _variant(name: str, rng: random.Random) -> str:
+    """Spell a name the way customers type it."""
+    return rng.choice([name, name, name.title(), name.upper(), f"  {name} "])
+
+
+def build_corpus(size: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Generate the benchmark corpus.
+
+    Returns:
+        Entries with the queried name, its category and reference values
+    """
+    rng = random.Random(seed)
+    common, regional = list(COMMON_FOODS.items()), list(REGIONAL_FOODS.items())
+    corpus = []
+    while len(corpus) < size:
+        category = rng.choice(CATEGORIES)
+        if category == 'common':
+            name, reference = rng.choice(common)
+        elif category == 'regional':
+            name, reference = rng.choice(regional)
+        elif category == 'misspelled':
+            name, reference = rng.choice(common + regional)
+            name = _misspell(name, rng)
+        else:
+            (first, first_ref), (second, second_ref) = rng.choice(common + regional), rng.choice(common + regional)
+            if rng.random() < 0.5:
+                name, reference = f"{rng.choice(PREPARATIONS)} {first}", first_ref
+            else:
+                name = f"{first} with {second}"
+                reference = tuple((a + b) / 2 for a, b in zip(first_ref, second_ref))
+        corpus.append({'name': _variant(name, rng), 'category': category, 'reference': list(reference)})
+    return corpus
+
+
+# Stand-in upstreams
+
+def _stand_in_rng(request: httpx.Request) -> random.Random:
+    # Seeded by the request, so that runs are repeatable
+    return random.Random(zlib.crc32(str(request.url).encode()))
+
+
+async def _usda_search(request: httpx.Request, latency_scale: float) -> httpx.Response:
+    rng = _stand_in_rng(request)
+    median, error_rate = USDA_STAND_IN
+    await asyncio.sleep(rng.lognormvariate(math.log(median), 0.4) * latency_scale)
+    if rng.random() < error_rate:
+        return httpx.Response(500)
+
+    # Like FoodData Central, only matches words it knows; no regional dishes
+    query = normalize_food_name(request.url.params.get('query', ''))
+    matches = [name for name in COMMON_FOODS if name in query]
+    if not matches:
+        return httpx.Response(200, json={'foods': []})
+    name = max(matches, key=len)
+    calories, protein, fat, carbs = COMMON_FOODS[name]
+    return httpx.Response(200, json={'foods': [{
+        'fdcId': zlib.crc32(name.encode()) % 1000000,
+        'description': name.title(),
+        'foodNutrients': [
+            {'nutrientId': 1008, 'value': calories},
+            {'nutrientId': 1003, 'value': protein},
+            {'nutrientId': 1004, 'value': fat},
+            {'nutrientId': 1005, 'value': carbs},
+        ]
+    }]})
+
+
+async def _web_search(request: httpx.Request, latency_scale: float) -> httpx.Response:
+    rng = _stand_in_rng(request)
+    median, error_rate = WEB_STAND_IN
+    await asyncio.sleep(rng.lognormvariate(math.log(median), 0.5) * latency_scale)
+    if rng.random() < error_rate:
+        return httpx.Response(503)
+
+    query = normalize_food_name(request.url.params.get('q', ''))
+    matches = [name for name in REGIONAL_FOODS if name in query]
+    if not matches:
+        return httpx.Response(200, json={'Abstract': '', 'RelatedTopics': []})
+    name = max(matches, key=len)
+    calories, protein, fat, carbs = REGIONAL_FOODS[name]
+    abstract = (f"{name.title()} is a popular West African dish. A 100 g serving has about {calories:g} calories, "
+                f"{protein:g} g of protein, {fat:g} g of fat and {carbs:g} g of carbohydrates.")
+    return httpx.Response(200, json={'Abstract': abstract, 'RelatedTopics': []})
+
+
+def stand_in_client(latency_scale: float) -> httpx.AsyncClient:
+    """HTTP client whose USDA and DuckDuckGo requests are answered locally."""
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.host == 'api.nal.usda.gov':
+            return await _usda_search(request, latency_scale)
+        if request.url.host == 'api.duckduckgo.com':
+            return await _web_search(request, latency_scale)
+        return httpx.Response(404)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handle))
+
+
+# Running and scoring
+
+def source_kind(source: str) -> str:
+    """Classify a lookup result's source."""
+    if 'Cached' in source or source == 'Nutritional Database' or 'Similar to' in source:
+        return 'cache'
+    if source.startswith('USDA'):
+        return 'usda'
+    if source.startswith('Web'):
+        return 'web'
+    if source.startswith('Estimated'):
+        return 'estimate'
+    return 'other'
+
+
+async def run_tool(tool_name: str, lookup, corpus: List[Dict[str, Any]], concurrency: int,
+                   latency_scale: float) -> List[Dict[str, Any]]:
+    """Look up every corpus name with one tool; returns one outcome per entry."""
+    use_http_client(stand_in_client(latency_scale))
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(entry: Dict[str, Any]) -> Dict[str, Any]:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                result = await lookup(entry['name'])
+                error = None if result.get('success') else 'unsuccessful'
+            except Exception as e:
+                result, error = {}, type(e).__name__
+            latency_ms = (time.perf_counter() - started) * 1000
+
+        outcome = {'category': entry['category'], 'latency_ms': latency_ms, 'error': error,
+                   'source': source_kind(result.get('source', ''))}
+        nutrients = result.get('raw_nutrients') or {}
+        reference = entry['reference']
+        if nutrients.get('calories') is not None and reference[0]:
+            outcome['calorie_error'] = abs(nutrients['calories'] - reference[0]) / reference[0] * 100
+            outcome['macro_error'] = statistics.mean(
+                abs(nutrients.get(field, 0.0) - value) for field, value in zip(('protein', 'fat', 'carbs'), reference[1:])
+            )
+        elif error is None:
+            outcome['error'] = 'no calories'
+        return outcome
+
+    return await asyncio.gather(*(one(entry) for entry in corpus))
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def summarize(outcomes: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Latency percentiles, source mix, errors and accuracy of a set of outcomes."""
+    latencies = [outcome['latency_ms'] for outcome in outcomes]
+    calorie_errors = [outcome['calorie_error'] for outcome in outcomes if 'calorie_error' in outcome]
+    macro_errors = [outcome['macro_error'] for outcome in outcomes if 'macro_error' in outcome]
+    sources = Counter(outcome['source'] for outcome in outcomes)
+    errors = Counter(outcome['error'] for outcome in outcomes if outcome['error'])
+    return {
+        'lookups': len(outcomes),
+        'throughput_per_s': round(len(outcomes) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(_percentile(latencies, 0.50), 2),
+        'p90_ms': round(_percentile(latencies, 0.90), 2),
+        'p99_ms': round(_percentile(latencies, 0.99), 2),
+        'max_ms': round(max(latencies, default=0.0), 2),
+        'sources': {kind: round(100.0 * count / len(outcomes), 1) for kind, count in sorted(sources.items())},
+        'error_rate': round(100.0 * sum(errors.values()) / len(outcomes), 2) if outcomes else 0.0,
+        'errors': dict(errors),
+        'calorie_error_mean': round(statistics.mean(calorie_errors), 2) if calorie_errors else None,
+        'calorie_error_median': round(statistics.median(calorie_errors), 2) if calorie_errors else None,
+        'within_20_percent': round(100.0 * sum(e <= 20 for e in calorie_errors) / len(calorie_errors), 1) if calorie_errors else None,
+        'macro_error_mean_g': round(statistics.mean(macro_errors), 2) if macro_errors else None,
+    }
+
+
+def check_regressions(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Describe every metric that regressed beyond its threshold against the baseline."""
+    failures = []
+    for tool_name, current in report['tools'].items():
+        previous = baseline.get('tools', {}).get(tool_name)
+        if previous is None:
+            continue
+        overall, before = current['overall'], previous['overall']
+        for metric in ('p50_ms', 'p90_ms'):
+            allowed = max(before[metric] * (1 + MAX_LATENCY_REGRESSION), before[metric] + MIN_LATENCY_REGRESSION_MS)
+            if overall[metric] > allowed:
+                failures.append(f"{tool_name}: {metric} {before[metric]} -> {overall[metric]}")
+        if before['calorie_error_mean'] is not None and overall['calorie_error_mean'] is not None:
+            if overall['calorie_error_mean'] > before['calorie_error_mean'] + MAX_ACCURACY_REGRESSION:
+                failures.append(f"{tool_name}: calorie error {before['calorie_error_mean']}% -> {overall['calorie_error_mean']}%")
+        if overall['error_rate'] > before['error_rate'] + MAX_ERROR_RATE_REGRESSION:
+            failures.append(f"{tool_name}: error rate {before['error_rate']}% -> {overall['error_rate']}%")
+    return failures
+
+
+def _fresh_caches() -> None:
+    """Start a run from empty caches and rate-limit buckets."""
+    SHARED_NUTRITION_CACHE.clear()
+    clear_search_cache()
+    rate_limit.configure_rate_limits(rate_limit.MemoryBucketStore())
+
+
+@contextmanager
+def _unlimited_upstreams() -> Iterator[None]:
+    """Lift the upstream rate limits for the duration of the benchmark."""
+    # The stand-ins have no quota; real limits would turn most of the run into estimates
+    limits = dict(rate_limit.UPSTREAM_LIMITS)
+    rate_limit.UPSTREAM_LIMITS.update({'usda': (1e6, 1e6), 'duckduckgo': (1e6, 1e6)})
+    try:
+        yield
+    finally:
+        rate_limit.UPSTREAM_LIMITS.clear()
+        rate_limit.UPSTREAM_LIMITS.update(limits)
+        rate_limit.configure_rate_limits()
+
+
+def benchmark_tool(tool_name: str, lookup, corpus: List[Dict[str, Any]], concurrency: int,
+                   latency_scale: float, repeats: int) -> Dict[str, Any]:
+    """
+    Run one tool over the corpus several times and summarize the runs.
+
+    Sources, errors and accuracy come from the first run (the stand-ins are
+    deterministic); overall latency and throughput are medians over all runs.
+    """
+    runs = []
+    for _ in range(max(repeats, 1)):
+        _fresh_caches()
+        started = time.perf_counter()
+        outcomes = asyncio.run(run_tool(tool_name, lookup, corpus, concurrency, latency_scale))
+        runs.append((outcomes, summarize(outcomes, time.perf_counter() - started)))
+
+    outcomes, overall = runs[0]
+    for metric in LATENCY_METRICS:
+        values = [summary[metric] for _, summary in runs]
+        overall[metric] = round(statistics.median(values), 2)
+        overall[f"{metric}_runs"] = values
+
+    by_category = defaultdict(list)
+    for outcome in outcomes:
+        by_category[outcome['category']].append(outcome)
+    return {
+        'runs': len(runs),
+        'overall': overall,
+        'categories': {category: summarize(items, 0) for category, items in by_category.items()}
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("=" * 96)
+    print(f"{'Tool':<8} {'Category':<11} {'n':>5} {'p50':>8} {'p90':>8} {'p99':>8} {'err%':>6} "
+          f"{'kcal err%':>9} {'<=20%':>6}  Sources")
+    print("=" * 96)
+    for tool_name, tool_report in report['tools'].items():
+        for category, summary in [('all', tool_report['overall'])] + sorted(tool_report['categories'].items()):
+            sources = ' '.join(f"{kind}={share:g}" for kind, share in summary['sources'].items())
+            kcal = '-' if summary['calorie_error_mean'] is None else f"{summary['calorie_error_mean']:.1f}"
+            within = '-' if summary['within_20_percent'] is None else f"{summary['within_20_percent']:.0f}"
+            print(f"{tool_name:<8} {category:<11} {summary['lookups']:>5} {summary['p50_ms']:>8.2f} "
+                  f"{summary['p90_ms']:>8.2f} {summary['p99_ms']:>8.2f} {summary['error_rate']:>6.1f} "
+                  f"{kcal:>9} {within:>6}  {sources}")
+    print("Latency in ms; sources in % of lookups")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark nutrition lookup latency and accuracy')
+    parser.add_argument('--size', type=int, default=3000, help='Corpus size')
+    parser.add_argument('--seed', type=int, default=7, help='Corpus seed')
+    parser.add_argument('--tool', choices=['smart', 'fast', 'both'], default='both')
+    parser.add_argument('--concurrency', type=int, default=32, help='Lookups in flight')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='Multiplier for stand-in latencies')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per tool; latency is the median over them')
+    parser.add_argument('--save', help='Write the report as JSON (e.g. to use as a baseline)')
+    parser.add_argument('--baseline', help='Fail when regressing against this saved report')
+    parser.add_argument('--write-corpus', help='Write the generated corpus as JSON lines and exit')
+    args = parser.parse_args()
+    logging.basicConfig(level=os.environ['LOG_LEVEL'])
+
+    corpus = build_corpus(args.size, args.seed)
+    if args.write_corpus:
+        with open(args.write_corpus, 'w') as handle:
+            handle.writelines(json.dumps(entry) + '\n' for entry in corpus)
+        return
+
+    tools = {'smart': smart_nutrition_lookup, 'fast': fast_nutrition_lookup}
+    selected = list(tools) if args.tool == 'both' else [args.tool]
+    report: Dict[str, Any] = {'size': args.size, 'seed': args.seed, 'latency_scale': args.latency_scale,
+                              'repeats': args.repeats, 'tools': {}}
+
+    with _unlimited_upstreams():
+        for tool_name in selected:
+            report['tools'][tool_name] = benchmark_tool(tool_name, tools[tool_name].__wrapped__, corpus,
+                                                        args.concurrency, args.latency_scale, args.repeats)
+
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            failures = check_regressions(report, json.load(handle))
+        if failures:
+            print("\nREGRESSIONS:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
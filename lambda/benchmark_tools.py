@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark of multi-tool prompts for the Food Lens agent.
+
+A scripted model requests several tools in a single turn (dish info,
+nutrition for two foods and dietary advice) and then answers. The tools are
+stand-ins with fixed upstream latencies, wrapped exactly like the handler's
+AGENT_TOOLS, so the benchmark measures tool scheduling rather than network
+or model time. Each scenario runs with strands' sequential and concurrent
+tool executors.
+
+Usage:
+    python benchmark_tools.py [--runs 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add current directory to Python path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+
+from strands import Agent, tool
+from strands.models import Model
+from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+
+from tool_executor import as_async
+from tool_memo import ToolMemo, current_memo, memoized
+
+# Simulated upstream latencies (seconds)
+MENU_API_LATENCY = 0.3
+NUTRITION_LATENCY = 0.4
+ADVICE_LATENCY = 0.1
+
+
+async def get_dish_info(dish_id: str, restaurant_id: str) -> dict:
+    """Stand-in for tools.dish_info.get_dish_info."""
+    await asyncio.sleep(MENU_API_LATENCY)
+    return {'success': True, 'dish': {'id': dish_id, 'name': 'Jollof Rice'}}
+
+
+async def smart_nutrition_lookup(food_name: str) -> dict:
+    """Stand-in for tools.smart_nutrition.smart_nutrition_lookup."""
+    await asyncio.sleep(NUTRITION_LATENCY)
+    return {'success': True, 'food_name': food_name, 'nutritional_info': f'{food_name}: 150 calories per 100g'}
+
+
+def dietary_advice(query: str) -> str:
+    """Stand-in for tools.dietary_advice.dietary_advice (blocking)."""
+    time.sleep(ADVICE_LATENCY)
+    return f'General advice for: {query}'
+
+
+BENCHMARK_TOOLS = [tool(memoized(as_async(func))) for func in (get_dish_info, smart_nutrition_lookup, dietary_advice)]
+
+SCENARIOS = {
+    'dish + 2 nutrition + advice': [
+        ('get_dish_info', {'dish_id': 'dish-1', 'restaurant_id': 'rest-1'}),
+        ('smart_nutrition_lookup', {'food_name': 'jollof rice'}),
+        ('smart_nutrition_lookup', {'food_name': 'fried plantain'}),
+        ('dietary_advice', {'query': 'is this ok for diabetes'}),
+    ],
+    '3 nutrition (1 repeated)': [
+        ('smart_nutrition_lookup', {'food_name': 'egusi soup'}),
+        ('smart_nutrition_lookup', {'food_name': 'pounded yam'}),
+        ('smart_nutrition_lookup', {'food_name': 'Egusi Soup'}),
+    ],
+}
+
+
+class ScriptedModel(Model):
+    """Model that requests a fixed set of tools, then answers."""
+
+    def __init__(self, tool_calls):
+        self.tool_calls = tool_calls
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        yield {'messageStart': {'role': 'assistant'}}
+        if messages[-1]['content'] and 'toolResult' in messages[-1]['content'][0]:
+            yield {'contentBlockDelta': {'delta': {'text': 'Here is what I found.'}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'end_turn'}}
+            return
+
+        for index, (name, tool_input) in enumerate(self.tool_calls):
+            yield {'contentBlockStart': {'start': {'toolUse': {'name': name, 'toolUseId': f'tool-{index}'}}}}
+            yield {'contentBlockDelta': {'delta': {'toolUse': {'input': json.dumps(tool_input)}}}}
+            yield {'contentBlockStop': {}}
+        yield {'messageStop': {'stopReason': 'tool_use'}}
+
+
+async def run_once(tool_calls, executor) -> float:
+    """Run one scripted invocation and return its wall time in seconds."""
+    agent = Agent(
+        model=ScriptedModel(tool_calls),
+        tools=BENCHMARK_TOOLS,
+        tool_executor=executor,
+        callback_handler=None
+    )
+    token = current_memo.set(ToolMemo())
+    try:
+        started = time.perf_counter()
+        await agent.invoke_async('benchmark')
+        return time.perf_counter() - started
+    finally:
+        current_memo.reset(token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark multi-tool prompts')
+    parser.add_argument('--runs', type=int, default=5, help='Invocations per scenario and executor')
+    args = parser.parse_args()
+
+    print("=" * 64)
+    print(f"{'Scenario':<30} {'Executor':<12} {'p50 (ms)':>9} {'max (ms)':>9}")
+    print("=" * 64)
+
+    for scenario, tool_calls in SCENARIOS.items():
+        for executor_name, executor_class in (('sequential', SequentialToolExecutor),
+                                              ('concurrent', ConcurrentToolExecutor)):
+            timings = [asyncio.run(run_once(tool_calls, executor_class())) * 1000 for _ in range(args.runs)]
+            print(f"{scenario:<30} {executor_name:<12} {statistics.median(timings):>9.0f} {max(timings):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,9 @@ Configuration and constants for Food Lens Strands Agent Lambda function.
 """
 
 import os
-from typing import Dict, Any
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Any, Mapping, Optional, Tuple
 
 # Environment variable names
 ENV_VARS = {
@@ -48,19 +50,145 @@ TOOL_CONFIG = {
     }
 }
 
+# Model tiers. The query classifier sends short factual questions to "fast";
+# everything else, and any request the fast tier fails, goes to "standard".
+# Model IDs come from Settings (MODEL_ID, FAST_MODEL_ID)
+MODEL_TIERS = {
+    'fast': {
+        'tools': ['get_dish_info', 'smart_nutrition_lookup'],
+        'max_tokens': 400,
+        'timeout': 8.0,  # Seconds before falling back to the standard tier
+        'max_words': 20  # Longest query the classifier sends to this tier
+    },
+    'standard': {
+        'tools': ['get_dish_info', 'smart_nutrition_lookup', 'dietary_advice'],
+        'max_tokens': None,
+        'timeout': None,
+        'max_words': None
+    }
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Process-wide settings, read from the environment once at import."""
+    
+    food_lens_api_endpoint: Optional[str] = None
+    food_lens_api_key: Optional[str] = None
+    usda_api_key: Optional[str] = None
+    aws_region: str = 'us-east-1'
+    log_level: str = DEFAULT_CONFIG['log_level']
+    session_store_path: Optional[str] = None
+    rate_limit_state_file: Optional[str] = None
+    max_tool_threads: int = 4
+    warm_snapshot_path: str = '/tmp/food-lens-warm-state'
+    log_sample_rate: float = 0.01
+    profile_requests: Optional[str] = None
+    profile_flag: Optional[bool] = None  # Honor per-event "profile" flags; None leaves it to the entry point
+    model_id: Optional[str] = None
+    fast_model_id: str = 'global.anthropic.claude-haiku-4-5-20251001-v1:0'
+    model_tiering: bool = True
+    prompt_caching: bool = True
+    memory_tracking: str = 'rss'
+    faq_bank: bool = True
+    menu_api_allowlist: Tuple[str, ...] = ()  # Menu API endpoints HTTP callers may select
+    caller_id_header: Optional[str] = None  # Header a trusted proxy sets to the authenticated caller (server mode)
+    
+    @classmethod
+    def from_environ(cls, environ: Mapping[str, str] = os.environ) -> 'Settings':
+        """Build settings from environment variables, using defaults for unset ones."""
+        defaults = cls()
+        return cls(
+            food_lens_api_endpoint=environ.get('FOOD_LENS_API_ENDPOINT') or None,
+            food_lens_api_key=environ.get('FOOD_LENS_API_KEY') or None,
+            usda_api_key=environ.get('USDA_API_KEY') or None,
+            aws_region=environ.get('AWS_REGION') or defaults.aws_region,
+            log_level=environ.get('LOG_LEVEL') or defaults.log_level,
+            session_store_path=environ.get('SESSION_STORE_PATH') or None,
+            rate_limit_state_file=environ.get('RATE_LIMIT_STATE_FILE') or None,
+            max_tool_threads=int(environ.get('MAX_TOOL_THREADS') or defaults.max_tool_threads),
+            warm_snapshot_path=environ.get('WARM_SNAPSHOT_PATH') or defaults.warm_snapshot_path,
+            log_sample_rate=float(environ.get('LOG_SAMPLE_RATE') or defaults.log_sample_rate),
+            profile_requests=environ.get('PROFILE_REQUESTS') or None,
+            profile_flag=environ['PROFILE_FLAG'].lower() not in ('0', 'false', 'off') if environ.get('PROFILE_FLAG') else None,
+            model_id=environ.get('MODEL_ID') or None,
+            fast_model_id=environ.get('FAST_MODEL_ID') or defaults.fast_model_id,
+            model_tiering=environ.get('MODEL_TIERING', '1').lower() not in ('0', 'false', 'off'),
+            prompt_caching=environ.get('PROMPT_CACHING', '1').lower() not in ('0', 'false', 'off'),
+            memory_tracking=(environ.get('MEMORY_TRACKING') or defaults.memory_tracking).lower(),
+            faq_bank=environ.get('FAQ_BANK', '1').lower() not in ('0', 'false', 'off'),
+            menu_api_allowlist=tuple(
+                endpoint.strip() for endpoint in environ.get('MENU_API_ALLOWLIST', '').split(',') if endpoint.strip()
+            ),
+            caller_id_header=(environ.get('CALLER_ID_HEADER') or '').strip().lower() or None
+        )
+
+
+SETTINGS = Settings.from_environ()
+
+
+def get_settings() -> Settings:
+    """
+    Get the process-wide settings.
+    
+    Returns:
+        Settings built from the environment at import
+    """
+    return SETTINGS
+
+
+@dataclass(frozen=True, slots=True)
+class RequestContext:
+    """Per-request overrides of settings, carried in :data:`current_request`."""
+    
+    menu_api_endpoint: Optional[str] = None
+    restaurant_id: Optional[str] = None
+
+
+current_request: ContextVar[RequestContext] = ContextVar('current_request', default=RequestContext())
+
+
+def get_menu_api_endpoint() -> Optional[str]:
+    """
+    Get the Food Lens API endpoint for the current request.
+    
+    Returns:
+        The endpoint from the request context if set, otherwise FOOD_LENS_API_ENDPOINT
+    """
+    return current_request.get().menu_api_endpoint or SETTINGS.food_lens_api_endpoint
+
+
+def menu_api_base_url(endpoint: Optional[str]) -> str:
+    """Base URL of a Food Lens API endpoint, without a trailing /api or slash."""
+    base_url = (endpoint or '').rstrip('/')
+    if base_url.endswith('/api'):
+        base_url = base_url[:-len('/api')]
+    return base_url
+
+
+def is_allowed_menu_api_endpoint(endpoint: str) -> bool:
+    """
+    Whether a caller-supplied menu API endpoint may be used.
+    
+    Only FOOD_LENS_API_ENDPOINT and the endpoints in MENU_API_ALLOWLIST are
+    accepted, so callers cannot point the menu fetch at arbitrary hosts.
+    """
+    allowed = (SETTINGS.food_lens_api_endpoint,) + SETTINGS.menu_api_allowlist
+    return menu_api_base_url(endpoint) in {menu_api_base_url(url) for url in allowed if url}
+
 
 def get_config() -> Dict[str, Any]:
     """
-    Get configuration from environment variables with defaults.
+    Get configuration as a dict (defaults plus environment settings).
     
     Returns:
         Dict containing configuration values
     """
     config = DEFAULT_CONFIG.copy()
     
-    # Override with environment variables if present
-    for key, env_var in ENV_VARS.items():
-        value = os.environ.get(env_var)
+    # Override with environment settings if present
+    for key in ENV_VARS:
+        value = getattr(SETTINGS, key.lower())
         if value:
             config[key.lower()] = value
     
@@ -80,13 +208,13 @@ def validate_environment() -> Dict[str, str]:
     # Check required variables
     required_vars = ['FOOD_LENS_API_ENDPOINT']
     for var in required_vars:
-        if not os.environ.get(var):
+        if not getattr(SETTINGS, var.lower()):
             missing_vars.append(var)
     
     # Check optional but recommended variables
     optional_vars = ['USDA_API_KEY', 'FOOD_LENS_API_KEY']
     for var in optional_vars:
-        if not os.environ.get(var):
+        if not getattr(SETTINGS, var.lower()):
             warnings.append(f"{var} not set - some functionality may be limited")
     
     return {
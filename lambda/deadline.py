@@ -0,0 +1,88 @@
+"""
+Per-request deadline tracking for Food Lens Strands Agent Lambda function.
+
+The handler derives a deadline from the Lambda context and publishes it in a
+context variable so that every tool invoked during the request can size its
+own upstream timeouts from the remaining budget.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+# Seconds reserved before the Lambda timeout for building the response
+SAFETY_MARGIN_SECONDS = 10.0
+
+# Budget used when no Lambda context is available (local testing)
+DEFAULT_BUDGET_SECONDS = 80.0
+
+
+class Deadline:
+    """Absolute point in time by which the current request must finish."""
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> 'Deadline':
+        """Create a deadline that expires the given number of seconds from now."""
+        return cls(time.monotonic() + max(seconds, 0.0))
+
+    @classmethod
+    def from_lambda_context(cls, context: Any, margin: float = SAFETY_MARGIN_SECONDS) -> 'Deadline':
+        """
+        Derive a deadline from a Lambda context object.
+
+        Args:
+            context: Lambda context object (may be None when run locally)
+            margin: Seconds to hold back for response serialization
+
+        Returns:
+            Deadline for the current request
+        """
+        get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        if callable(get_remaining):
+            return cls.after(get_remaining() / 1000.0 - margin)
+        return cls.after(DEFAULT_BUDGET_SECONDS)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        """Whether the deadline has already passed."""
+        return self.remaining() <= 0.0
+
+    def allows(self, seconds: float) -> bool:
+        """Whether at least the given number of seconds is left in the budget."""
+        return self.remaining() >= seconds
+
+    def timeout(self, default: float, share: float = 1.0) -> float:
+        """
+        Size an upstream timeout from the remaining budget.
+
+        Args:
+            default: Timeout the caller would use with an unlimited budget
+            share: Fraction of the remaining budget the call may consume
+
+        Returns:
+            Timeout in seconds, capped by both the default and the budget share
+        """
+        return min(default, self.remaining() * share)
+
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar('current_deadline', default=None)
+
+
+def get_deadline() -> Deadline:
+    """
+    Return the deadline of the current request.
+
+    Tools called outside of a handler invocation get a fresh default budget.
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        deadline = Deadline.after(DEFAULT_BUDGET_SECONDS)
+    return deadline
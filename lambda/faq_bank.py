@@ -0,0 +1,249 @@
+"""
+Precomputed answers to common per-dish questions for Food Lens Strands Agent.
+
+Most questions about a dish are one of a handful of intents (calories,
+spiciness, allergens, vegetarian, ingredients). The answers are generated
+offline by running the agent once per dish and intent, and stored in a
+compact bank bundled with the deployment package. A short question about
+the dish in the request context is answered from the bank in milliseconds,
+without calling Bedrock.
+
+Each dish's answers carry a hash of the menu item they were generated from.
+When the current item (from the menu cache or the menu API) no longer
+matches, the answers are not served and the agent answers instead until the
+bank is regenerated.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from model_router import is_simple_query
+from warm_state import fetch_menus, read_snapshot, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Version 2 stores answers as the agent wrote them, before speech preparation
+BANK_VERSION = 2
+
+# Bank bundled with the package (faq_bank.msgpack or faq_bank.json)
+BUNDLED_BANK_PATH = str(Path(__file__).parent / 'faq_bank')
+
+# Longest question answered from the bank (words)
+FAQ_MAX_WORDS = 15
+
+# Intents with the phrases that identify them and the question asked when
+# generating answers. The order is the order of answers in the bank
+FAQ_INTENTS = {
+    'calories': {
+        'pattern': re.compile(r"\b(calories|calorie|kcal|cals|fattening)\b"),
+        'question': "How many calories are in the {dish}?"
+    },
+    'spiciness': {
+        'pattern': re.compile(r"\b(spicy|spiciness|spice level|hot|heat|chilli|chili|mild)\b"),
+        'question': "How spicy is the {dish}?"
+    },
+    'allergens': {
+        'pattern': re.compile(r"\b(allergens?|nuts?|peanuts?|dairy|shellfish|soy|eggs?|sesame)\b"),
+        'question': "What common allergens does the {dish} contain?"
+    },
+    'vegetarian': {
+        'pattern': re.compile(r"\b(vegetarian|vegan|meat|meatless|plant[- ]based)\b"),
+        'question': "Is the {dish} vegetarian or vegan?"
+    },
+    'ingredients': {
+        'pattern': re.compile(r"\b(ingredients?|what'?s in|what is in|made (of|with|from)|contain|contains)\b"),
+        'question': "What are the ingredients of the {dish}?"
+    }
+}
+
+# Menu item fields the answers depend on; price changes keep answers valid
+HASHED_FIELDS = ('name', 'ingredients', 'description', 'cuisine')
+
+
+def classify_intent(prompt: str) -> Optional[str]:
+    """
+    The FAQ intent of a question, or None when it needs the agent.
+
+    Only short single questions on exactly one intent qualify. A question
+    about ingredients that also names a more specific intent ("does it
+    contain nuts?") counts as the specific one.
+    """
+    if not is_simple_query(prompt, FAQ_MAX_WORDS):
+        return None
+    query = prompt.lower()
+    intents = [name for name, intent in FAQ_INTENTS.items() if intent['pattern'].search(query)]
+    if len(intents) > 1 and 'ingredients' in intents:
+        intents.remove('ingredients')
+    return intents[0] if len(intents) == 1 else None
+
+
+def dish_hash(item: Dict[str, Any]) -> str:
+    """Hash of the menu item fields that the answers about it depend on."""
+    fields = {field: item.get(field) for field in HASHED_FIELDS}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class FaqBank:
+    """Answers per dish and intent, keyed by restaurant and dish ID."""
+
+    def __init__(self, entries: Optional[Dict[str, List[Any]]] = None, created_at: float = 0.0):
+        # "restaurant_id/dish_id" -> [dish hash, [answer or None per intent]]
+        self.entries: Dict[str, List[Any]] = entries or {}
+        self.created_at = created_at
+        self.stats = {'hits': 0, 'stale': 0, 'misses': 0}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _key(restaurant_id: str, dish_id: str) -> str:
+        return f"{restaurant_id}/{dish_id}"
+
+    def has_dish(self, restaurant_id: str, dish_id: str) -> bool:
+        return self._key(restaurant_id, dish_id) in self.entries
+
+    def lookup(self, restaurant_id: str, dish_id: str, intent: str, item: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        Return the stored answer for a dish and intent.
+
+        Args:
+            restaurant_id: Restaurant the dish belongs to
+            dish_id: Menu item ID
+            intent: Name of an intent in FAQ_INTENTS
+            item: Current menu item; answers generated from a different
+                version of it (or without it) are not returned
+
+        Returns:
+            The answer, or None
+        """
+        entry = self.entries.get(self._key(restaurant_id, dish_id))
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        stored_hash, answers = entry
+        if item is None or dish_hash(item) != stored_hash:
+            self.stats['stale'] += 1
+            return None
+        answer = answers[list(FAQ_INTENTS).index(intent)]
+        self.stats['hits' if answer else 'misses'] += 1
+        return answer
+
+    def put(self, restaurant_id: str, item: Dict[str, Any], answers: Dict[str, str]) -> None:
+        """Store the answers generated for a menu item."""
+        self.entries[self._key(restaurant_id, item['id'])] = [
+            dish_hash(item), [answers.get(intent) for intent in FAQ_INTENTS]
+        ]
+
+    def is_current(self, restaurant_id: str, item: Dict[str, Any]) -> bool:
+        """Whether the stored answers were generated from this version of the item."""
+        entry = self.entries.get(self._key(restaurant_id, item['id']))
+        return entry is not None and entry[0] == dish_hash(item) and all(entry[1])
+
+    def retain(self, restaurant_id: str, dish_ids: List[str]) -> int:
+        """Drop a restaurant's dishes that are no longer on its menu; returns how many."""
+        prefix = f"{restaurant_id}/"
+        keep = {self._key(restaurant_id, dish_id) for dish_id in dish_ids}
+        removed = [key for key in self.entries if key.startswith(prefix) and key not in keep]
+        for key in removed:
+            del self.entries[key]
+        return len(removed)
+
+    @classmethod
+    def load(cls, base_path: str = BUNDLED_BANK_PATH) -> 'FaqBank':
+        """Load the bank stored at base_path; empty when there is none."""
+        snapshot = read_snapshot(base_path, BANK_VERSION)
+        if snapshot is None or snapshot.get('intents') != list(FAQ_INTENTS):
+            return cls()
+        return cls(snapshot['dishes'], snapshot['created_at'])
+
+    def save(self, base_path: str = BUNDLED_BANK_PATH) -> str:
+        """Write the bank next to base_path and return the file path."""
+        self.created_at = time.time()
+        return write_snapshot(base_path, {
+            'version': BANK_VERSION,
+            'created_at': self.created_at,
+            'intents': list(FAQ_INTENTS),
+            'dishes': self.entries
+        })
+
+
+async def generate(bank: FaqBank, menus: Dict[str, List[Dict[str, Any]]], menu_api_endpoint: Optional[str] = None,
+                   concurrency: int = 4, force: bool = False) -> Dict[str, int]:
+    """
+    Generate answers for every dish and intent of the given menus.
+
+    Each question is sent through the agent handler, with the dish in the
+    request context, as a customer request would be, but always on the
+    standard model tier and never from the bank itself. Answers are stored as
+    the agent wrote them; the handler prepares them for speech when serving.
+    Dishes whose answers are current are skipped unless forced; dishes that
+    left a menu are dropped.
+
+    Returns:
+        Number of dishes generated, skipped, failed and removed
+    """
+    import agent_handler
+    from model_router import STANDARD_TIER
+
+    slots = asyncio.Semaphore(concurrency)
+    counts = {'generated': 0, 'skipped': 0, 'failed': 0, 'removed': 0}
+
+    async def ask(restaurant_id: str, item: Dict[str, Any], intent: str) -> Optional[str]:
+        event = {
+            'prompt': FAQ_INTENTS[intent]['question'].format(dish=item.get('name', 'dish')),
+            'context': {'restaurantId': restaurant_id, 'dishId': item['id'], 'dishName': item.get('name')}
+        }
+        if menu_api_endpoint:
+            event['context']['menuApiEndpoint'] = menu_api_endpoint
+        # Answers must come from the agent, not from the bank being rebuilt
+        async with slots:
+            result = await agent_handler.handler_async(event, None, use_faq_bank=False, tier=STANDARD_TIER)
+        body = json.loads(result.get('body', '{}'))
+        if result.get('statusCode') != 200 or body.get('partial') or not body.get('response'):
+            logger.warning("No answer for %s of dish %s (status %s)", intent, item['id'], result.get('statusCode'))
+            return None
+        return body['response']
+
+    async def generate_dish(restaurant_id: str, item: Dict[str, Any]) -> None:
+        answers = await asyncio.gather(*(ask(restaurant_id, item, intent) for intent in FAQ_INTENTS))
+        if not all(answers):
+            counts['failed'] += 1
+            return
+        bank.put(restaurant_id, item, dict(zip(FAQ_INTENTS, answers)))
+        counts['generated'] += 1
+
+    work = []
+    for restaurant_id, items in menus.items():
+        items = [item for item in items if item.get('id')]
+        counts['removed'] += bank.retain(restaurant_id, [item['id'] for item in items])
+        for item in items:
+            if not force and bank.is_current(restaurant_id, item):
+                counts['skipped'] += 1
+            else:
+                work.append(generate_dish(restaurant_id, item))
+    await asyncio.gather(*work)
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate the FAQ answer bank bundled with the Lambda package')
+    parser.add_argument('--menu-api', required=True, help='Food Lens API base URL, e.g. https://example.com/api')
+    parser.add_argument('--concurrency', type=int, default=4, help='Agent runs in flight')
+    parser.add_argument('--force', action='store_true', help='Regenerate answers that are still current')
+    parser.add_argument('restaurant_ids', nargs='+', help='Restaurants whose dishes to answer for')
+    args = parser.parse_args()
+
+    faq_bank = FaqBank.load()
+    menus = fetch_menus(args.menu_api, args.restaurant_ids)
+    counts = asyncio.run(generate(faq_bank, menus, args.menu_api, args.concurrency, args.force))
+    print(f"Dishes: {counts['generated']} generated, {counts['skipped']} unchanged, "
+          f"{counts['failed']} failed, {counts['removed']} removed")
+    print(f"Wrote {faq_bank.save()} ({len(faq_bank)} dishes)")
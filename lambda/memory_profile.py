@@ -0,0 +1,160 @@
+"""
+Per-request memory tracking for Food Lens Strands Agent.
+
+Each request records, for every stage of the handler (preparing the prompt,
+running the agent, building the response), the resident set size (RSS) at
+the end of the stage and its high-water mark during the stage. MEMORY_TRACKING
+selects the level of detail:
+
+- "rss" (default): RSS from /proc/self/status. The high-water mark is reset at
+  each stage start through /proc/self/clear_refs, so peaks are per stage;
+  where that is not possible, the process-lifetime peak is reported.
+- "tracemalloc": additionally Python heap usage and peak per stage, and the
+  allocation sites that grew the most during the request. Tracing slows
+  allocation-heavy code noticeably and its snapshots add to RSS; use it for
+  investigations only, and "rss" figures for sizing.
+- "off": nothing is recorded.
+
+The result goes into the request summary, from which memory_report.py
+recommends a Lambda memory size. In server mode, concurrent requests share
+the process, so stage figures include their allocations too.
+"""
+
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+MEMORY_TRACKING_MODES = ('off', 'rss', 'tracemalloc')
+
+# Allocation sites listed per request with tracemalloc
+TOP_ALLOCATIONS = 5
+
+_MB = 1024 * 1024
+
+_PROC_STATUS = '/proc/self/status'
+_PROC_CLEAR_REFS = '/proc/self/clear_refs'
+
+# Whether the high-water mark can be reset (checked on first use)
+_hwm_resettable: Optional[bool] = None
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / _MB if sys.platform == 'darwin' else max_rss / 1024
+
+
+def process_memory() -> Tuple[float, float]:
+    """
+    Current RSS and its high-water mark, in MB.
+
+    Returns:
+        (rss, peak); both are the lifetime peak where /proc is unavailable
+    """
+    try:
+        with open(_PROC_STATUS) as status:
+            fields = dict(line.split(':', 1) for line in status if line.startswith(('VmRSS', 'VmHWM')))
+        return int(fields['VmRSS'].split()[0]) / 1024, int(fields['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        peak = _max_rss_mb()
+        return peak, peak
+
+
+def reset_peak() -> bool:
+    """Reset the RSS high-water mark; returns whether that was possible."""
+    global _hwm_resettable
+    if _hwm_resettable is False:
+        return False
+    try:
+        with open(_PROC_CLEAR_REFS, 'w') as clear_refs:
+            clear_refs.write('5')
+        _hwm_resettable = True
+    except OSError:
+        _hwm_resettable = False
+    return _hwm_resettable
+
+
+def start_tracing(mode: str) -> None:
+    """Start tracemalloc at import time when the mode asks for it."""
+    if mode == 'tracemalloc' and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+class MemoryTracker:
+    """Memory use of one request, stage by stage."""
+
+    def __init__(self, mode: str = 'rss'):
+        self.mode = mode if mode in MEMORY_TRACKING_MODES else 'rss'
+        self.tracing = self.mode == 'tracemalloc' and tracemalloc.is_tracing()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._start_rss = 0.0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._current: Optional[Tuple[str, float, int, float]] = None
+        if self.mode == 'off':
+            return
+
+        self._start_rss, _ = process_memory()
+        if self.tracing:
+            self._snapshot = tracemalloc.take_snapshot()
+
+    def begin(self, name: str) -> None:
+        """Start a stage, ending the previous one."""
+        if self.mode == 'off':
+            return
+        self.end()
+        reset_peak()
+        rss, _ = process_memory()
+        heap = tracemalloc.get_traced_memory()[0] if self.tracing else 0
+        if self.tracing:
+            tracemalloc.reset_peak()
+        self._current = (name, rss, heap, time.perf_counter())
+
+    def end(self) -> None:
+        """End the current stage, if any, and record its figures."""
+        if self._current is None:
+            return
+        name, rss_before, heap_before, started = self._current
+        self._current = None
+        rss_after, rss_peak = process_memory()
+        stage = {
+            'rss_mb': round(rss_after, 1),
+            'rss_peak_mb': round(rss_peak, 1),
+            'rss_delta_mb': round(rss_after - rss_before, 1),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        if self.tracing:
+            heap_after, heap_peak = tracemalloc.get_traced_memory()
+            stage['heap_peak_mb'] = round(heap_peak / _MB, 2)
+            stage['heap_delta_mb'] = round((heap_after - heap_before) / _MB, 2)
+        self.stages[name] = stage
+
+    def top_allocations(self, limit: int = TOP_ALLOCATIONS) -> List[str]:
+        """Allocation sites that grew the most since the request started."""
+        if self._snapshot is None:
+            return []
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+        changes = snapshot.compare_to(self._snapshot.filter_traces(filters), 'lineno')
+        return [
+            f"{change.traceback[0].filename}:{change.traceback[0].lineno} {change.size_diff / 1024:+.0f} KiB"
+            for change in changes[:limit] if change.size_diff > 0
+        ]
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """Summary fields for the request log (ending the current stage), or None when tracking is off."""
+        if self.mode == 'off':
+            return None
+        self.end()
+        rss, _ = process_memory()
+        result: Dict[str, Any] = {
+            'rss_start_mb': round(self._start_rss, 1),
+            'rss_end_mb': round(rss, 1),
+            'rss_peak_mb': round(max([stage['rss_peak_mb'] for stage in self.stages.values()] + [rss]), 1),
+            'process_peak_mb': round(_max_rss_mb(), 1),
+            'stages': self.stages
+        }
+        if self.tracing:
+            result['top_allocations'] = self.top_allocations()
+        return result
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Recommend a Lambda memory size from measured memory use.
+
+Reads any mix of:
+
+- request summary records ("request completed" with a "memory" field, see
+  memory_profile.py) from handler logs, e.g. CloudWatch exports or the output
+  of `LOG_LEVEL=INFO python replay.py run --concurrency 1`
+- Lambda REPORT records ("Max Memory Used: 312 MB"), as text or JSON
+  (platform.report)
+- replay.py --output summaries, which carry the process peak of the run
+
+The recommendation is the highest observed peak plus headroom, rounded up to
+a 64 MB step. Lambda assigns CPU in proportion to memory (one vCPU at 1769 MB),
+so the report also shows the duration and cost per request at each memory
+size seen in REPORT records; a size above the memory floor only pays off if
+it makes requests correspondingly faster.
+
+Usage:
+    python memory_report.py logs/*.json [--headroom 0.25]
+"""
+
+import argparse
+import json
+import math
+import re
+import statistics
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import DEFAULT_CONFIG
+
+CDK_DIR = Path(__file__).parent.parent / 'cdk'
+CDK_STACK = CDK_DIR / 'stacks' / 'lambda_stack.py'
+CDK_JSON = CDK_DIR / 'cdk.json'
+
+# Lambda limits and CPU allocation
+MIN_MEMORY_MB = 128
+MAX_MEMORY_MB = 10240
+MEMORY_STEP_MB = 64
+MB_PER_VCPU = 1769
+
+# Price per GB-second on arm64 (us-east-1)
+PRICE_PER_GB_SECOND = 0.0000133334
+
+_REPORT_TEXT = re.compile(
+    r'Duration: (?P<duration>[\d.]+) ms.*?Memory Size: (?P<size>\d+) MB\s+Max Memory Used: (?P<used>\d+) MB'
+)
+# The stack's default: self._context_int("memory_size", 1024)
+_CDK_MEMORY_DEFAULT = re.compile(r'_context_int\(\s*["\']memory_size["\']\s*,\s*(\d+)\s*\)')
+
+
+class Measurements:
+    """Memory figures collected from logs and benchmark outputs."""
+
+    def __init__(self):
+        self.request_peaks: List[float] = []
+        self.process_peaks: List[float] = []
+        self.stages: Dict[str, List[Dict[str, float]]] = {}
+        self.reports: List[Dict[str, float]] = []
+
+    @property
+    def peaks(self) -> List[float]:
+        return self.request_peaks + self.process_peaks + [report['used'] for report in self.reports]
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        memory = record.get('memory')
+        if isinstance(memory, dict) and 'rss_peak_mb' in memory:
+            # Request summary
+            self.request_peaks.append(memory['rss_peak_mb'])
+            for name, stage in memory.get('stages', {}).items():
+                self.stages.setdefault(name, []).append(stage)
+        elif isinstance(memory, dict) and 'process_peak_mb' in memory:
+            # replay.py summary
+            self.process_peaks.append(memory['process_peak_mb'])
+        elif record.get('type') == 'platform.report':
+            metrics = record.get('record', {}).get('metrics', {})
+            if 'maxMemoryUsedMB' in metrics:
+                self.reports.append({
+                    'duration': metrics.get('durationMs', 0.0),
+                    'size': metrics.get('memorySizeMB', 0),
+                    'used': metrics['maxMemoryUsedMB']
+                })
+        elif isinstance(record.get('message'), str):
+            self.add_text(record['message'])
+
+    def add_text(self, line: str) -> None:
+        match = _REPORT_TEXT.search(line)
+        if match:
+            self.reports.append({
+                'duration': float(match['duration']),
+                'size': int(match['size']),
+                'used': int(match['used'])
+            })
+
+
+def read_measurements(paths: Iterable[str]) -> Measurements:
+    measurements = Measurements()
+    decoder = json.JSONDecoder()
+    for path in paths:
+        with open(path) as handle:
+            text = handle.read()
+        try:
+            # A whole-file JSON document (replay.py --output)
+            document = json.loads(text)
+            if isinstance(document, dict):
+                measurements.add_record(document)
+                continue
+        except ValueError:
+            pass
+        for line in text.splitlines():
+            # Records may follow other output on the same line
+            start = line.find('{')
+            try:
+                record, _ = decoder.raw_decode(line, start) if start >= 0 else (None, 0)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                measurements.add_text(line)
+                continue
+            measurements.add_record(record)
+    return measurements
+
+
+def cdk_memory_size() -> Optional[int]:
+    """
+    Memory size the CDK stack deploys without --context overrides.
+
+    The "memory_size" context in cdk.json wins; otherwise the stack's
+    default applies.
+    """
+    if CDK_JSON.exists():
+        try:
+            context = json.loads(CDK_JSON.read_text()).get('context', {})
+            if context.get('memory_size') not in (None, ''):
+                return int(context['memory_size'])
+        except ValueError:
+            pass
+    if CDK_STACK.exists():
+        match = _CDK_MEMORY_DEFAULT.search(CDK_STACK.read_text())
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def configured_sizes() -> Dict[str, Optional[int]]:
+    """Memory sizes currently configured in config.py and the CDK stack."""
+    return {'config.DEFAULT_CONFIG': DEFAULT_CONFIG['memory_size'], 'cdk stack': cdk_memory_size()}
+
+
+def recommend_memory(peak_mb: float, headroom: float) -> int:
+    """Smallest memory size, in 64 MB steps, that leaves headroom above a peak."""
+    size = math.ceil(peak_mb * (1 + headroom) / MEMORY_STEP_MB) * MEMORY_STEP_MB
+    return min(max(size, MIN_MEMORY_MB), MAX_MEMORY_MB)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def cost_per_million(duration_ms: float, memory_mb: float) -> float:
+    return duration_ms / 1000 * memory_mb / 1024 * PRICE_PER_GB_SECOND * 1_000_000
+
+
+def print_report(measurements: Measurements, headroom: float) -> Optional[int]:
+    peaks = measurements.peaks
+    if not peaks:
+        print("No memory measurements found (set MEMORY_TRACKING and LOG_LEVEL=INFO, or pass Lambda REPORT logs)")
+        return None
+
+    print("=" * 64)
+    print("Peak memory (MB)")
+    print("=" * 64)
+    for label, values in (('request summaries', measurements.request_peaks),
+                          ('benchmark runs', measurements.process_peaks),
+                          ('Lambda REPORT', [report['used'] for report in measurements.reports])):
+        if values:
+            print(f"{label:<20} n={len(values):<6} p50={_percentile(values, 0.5):>7.1f} "
+                  f"p99={_percentile(values, 0.99):>7.1f} max={max(values):>7.1f}")
+
+    if measurements.stages:
+        print("\nStages (MB)")
+        for name, stages in measurements.stages.items():
+            growth = statistics.mean(stage['rss_delta_mb'] for stage in stages)
+            peak = max(stage['rss_peak_mb'] for stage in stages)
+            line = f"  {name:<12} mean growth {growth:+7.1f}   max peak {peak:7.1f}"
+            heap = [stage['heap_peak_mb'] for stage in stages if 'heap_peak_mb' in stage]
+            if heap:
+                line += f"   max Python heap {max(heap):7.1f}"
+            print(line)
+
+    sizes = sorted({report['size'] for report in measurements.reports})
+    if sizes:
+        print("\nDuration and cost by memory size (Lambda REPORT)")
+        for size in sizes:
+            durations = [report['duration'] for report in measurements.reports if report['size'] == size]
+            p50 = _percentile(durations, 0.5)
+            print(f"  {size:>5} MB  vCPU {size / MB_PER_VCPU:4.2f}  p50 {p50:8.1f} ms  "
+                  f"${cost_per_million(p50, size):8.2f} per 1M requests")
+
+    peak = max(peaks)
+    recommended = recommend_memory(peak, headroom)
+    print(f"\nHighest peak {peak:.1f} MB; with {headroom:.0%} headroom: {recommended} MB "
+          f"(vCPU share {recommended / MB_PER_VCPU:.2f})")
+
+    for source, size in configured_sizes().items():
+        if size is None:
+            continue
+        if size < recommended:
+            verdict = "too small, risk of out-of-memory errors"
+        elif size >= 2 * recommended:
+            verdict = "more than twice the need; keep only if it buys CPU (compare durations above)"
+        else:
+            verdict = "ok"
+        print(f"  {source:<28} {size:>5} MB  {verdict}")
+    return recommended
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recommend a Lambda memory size from measured memory use')
+    parser.add_argument('inputs', nargs='+', help='Log files or replay.py summaries')
+    parser.add_argument('--headroom', type=float, default=0.25, help='Fraction added above the highest peak')
+    args = parser.parse_args()
+
+    if print_report(read_measurements(args.inputs), args.headroom) is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
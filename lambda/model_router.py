@@ -0,0 +1,122 @@
+"""
+Model tier selection for Food Lens Strands Agent.
+
+Short factual questions ("how many calories are in the jollof rice?") don't
+need the largest model or the dietary advice tool. A cheap keyword and
+length classifier routes them to the "fast" tier from config.MODEL_TIERS.
+Health questions, comparisons, recommendations and long queries go to the
+"standard" tier, which also takes over when the fast tier fails, times out
+or returns nothing. Latency and fallbacks are counted per tier.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from strands.models import CacheConfig
+
+from config import MODEL_TIERS, TOOL_CONFIG, get_settings
+
+FAST_TIER = 'fast'
+STANDARD_TIER = 'standard'
+
+# Remaining deadline (seconds) needed to retry a failed fast-tier request
+MIN_FALLBACK_SECONDS = 5.0
+
+# Phrases that call for reasoning beyond a lookup
+_REASONING_CUES = re.compile(
+    r"\b(compare|comparison|versus|vs|better|best|healthiest|should i|recommend|suggest|"
+    r"why|plan|instead|alternative|swap|safe|okay for|ok for)\b"
+)
+
+_HEALTH_KEYWORDS = tuple(TOOL_CONFIG['dietary_advice']['health_keywords'])
+
+
+def classify_request(prompt: str) -> str:
+    """
+    Pick the model tier for a customer query.
+
+    Args:
+        prompt: Customer query, without the added restaurant or session context
+
+    Returns:
+        Name of a tier in MODEL_TIERS
+    """
+    if not get_settings().model_tiering:
+        return STANDARD_TIER
+    return FAST_TIER if is_simple_query(prompt, MODEL_TIERS[FAST_TIER]['max_words']) else STANDARD_TIER
+
+
+def is_simple_query(prompt: str, max_words: int) -> bool:
+    """
+    Whether a query is a single short factual question.
+
+    Long queries, several questions, health topics and requests for
+    comparisons or recommendations are not simple.
+    """
+    query = prompt.lower()
+    if len(query.split()) > max_words or query.count('?') > 1:
+        return False
+    return not (any(keyword in query for keyword in _HEALTH_KEYWORDS) or _REASONING_CUES.search(query))
+
+
+def tier_model_config(tier: str) -> Dict[str, Any]:
+    """Model arguments for a tier; without MODEL_ID the standard tier uses the Strands default model."""
+    settings = get_settings()
+    model_id = settings.fast_model_id if tier == FAST_TIER else settings.model_id
+    config: Dict[str, Any] = {}
+    if model_id:
+        config['model_id'] = model_id
+    if MODEL_TIERS[tier]['max_tokens']:
+        config['max_tokens'] = MODEL_TIERS[tier]['max_tokens']
+    if settings.prompt_caching:
+        # Put cache points after the tool specs and the system prompt; "auto"
+        # leaves models without prompt caching untouched
+        config['cache_config'] = CacheConfig(strategy='auto', tools_ttl=True)
+    return config
+
+
+def tier_timeout(tier: str, remaining: float) -> float:
+    """Seconds a tier may run, within the request's remaining time."""
+    limit = MODEL_TIERS[tier]['timeout']
+    return min(limit, remaining) if limit else remaining
+
+
+def tier_tools(tier: str, tools: List[Any]) -> List[Any]:
+    """The subset of the agent's tools offered in a tier."""
+    names = MODEL_TIERS[tier]['tools']
+    return [agent_tool for agent_tool in tools if agent_tool.tool_name in names]
+
+
+class TierStats:
+    """Per-tier request counts, latency and fallbacks for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiers: Dict[str, Dict[str, float]] = {}
+
+    def record(self, tier: str, latency_ms: float, fell_back: bool = False) -> None:
+        """Record one model run; fell_back marks a run handed over to the standard tier."""
+        with self._lock:
+            stats = self._tiers.setdefault(tier, {'requests': 0, 'fallbacks': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['requests'] += 1
+            stats['fallbacks'] += int(fell_back)
+            stats['total_ms'] += latency_ms
+            stats['max_ms'] = max(stats['max_ms'], latency_ms)
+
+    def snapshot(self, tier: Optional[str] = None) -> Dict[str, Any]:
+        """Counts and mean/max latency (ms), for one tier or all."""
+        with self._lock:
+            tiers = {
+                name: {
+                    'requests': int(stats['requests']),
+                    'fallbacks': int(stats['fallbacks']),
+                    'mean_ms': round(stats['total_ms'] / stats['requests'], 1),
+                    'max_ms': round(stats['max_ms'], 1)
+                }
+                for name, stats in self._tiers.items()
+            }
+        return tiers.get(tier, {}) if tier else tiers
+
+
+TIER_STATS = TierStats()
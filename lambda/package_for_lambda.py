@@ -12,6 +12,29 @@ import tempfile
 import zipfile
 from pathlib import Path
 
+# Top-level modules copied next to the handler in the deployment package
+HANDLER_MODULES = [
+    "agent_handler.py",
+    "config.py",
+    "deadline.py",
+    "faq_bank.py",
+    "memory_profile.py",
+    "model_router.py",
+    "profiler.py",
+    "session_store.py",
+    "structured_logging.py",
+    "tool_executor.py",
+    "tool_memo.py",
+    "voice.py",
+    "warm_state.py",
+]
+
+# Warm-state snapshots bundled when present (built with warm_state.py)
+BUNDLED_SNAPSHOTS = ["warm_state.msgpack", "warm_state.json"]
+
+# FAQ answer banks bundled when present (built with faq_bank.py)
+BUNDLED_FAQ_BANKS = ["faq_bank.msgpack", "faq_bank.json"]
+
 
 def run_command(command, cwd=None):
     """Run a shell command and return the result."""
@@ -77,9 +100,19 @@ def create_lambda_package():
         # Copy Lambda function code
         print("Copying Lambda function code...")
         
-        # Copy main handler
-        shutil.copy2(lambda_dir / "agent_handler.py", package_dir)
-        shutil.copy2(lambda_dir / "config.py", package_dir)
+        # Copy main handler and its support modules
+        for module in HANDLER_MODULES:
+            shutil.copy2(lambda_dir / module, package_dir)
+        
+        for snapshot in BUNDLED_SNAPSHOTS:
+            if (lambda_dir / snapshot).exists():
+                print(f"Bundling warm-state snapshot {snapshot}")
+                shutil.copy2(lambda_dir / snapshot, package_dir)
+        
+        for faq_bank in BUNDLED_FAQ_BANKS:
+            if (lambda_dir / faq_bank).exists():
+                print(f"Bundling FAQ answer bank {faq_bank}")
+                shutil.copy2(lambda_dir / faq_bank, package_dir)
         
         # Copy tools directory
         tools_src = lambda_dir / "tools"
@@ -119,9 +152,7 @@ def validate_package():
     
     print("Validating package contents...")
     
-    required_files = [
-        "agent_handler.py",
-        "config.py",
+    required_files = HANDLER_MODULES + [
         "tools/__init__.py",
         "tools/dish_info.py",
         "tools/nutrition_lookup.py",
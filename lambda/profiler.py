@@ -0,0 +1,230 @@
+"""
+Opt-in request profiling for Food Lens Strands Agent.
+
+A request is profiled when PROFILE_REQUESTS is set or, where the entry point
+allows it (PROFILE_FLAG), when its event carries "profile": true (or a mode
+name). Lambda allows the flag unless PROFILE_FLAG=0, since only IAM
+principals can invoke the function; server mode ignores it unless
+PROFILE_FLAG=1, since any HTTP client can send it. Two modes are available:
+
+- "sample" (default): a background thread samples the Python stacks of all
+  threads every few milliseconds. Overhead stays low and time spent waiting
+  on the model, in tools or in JSON handling shows up alike. Stacks are
+  written in collapsed ("folded") format, ready for flamegraph.pl or
+  speedscope.
+- "cprofile": deterministic cProfile of the event loop thread, written as a
+  pstats file. It is more precise per call, but slower and blind to worker
+  threads. Only one cProfile can be active per process, so a request asking
+  for it while another request holds it is sampled instead.
+
+Either way a short hot-function summary is returned with the response.
+Samples cover every thread in the process, so in server mode they include
+concurrent requests. Only the newest MAX_PROFILE_FILES profiles are kept in
+PROFILE_DIR.
+"""
+
+import cProfile
+import glob
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+PROFILE_MODES = ('sample', 'cprofile')
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+
+# Functions listed in the response summary
+HOT_FUNCTIONS = 10
+
+PROFILE_DIR = '/tmp'
+
+# Profile files kept in PROFILE_DIR; older ones are deleted
+MAX_PROFILE_FILES = 20
+
+# Held while a cProfile is enabled; a second one in the process raises ValueError
+_CPROFILE_LOCK = threading.Lock()
+
+# Leaf frames of idle pool and logging threads, which are not sampled
+_IDLE_LEAVES = frozenset(['_worker', '_monitor'])
+
+
+def profiling_mode(event: Dict[str, Any], default: Optional[str] = None, allow_flag: bool = True) -> Optional[str]:
+    """
+    Profiling mode requested for a request, or None.
+
+    Args:
+        event: Request event; "profile" may be true or a mode name
+        default: Mode configured for all requests (PROFILE_REQUESTS)
+        allow_flag: Whether the event's "profile" flag is honored
+    """
+    requested = event.get('profile', default) if allow_flag else default
+    if requested is True or requested in ('1', 'true'):
+        return 'sample'
+    return requested if requested in PROFILE_MODES else None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads from a background thread."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='food-lens-profiler', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_name in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path: str) -> str:
+        """Write collapsed stacks ("frame;frame;frame count" per line)."""
+        with open(path, 'w') as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+        return path
+
+    def hot_functions(self, limit: int = HOT_FUNCTIONS) -> List[Dict[str, Any]]:
+        """Functions with the most samples on top of the stack (self) and anywhere in it (total)."""
+        total_samples = sum(self.stacks.values()) or 1
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')[1:]  # Drop the thread name
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                total_counts[label] += count
+
+        return [
+            {
+                'function': label,
+                'self_pct': round(100.0 * count / total_samples, 1),
+                'total_pct': round(100.0 * total_counts[label] / total_samples, 1)
+            }
+            for label, count in self_counts.most_common(limit)
+        ]
+
+
+class RequestProfiler:
+    """Profiles one request in the given mode and summarizes the result."""
+
+    def __init__(self, mode: str, request_id: Optional[str] = None):
+        self.mode = mode
+        self.request_id = request_id or f"{int(time.time() * 1000)}-{os.getpid()}"
+        self._sampler: Optional[SamplingProfiler] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    def __enter__(self) -> 'RequestProfiler':
+        self._started = time.perf_counter()
+        if self.mode == 'cprofile':
+            self._enable_cprofile()
+        if self._profile is None:
+            self.mode = 'sample'
+            self._sampler = SamplingProfiler()
+            self._sampler.start()
+        return self
+
+    def _enable_cprofile(self) -> None:
+        """Enable cProfile unless another request (or tool) is already using it."""
+        if not _CPROFILE_LOCK.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Another profiling tool is active
+            _CPROFILE_LOCK.release()
+            return
+        self._profile = profile
+
+    def __exit__(self, *exc_info) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+            _CPROFILE_LOCK.release()
+        if self._sampler is not None:
+            self._sampler.stop()
+        self._elapsed = time.perf_counter() - self._started
+
+    def report(self) -> Dict[str, Any]:
+        """Write the profile to /tmp and return a summary for the response."""
+        report = self._summarize()
+        _prune_profiles()
+        return report
+
+    def _summarize(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {'mode': self.mode, 'duration_ms': round(self._elapsed * 1000, 1)}
+
+        if self._sampler is not None:
+            report['file'] = self._sampler.write(os.path.join(PROFILE_DIR, f"food-lens-profile-{self.request_id}.folded"))
+            report['samples'] = self._sampler.samples
+            report['interval_ms'] = self._sampler.interval * 1000
+            report['hot_functions'] = self._sampler.hot_functions()
+            return report
+
+        path = os.path.join(PROFILE_DIR, f"food-lens-profile-{self.request_id}.prof")
+        self._profile.dump_stats(path)
+        stats = pstats.Stats(self._profile)
+        report['file'] = path
+        report['hot_functions'] = [
+            {
+                'function': name if filename == '~' else f"{name} ({os.path.basename(filename)}:{line})",
+                'calls': calls,
+                'self_ms': round(self_time * 1000, 2),
+                'total_ms': round(total_time * 1000, 2)
+            }
+            for (filename, line, name), (_, calls, self_time, total_time, _) in _top_stats(stats)
+        ]
+        return report
+
+
+def _modified_time(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:  # Deleted by a concurrent prune
+        return 0.0
+
+
+def _prune_profiles(keep: int = MAX_PROFILE_FILES) -> None:
+    """Delete all but the newest profile files."""
+    paths = glob.glob(os.path.join(PROFILE_DIR, 'food-lens-profile-*'))
+    for path in sorted(paths, key=_modified_time)[:-keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _top_stats(stats: pstats.Stats) -> List[Tuple[Tuple[str, int, str], Tuple]]:
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)  # By self time
+    return entries[:HOT_FUNCTIONS]
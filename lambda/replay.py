@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Replay captured production traffic against local builds of the agent.
+
+Workflow:
+
+1. extract: pull the request events out of the handler's logs (the
+   "Received event" records of sampled requests, or files of plain events),
+   anonymize them and write them as JSON lines with their arrival times.
+2. record: run the events once through a build with the real Bedrock model
+   and upstream APIs, saving every model stream and HTTP response (with its
+   latency) as fixtures. Needs AWS credentials and network access.
+3. run / compare: replay the events at a chosen speed-up and concurrency with
+   model and upstream responses served from the fixtures, and report latency
+   and throughput for one build, or side by side for two builds (e.g. git
+   worktrees of two commits). Each build runs in its own process.
+
+Model fixtures are keyed by event and call order rather than by prompt text,
+so builds that word their prompts differently replay the same conversation.
+
+Usage:
+    python replay.py extract logs/*.json --output events.jsonl
+    python replay.py record --events events.jsonl --fixtures fixtures.json
+    python replay.py run --events events.jsonl --fixtures fixtures.json [--build DIR]
+    python replay.py compare --events events.jsonl --fixtures fixtures.json --builds OLD_DIR NEW_DIR
+"""
+
+import argparse
+import asyncio
+import contextvars
+import hashlib
+import hmac
+import json
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+LAMBDA_DIR = Path(__file__).parent
+
+EVENT_MARKER = 'Received event: '
+
+# Query parameters and headers never written to fixtures
+SECRET_PARAMS = frozenset(['api_key', 'apikey', 'key', 'token'])
+SECRET_HEADERS = frozenset(['authorization', 'x-api-key', 'cookie', 'set-cookie'])
+
+_EMAIL = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+_URL = re.compile(r'https?://\S+')
+_PHONE = re.compile(r'\+?\d[\d\s().-]{7,}\d')
+
+# (event ID, model calls made so far) of the request being replayed
+current_replay: contextvars.ContextVar[Optional[Tuple[str, List[int]]]] = contextvars.ContextVar(
+    'current_replay', default=None
+)
+
+
+# Extraction and anonymization
+
+def _pseudonym(value: str, salt: bytes) -> str:
+    digest = hmac.new(salt, value.encode(), hashlib.sha256).hexdigest()
+    return f"{digest[:8]}-{digest[8:12]}-{digest[12:16]}-{digest[16:20]}-{digest[20:32]}"
+
+
+def scrub_text(text: str) -> str:
+    """Remove e-mail addresses, URLs and phone numbers from free text."""
+    text = _EMAIL.sub('<email>', text)
+    text = _URL.sub('<url>', text)
+    return _PHONE.sub('<phone>', text)
+
+
+def anonymize_event(event: Dict[str, Any], salt: bytes, hash_ids: bool = False) -> Dict[str, Any]:
+    """
+    Reduce an event to the fields the handler reads, without personal data.
+
+    Session IDs are replaced by stable pseudonyms, so repeat turns of a session
+    still share one. Restaurant and dish IDs identify public menus and are kept
+    (the fixtures are recorded against them) unless hash_ids is set.
+    """
+    context = event.get('context') or {}
+    anonymized: Dict[str, Any] = {'prompt': scrub_text(str(event.get('prompt', '')))}
+
+    kept = {}
+    for key in ('restaurantId', 'dishId'):
+        if context.get(key):
+            kept[key] = _pseudonym(str(context[key]), salt) if hash_ids else context[key]
+    if context.get('dishName'):
+        kept['dishName'] = scrub_text(str(context['dishName']))
+    if context.get('menuApiEndpoint'):
+        kept['menuApiEndpoint'] = context['menuApiEndpoint']
+    if kept:
+        anonymized['context'] = kept
+
+    session_id = event.get('sessionId') or context.get('sessionId')
+    if session_id:
+        anonymized['sessionId'] = _pseudonym(str(session_id), salt)
+    return anonymized
+
+
+def read_captured_events(paths: Iterable[str]) -> Tuple[List[Tuple[Optional[float], Dict[str, Any]]], int]:
+    """
+    Read events from log files (JSON-lines or plain text) or files of plain events.
+
+    Returns:
+        (arrival time or None, event) pairs and the number of records that
+        could not be parsed (e.g. events truncated by the logger)
+    """
+    decoder = json.JSONDecoder()
+    events, skipped = [], 0
+    for path in paths:
+        with open(path) as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+
+                if isinstance(record, dict) and 'prompt' in record:
+                    events.append((record.pop('_time', None), record))
+                    continue
+
+                message = record.get('message', '') if isinstance(record, dict) else line
+                start = message.find(EVENT_MARKER)
+                if start < 0:
+                    continue
+                try:
+                    event, _ = decoder.raw_decode(message, start + len(EVENT_MARKER))
+                except ValueError:
+                    skipped += 1
+                    continue
+                if isinstance(event, dict):
+                    events.append((record.get('time') if isinstance(record, dict) else None, event))
+    return events, skipped
+
+
+def load_events(path: str) -> List[Dict[str, Any]]:
+    with open(path) as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def event_id(event: Dict[str, Any]) -> str:
+    return event['id']
+
+
+# Fixtures
+
+def _strip_secrets(url: str) -> str:
+    parts = urlsplit(url)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+def http_fixture_key(method: str, url: str, body: bytes) -> str:
+    body_hash = hashlib.sha1(body).hexdigest()[:12] if body else ''
+    return f"{method} {_strip_secrets(url)} {body_hash}".strip()
+
+
+class Fixtures:
+    """Recorded model streams and HTTP responses, with their latencies."""
+
+    def __init__(self, model: Optional[Dict[str, Any]] = None, http: Optional[Dict[str, Any]] = None):
+        self.model = model or {}
+        self.http = http or {}
+        self.misses = {'model': 0, 'http': 0}
+
+    @classmethod
+    def load(cls, path: str) -> 'Fixtures':
+        with open(path) as handle:
+            data = json.load(handle)
+        return cls(data.get('model'), data.get('http'))
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as handle:
+            json.dump({'model': self.model, 'http': self.http}, handle)
+
+
+def _model_call_key() -> str:
+    replay = current_replay.get()
+    if replay is None:
+        return 'unknown'
+    request_id, calls = replay
+    calls[0] += 1
+    return f"{request_id}:{calls[0]}"
+
+
+def build_model_classes():
+    """Model wrappers; defined lazily because strands comes from the build under test."""
+    from strands.models import Model
+
+    class RecordingModel(Model):
+        """Passes calls through to a real model and records each stream."""
+
+        def __init__(self, inner: Any, fixtures: Fixtures):
+            self.inner = inner
+            self.fixtures = fixtures
+
+        def update_config(self, **model_config):
+            self.inner.update_config(**model_config)
+
+        def get_config(self):
+            return self.inner.get_config()
+
+        async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+            key = _model_call_key()
+            started = time.perf_counter()
+            recorded = []
+            async for event in self.inner.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs):
+                # The parsed output model is stored as its JSON fields
+                stored = {'output': event['output'].model_dump(mode='json')} if 'output' in event else event
+                recorded.append([round(time.perf_counter() - started, 4), stored])
+                yield event
+            self.fixtures.model[key] = recorded
+
+        async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+            key = _model_call_key()
+            started = time.perf_counter()
+            recorded = []
+            async for event in self.inner.stream(messages, tool_specs, system_prompt, **kwargs):
+                recorded.append([round(time.perf_counter() - started, 4), event])
+                yield event
+            self.fixtures.model[key] = recorded
+
+    class FixtureModel(Model):
+        """Replays recorded streams with their original timing (scaled)."""
+
+        def __init__(self, fixtures: Fixtures, time_scale: float = 1.0):
+            self.fixtures = fixtures
+            self.time_scale = time_scale
+
+        def update_config(self, **model_config):
+            pass
+
+        def get_config(self):
+            return {}
+
+        async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+            key = _model_call_key()
+            recorded = self.fixtures.model.get(key)
+            if recorded is None:
+                # Unlike a text reply, no placeholder fits an arbitrary output model
+                self.fixtures.misses['model'] += 1
+                raise RuntimeError(f"No structured output was recorded for model call {key}; record the events again")
+            started = time.perf_counter()
+            for offset, event in recorded:
+                delay = offset * self.time_scale - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if 'output' in event:
+                    event = {'output': output_model.model_validate(event['output'])}
+                yield event
+
+        async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+            recorded = self.fixtures.model.get(_model_call_key())
+            if recorded is None:
+                self.fixtures.misses['model'] += 1
+                recorded = [
+                    [0, {'messageStart': {'role': 'assistant'}}],
+                    [0, {'contentBlockDelta': {'delta': {'text': 'No recorded response.'}}}],
+                    [0, {'contentBlockStop': {}}],
+                    [0, {'messageStop': {'stopReason': 'end_turn'}}],
+                ]
+            started = time.perf_counter()
+            for offset, event in recorded:
+                delay = offset * self.time_scale - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield event
+
+    return RecordingModel, FixtureModel
+
+
+def install_http_fixtures(fixtures: Fixtures, record: bool, time_scale: float = 1.0) -> None:
+    """Serve (or record) every httpx request of the build from the fixtures."""
+    import httpx
+
+    original = httpx.AsyncHTTPTransport.handle_async_request
+
+    async def recording(transport, request):
+        started = time.perf_counter()
+        response = await original(transport, request)
+        body = await response.aread()
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in SECRET_HEADERS and name.lower() != 'transfer-encoding']
+        fixtures.http[http_fixture_key(request.method, str(request.url), request.content)] = {
+            'status': response.status_code,
+            'headers': headers,
+            'body': body.decode('latin-1'),
+            'latency': round(time.perf_counter() - started, 4)
+        }
+        return httpx.Response(response.status_code, headers=headers, content=body)
+
+    async def replaying(transport, request):
+        fixture = fixtures.http.get(http_fixture_key(request.method, str(request.url), request.content))
+        if fixture is None:
+            fixtures.misses['http'] += 1
+            return httpx.Response(404, json={'error': 'No recorded response'})
+        await asyncio.sleep(fixture['latency'] * time_scale)
+        return httpx.Response(fixture['status'], headers=fixture['headers'], content=fixture['body'].encode('latin-1'))
+
+    httpx.AsyncHTTPTransport.handle_async_request = recording if record else replaying
+
+
+# Replaying
+
+def import_build(build_dir: Path):
+    """Import agent_handler from a build directory instead of this tree."""
+    sys.path[:] = [path for path in sys.path if Path(path or '.').resolve() != LAMBDA_DIR.resolve()]
+    sys.path.insert(0, str(build_dir))
+    import agent_handler
+    return agent_handler
+
+
+async def replay(handler_async, events: List[Dict[str, Any]], speedup: float, concurrency: int) -> List[Dict[str, Any]]:
+    """
+    Send the events to the handler, keeping their relative timing (divided by speedup).
+
+    Returns:
+        One outcome (status, latency, queueing delay) per event
+    """
+    slots = asyncio.Semaphore(concurrency)
+    # Session pseudonym -> session ID issued by the handler on its first turn
+    issued_sessions: Dict[str, str] = {}
+    first = min((event['time'] for event in events if event.get('time') is not None), default=None)
+    started = time.perf_counter()
+
+    async def one(index: int, event: Dict[str, Any]) -> Dict[str, Any]:
+        if first is not None and event.get('time') is not None and speedup > 0:
+            await asyncio.sleep(max((event['time'] - first) / speedup - (time.perf_counter() - started), 0))
+        scheduled = time.perf_counter()
+        async with slots:
+            dequeued = time.perf_counter()
+            token = current_replay.set((event_id(event), [0]))
+            try:
+                request = dict(event['event'])
+                pseudonym = request.get('sessionId')
+                if pseudonym:
+                    request['sessionId'] = issued_sessions.get(pseudonym)
+                result = await handler_async(request, None)
+                status = result.get('statusCode', 500)
+                if pseudonym and status == 200:
+                    issued_sessions.setdefault(pseudonym, json.loads(result['body']).get('sessionId'))
+            except Exception as e:
+                status = type(e).__name__
+            finally:
+                current_replay.reset(token)
+        finished = time.perf_counter()
+        return {'index': index, 'status': status, 'latency_ms': (finished - scheduled) * 1000,
+                'queue_ms': (dequeued - scheduled) * 1000}
+
+    return await asyncio.gather(*(one(index, event) for index, event in enumerate(events)))
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def _process_peak_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+
+def summarize(outcomes: List[Dict[str, Any]], elapsed: float, fixtures: Fixtures) -> Dict[str, Any]:
+    latencies = [outcome['latency_ms'] for outcome in outcomes]
+    statuses: Dict[str, int] = {}
+    for outcome in outcomes:
+        statuses[str(outcome['status'])] = statuses.get(str(outcome['status']), 0) + 1
+    return {
+        'requests': len(outcomes),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(len(outcomes) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(statistics.mean(latencies), 1) if latencies else 0.0,
+        'p50_ms': round(_percentile(latencies, 0.50), 1),
+        'p90_ms': round(_percentile(latencies, 0.90), 1),
+        'p99_ms': round(_percentile(latencies, 0.99), 1),
+        'max_ms': round(max(latencies, default=0.0), 1),
+        'queue_p90_ms': round(_percentile([outcome['queue_ms'] for outcome in outcomes], 0.90), 1),
+        'statuses': statuses,
+        'fixture_misses': dict(fixtures.misses),
+        'memory': {'process_peak_mb': round(_process_peak_mb(), 1)},
+    }
+
+
+def run_build(args: argparse.Namespace, record: bool = False) -> Dict[str, Any]:
+    os.environ.setdefault('AWS_REGION', 'us-east-1')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    if not record:
+        os.environ.setdefault('USDA_API_KEY', 'replay')
+
+    fixtures = Fixtures() if record else Fixtures.load(args.fixtures)
+    install_http_fixtures(fixtures, record, args.time_scale)
+    agent_handler = import_build(Path(args.build).resolve())
+    RecordingModel, FixtureModel = build_model_classes()
+
+    if record:
+        real_model = agent_handler.get_shared_model
+        agent_handler.get_shared_model = lambda *a, **k: RecordingModel(real_model(*a, **k), fixtures)
+    else:
+        fixture_model = FixtureModel(fixtures, args.time_scale)
+        agent_handler.get_shared_model = lambda *a, **k: fixture_model
+
+    events = load_events(args.events)
+    speedup = 0 if record else args.speedup  # Record one request at a time, as fast as possible
+    concurrency = 1 if record else args.concurrency
+
+    started = time.perf_counter()
+    outcomes = asyncio.run(replay(agent_handler.handler_async, events, speedup, concurrency))
+    elapsed = time.perf_counter() - started
+
+    if record:
+        fixtures.save(args.fixtures)
+    return summarize(outcomes, elapsed, fixtures)
+
+
+# Commands
+
+def command_extract(args: argparse.Namespace) -> None:
+    salt = (args.salt or os.environ.get('REPLAY_SALT') or os.urandom(16).hex()).encode()
+    captured, skipped = read_captured_events(args.logs)
+    with open(args.output, 'w') as handle:
+        for arrival, event in captured:
+            anonymized = anonymize_event(event, salt, args.hash_ids)
+            if not anonymized['prompt']:
+                continue
+            entry_id = hashlib.sha1(f"{len(captured)}:{arrival}:{json.dumps(anonymized, sort_keys=True)}".encode()).hexdigest()[:16]
+            handle.write(json.dumps({'id': entry_id, 'time': arrival, 'event': anonymized}) + '\n')
+    print(f"Wrote {len(captured)} events to {args.output} ({skipped} unparseable records skipped)")
+
+
+def command_run(args: argparse.Namespace, record: bool = False) -> None:
+    summary = run_build(args, record)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(summary, handle)
+    else:
+        print(json.dumps(summary, indent=2))
+
+
+def command_compare(args: argparse.Namespace) -> None:
+    summaries = []
+    for build in args.builds:
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as output:
+            output_path = output.name
+        subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), 'run', '--build', build, '--events', args.events,
+             '--fixtures', args.fixtures, '--speedup', str(args.speedup), '--concurrency', str(args.concurrency),
+             '--time-scale', str(args.time_scale), '--output', output_path],
+            check=True, stdout=subprocess.DEVNULL
+        )
+        with open(output_path) as handle:
+            summaries.append(json.load(handle))
+        os.unlink(output_path)
+
+    (name_a, a), (name_b, b) = zip(args.builds, summaries)
+    print("=" * 64)
+    print(f"{'Metric':<20} {'A':>12} {'B':>12} {'B vs A':>10}")
+    print("=" * 64)
+    for metric in ('throughput_per_s', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'queue_p90_ms'):
+        change = f"{(b[metric] - a[metric]) / a[metric] * 100:+.1f}%" if a[metric] else '-'
+        print(f"{metric:<20} {a[metric]:>12} {b[metric]:>12} {change:>10}")
+    print(f"{'statuses':<20} {json.dumps(a['statuses']):>12} {json.dumps(b['statuses']):>12}")
+    print(f"{'process peak MB':<20} {a['memory']['process_peak_mb']:>12} {b['memory']['process_peak_mb']:>12}")
+    print(f"{'fixture misses':<20} {json.dumps(a['fixture_misses']):>12} {json.dumps(b['fixture_misses']):>12}")
+    print(f"A: {name_a}\nB: {name_b}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay captured traffic against local builds')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    extract = commands.add_parser('extract', help='Extract and anonymize events from logs')
+    extract.add_argument('logs', nargs='+')
+    extract.add_argument('--output', required=True)
+    extract.add_argument('--salt', help='Pseudonym salt (REPLAY_SALT; random when unset)')
+    extract.add_argument('--hash-ids', action='store_true', help='Also pseudonymize restaurant and dish IDs')
+
+    for name in ('record', 'run', 'compare'):
+        command = commands.add_parser(name)
+        command.add_argument('--events', required=True)
+        command.add_argument('--fixtures', required=True)
+        command.add_argument('--time-scale', type=float, default=1.0, help='Multiplier for recorded latencies')
+        if name == 'compare':
+            command.add_argument('--builds', nargs=2, required=True, metavar=('BUILD_A', 'BUILD_B'))
+        else:
+            command.add_argument('--build', default=str(LAMBDA_DIR), help='Directory containing agent_handler.py')
+            command.add_argument('--output', help='Write the summary as JSON')
+        if name != 'record':
+            command.add_argument('--speedup', type=float, default=10.0, help='Compress inter-arrival times (0: all at once)')
+            command.add_argument('--concurrency', type=int, default=16, help='Requests in flight')
+
+    args = parser.parse_args()
+    if args.command == 'extract':
+        command_extract(args)
+    elif args.command == 'compare':
+        command_compare(args)
+    else:
+        command_run(args, record=args.command == 'record')
+
+
+if __name__ == "__main__":
+    main()
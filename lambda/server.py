@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+HTTP server entry point for running the Food Lens agent in a container.
+
+Wraps the same request path as the Lambda handler (agent_handler.handler_async)
+in an ASGI application, so one process serves many concurrent requests on a
+single event loop. The Bedrock model, the tools' pooled HTTP clients and the
+menu, nutrition and session caches are shared by all requests of a process.
+
+Endpoints:
+    POST /invoke   Lambda-style event ({"prompt": ..., "context": {...}});
+                   the handler's statusCode and body become the HTTP response
+    GET  /health   Liveness check, with per-tier model latency and fallbacks
+
+Usage:
+    python server.py [--host 0.0.0.0] [--port 8080] [--workers 4]
+
+uvicorn is used when installed; otherwise a small built-in asyncio HTTP/1.1
+server runs the same ASGI app. With several workers, set SESSION_STORE_PATH
+and RATE_LIMIT_STATE_FILE so that sessions and upstream rate limits are
+shared between worker processes.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Add current directory to Python path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import get_settings, is_allowed_menu_api_endpoint
+from model_router import TIER_STATS
+from tools.http_client import close_http_client
+
+logger = logging.getLogger(__name__)
+
+# Requests processed at once per worker; further requests wait for a slot
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('MAX_CONCURRENT_REQUESTS', '64'))
+
+# Largest accepted request body (bytes)
+MAX_BODY_BYTES = 1024 * 1024
+
+_request_slots: Optional[asyncio.Semaphore] = None
+
+
+def _load_handler() -> Callable[..., Awaitable[Dict[str, Any]]]:
+    """Import the agent handler in the serving process.
+
+    agent_handler opens the session store (a SQLite connection when
+    SESSION_STORE_PATH is set) and loads the shared caches at import, so it
+    must not be imported before serve_builtin forks its workers: each worker
+    imports it for itself and gets its own connection and state.
+    """
+    from agent_handler import handler_async
+    return handler_async
+
+
+def _header(scope: Dict[str, Any], name: str) -> str:
+    """Value of a request header (name in lower case), or ''."""
+    raw_name = name.encode('latin-1')
+    for key, value in scope.get('headers', []):
+        if key.lower() == raw_name:
+            return value.decode('latin-1').strip()
+    return ''
+
+
+async def _read_body(receive: Callable[[], Awaitable[Dict[str, Any]]]) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError('Request body too large')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send: Callable[[Dict[str, Any]], Awaitable[None]], status: int, payload: Any) -> None:
+    body = (payload if isinstance(payload, str) else json.dumps(payload)).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send) -> None:
+    global _request_slots
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            _request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_http_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope: Dict[str, Any], receive, send) -> None:
+    """ASGI application serving the agent."""
+    global _request_slots
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method, path = scope['method'], scope['path'].rstrip('/') or '/'
+
+    if path == '/health' and method == 'GET':
+        await _send_json(send, 200, {'status': 'ok', 'modelTiers': TIER_STATS.snapshot()})
+        return
+
+    if path not in ('/invoke', '/') or method != 'POST':
+        await _send_json(send, 404, {'error': 'Not found'})
+        return
+
+    try:
+        event = json.loads(await _read_body(receive) or b'{}')
+    except ValueError as e:
+        await _send_json(send, 400, {'error': f'Invalid request body: {e}'})
+        return
+    if not isinstance(event, dict):
+        await _send_json(send, 400, {'error': 'Request body must be a JSON object'})
+        return
+
+    # Sessions belong to the caller the fronting proxy authenticated, never
+    # to one the body claims; without CALLER_ID_HEADER they are bound only
+    # to their unguessable IDs
+    settings = get_settings()
+    event['callerId'] = _header(scope, settings.caller_id_header) if settings.caller_id_header else ''
+    # Any client could point the menu fetch at an arbitrary (e.g. internal)
+    # URL; only FOOD_LENS_API_ENDPOINT and MENU_API_ALLOWLIST are accepted
+    context = event.get('context')
+    if isinstance(context, dict) and context.get('menuApiEndpoint'):
+        if not is_allowed_menu_api_endpoint(str(context['menuApiEndpoint'])):
+            logger.warning("Ignoring menu API endpoint not in MENU_API_ALLOWLIST")
+            del context['menuApiEndpoint']
+
+    # Any client could ask for a profile; only honored with PROFILE_FLAG=1
+    if not settings.profile_flag:
+        event.pop('profile', None)
+
+    if _request_slots is None:
+        _request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with _request_slots:
+        result = await _load_handler()(event, None)
+
+    # The handler's body is already serialized JSON
+    await _send_json(send, result.get('statusCode', 200), result.get('body', '{}'))
+
+
+# Minimal HTTP/1.1 front end, used when uvicorn is not installed
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+async def _handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+
+            request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+            method, target, version = request_line.split(' ', 2)
+            headers: List[Tuple[bytes, bytes]] = []
+            for line in header_lines:
+                name, _, value = line.partition(':')
+                headers.append((name.strip().lower().encode(), value.strip().encode()))
+            header_map = dict(headers)
+
+            length = int(header_map.get(b'content-length', b'0'))
+            if length > MAX_BODY_BYTES:
+                writer.write(f"{version} 413 {_REASONS[413]}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+                await writer.drain()
+                return
+            body = await reader.readexactly(length) if length else b''
+
+            path, _, query = target.partition('?')
+            peer = writer.get_extra_info('peername')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': version.split('/')[-1],
+                'method': method.upper(), 'path': path, 'query_string': query.encode(), 'headers': headers,
+                'client': tuple(peer[:2]) if peer else None
+            }
+            response: Dict[str, Any] = {'status': 500, 'headers': [], 'body': b''}
+
+            async def receive():
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    response['status'], response['headers'] = message['status'], message.get('headers', [])
+                else:
+                    response['body'] += message.get('body', b'')
+
+            await app(scope, receive, send)
+
+            keep_alive = header_map.get(b'connection', b'').lower() != b'close' and version == 'HTTP/1.1'
+            status = response['status']
+            lines = [f"{version} {status} {_REASONS.get(status, '')}"]
+            lines += [f"{name.decode()}: {value.decode()}" for name, value in response['headers']]
+            lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + response['body'])
+            await writer.drain()
+            if not keep_alive:
+                return
+    except Exception as e:
+        logger.error(f"Error handling connection: {str(e)}", exc_info=True)
+    finally:
+        writer.close()
+
+
+async def _serve(sock: socket.socket) -> None:
+    server = await asyncio.start_server(_handle_connection, sock=sock)
+    async with server:
+        await server.serve_forever()
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+def _run_worker(sock: socket.socket) -> None:
+    # Build this worker's agent state now rather than on its first request
+    _load_handler()
+    try:
+        asyncio.run(_serve(sock))
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_builtin(host: str, port: int, workers: int) -> None:
+    """Serve the app with the built-in server; workers share one listening socket."""
+    sock = _bind(host, port)
+    logger.info(f"Serving on http://{host}:{port} with {workers} worker(s)")
+    if workers <= 1:
+        _run_worker(sock)
+        return
+
+    processes = [multiprocessing.Process(target=_run_worker, args=(sock,), daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the Food Lens agent over HTTP')
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '8080')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', '1')),
+                        help='Worker processes (one event loop each)')
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        uvicorn = None
+
+    if uvicorn is not None:
+        uvicorn.run('server:app', host=args.host, port=args.port, workers=args.workers,
+                    app_dir=str(Path(__file__).parent))
+    else:
+        serve_builtin(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
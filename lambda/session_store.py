@@ -0,0 +1,291 @@
+"""
+Conversation sessions for Food Lens Strands Agent Lambda function.
+
+A session keeps a short, summarized history of the customer's questions and
+the tool results already fetched for them, so that follow-up questions
+("and how about the rice?") can be answered without re-fetching dish and
+nutrition data. Sessions live in memory and, optionally, in a pluggable
+backend; SQLiteSessionBackend is a local stand-in for a shared store.
+
+Session IDs are issued by the store and belong to the caller that started
+the session; an unknown ID, or one presented by another caller, starts a
+new session. Each request works on its own copy of the session, and saving
+merges the turns and tool results it added into the stored session, so
+concurrent requests of one session do not lose each other's updates.
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import get_settings
+
+# Bounds on what a session keeps
+MAX_TURNS = 4
+MAX_TOOL_RESULTS = 10
+MAX_ANSWER_CHARS = 300
+MAX_SESSIONS_IN_MEMORY = 1000
+
+# Sessions idle for longer than this are discarded (seconds)
+SESSION_TTL = 30 * 60
+
+# Random bytes in a session ID
+SESSION_ID_BYTES = 16
+
+
+def new_session_id() -> str:
+    """Unguessable ID for a new session."""
+    return secrets.token_urlsafe(SESSION_ID_BYTES)
+
+
+def tool_call_key(tool_name: str, tool_input: Dict[str, Any]) -> str:
+    """
+    Stable key for a tool call, independent of argument order.
+
+    String arguments are compared case- and whitespace-insensitively, so
+    "Jollof Rice" and "jollof  rice" share a key, and omitted optional
+    arguments match explicit None values.
+    """
+    normalized = {
+        name: ' '.join(value.lower().split()) if isinstance(value, str) else value
+        for name, value in tool_input.items() if value is not None
+    }
+    return json.dumps([tool_name, normalized], sort_keys=True, default=str)
+
+
+def summarize_answer(answer: str) -> str:
+    """Shorten an answer to its first sentences for use as history."""
+    answer = ' '.join(answer.split())
+    if len(answer) <= MAX_ANSWER_CHARS:
+        return answer
+    cut = answer.rfind('. ', 0, MAX_ANSWER_CHARS)
+    return answer[:cut + 1] if cut > 0 else answer[:MAX_ANSWER_CHARS].rstrip() + '...'
+
+
+def _describe_result(result: Any) -> str:
+    """One-line description of a tool result for the prompt."""
+    if not isinstance(result, dict):
+        return summarize_answer(str(result))
+
+    if isinstance(result.get('dish'), dict):
+        dish = result['dish']
+        parts = [dish.get('name', ''), dish.get('description', '')]
+        if dish.get('ingredients'):
+            parts.append(f"Ingredients: {', '.join(map(str, dish['ingredients']))}")
+        if dish.get('price') is not None:
+            parts.append(f"Price: {dish['price']}")
+        return summarize_answer('. '.join(part for part in parts if part))
+
+    if isinstance(result.get('raw_nutrients'), dict) and result.get('food_name'):
+        values = ', '.join(f"{name} {value:g}" for name, value in result['raw_nutrients'].items()
+                           if isinstance(value, (int, float)))
+        return f"{result['food_name']} per 100g: {values}"
+
+    return summarize_answer(str(result.get('nutritional_info') or result.get('search_results') or ''))
+
+
+@dataclass
+class Session:
+    """Bounded conversation state for one customer session."""
+
+    session_id: str
+    owner: str = ''
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    tool_results: Dict[str, Any] = field(default_factory=dict)
+    updated_at: float = 0.0
+    # Turns and tool results added since the session was loaded
+    added_turns: List[Tuple[str, str]] = field(default_factory=list, repr=False, compare=False)
+    added_tool_results: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    def add_turn(self, question: str, answer: str) -> None:
+        """Record a question and a summary of its answer."""
+        turn = (summarize_answer(question), summarize_answer(answer))
+        self._append_turn(turn)
+        self.added_turns.append(turn)
+
+    def add_tool_result(self, tool_name: str, tool_input: Dict[str, Any], result: Any) -> None:
+        """Record a tool result, keeping only the most recent ones."""
+        key = tool_call_key(tool_name, tool_input)
+        self._put_tool_result(key, result)
+        self.added_tool_results[key] = result
+
+    def _append_turn(self, turn: Tuple[str, str]) -> None:
+        self.turns.append(turn)
+        del self.turns[:-MAX_TURNS]
+
+    def _put_tool_result(self, key: str, result: Any) -> None:
+        self.tool_results.pop(key, None)
+        self.tool_results[key] = result
+        while len(self.tool_results) > MAX_TOOL_RESULTS:
+            self.tool_results.pop(next(iter(self.tool_results)))
+
+    def copy(self) -> 'Session':
+        """Copy for one request; nothing is marked as added."""
+        return Session(self.session_id, self.owner, list(self.turns), dict(self.tool_results), self.updated_at)
+
+    def merged_into(self, stored: Optional['Session']) -> 'Session':
+        """
+        Apply this copy's additions to the stored version of the session.
+
+        Args:
+            stored: Session as currently stored, or None when it is gone
+
+        Returns:
+            The session to store
+        """
+        merged = self.copy() if stored is None else stored.copy()
+        if stored is not None:
+            for turn in self.added_turns:
+                merged._append_turn(turn)
+            for key, result in self.added_tool_results.items():
+                merged._put_tool_result(key, result)
+        merged.updated_at = time.time()
+        return merged
+
+    def context_block(self) -> str:
+        """Compact history and known facts to prepend to the next prompt."""
+        lines = []
+        if self.turns:
+            lines.append("Conversation so far:")
+            for question, answer in self.turns:
+                lines.append(f"Q: {question}")
+                lines.append(f"A: {answer}")
+        if self.tool_results:
+            lines.append("Already known (no need to look up again):")
+            for result in self.tool_results.values():
+                description = _describe_result(result)
+                if description:
+                    lines.append(f"- {description}")
+        return '\n'.join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'owner': self.owner,
+            'turns': [list(turn) for turn in self.turns],
+            'tool_results': self.tool_results,
+            'updated_at': self.updated_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Session':
+        return cls(
+            session_id=data['session_id'],
+            owner=data.get('owner', ''),
+            turns=[tuple(turn) for turn in data.get('turns', [])],
+            tool_results=dict(data.get('tool_results', {})),
+            updated_at=data.get('updated_at', 0.0)
+        )
+
+
+class SQLiteSessionBackend:
+    """Stores sessions as JSON rows in a local SQLite database."""
+
+    def __init__(self, path: str = '/tmp/food-lens-sessions.sqlite3'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self._connection.commit()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute('SELECT data FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        self.update(session_id, lambda stored: data)
+
+    def update(self, session_id: str, merge: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Replace a session with merge(stored data or None) in one transaction.
+
+        The write lock is taken before reading, so workers sharing the
+        database do not overwrite each other's updates.
+        """
+        with self._lock:
+            try:
+                self._connection.execute('BEGIN IMMEDIATE')
+                row = self._connection.execute('SELECT data FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+                data = merge(json.loads(row[0]) if row else None)
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)',
+                    (session_id, json.dumps(data, default=str), data.get('updated_at', time.time()))
+                )
+                self._connection.execute('DELETE FROM sessions WHERE updated_at < ?', (time.time() - SESSION_TTL,))
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+        return data
+
+
+class SessionStore:
+    """Sessions in an in-memory LRU, or in a backend shared by worker processes."""
+
+    def __init__(self, backend=None, max_sessions: int = MAX_SESSIONS_IN_MEMORY):
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: 'OrderedDict[str, Session]' = OrderedDict()
+
+    @staticmethod
+    def _live(session: Optional[Session]) -> Optional[Session]:
+        if session is None or time.time() - session.updated_at > SESSION_TTL:
+            return None
+        return session
+
+    def _stored(self, data: Optional[Dict[str, Any]]) -> Optional[Session]:
+        return self._live(Session.from_dict(data) if data is not None else None)
+
+    def load(self, session_id: Optional[str], owner: str = '') -> Session:
+        """
+        Return a copy of the caller's session, or a new session.
+
+        Args:
+            session_id: ID issued by this store, if the caller has one
+            owner: Caller the session must belong to
+
+        Returns:
+            The session's current state; a new session with a fresh ID when
+            the ID is unknown, expired or belongs to another caller
+        """
+        session = None
+        if session_id:
+            # Other workers extend the session too, so the backend is read
+            # every time rather than a copy held by this process
+            if self.backend is not None:
+                session = self._stored(self.backend.get(session_id))
+            else:
+                with self._lock:
+                    session = self._live(self._sessions.get(session_id))
+
+        if session is None or session.owner != owner:
+            return Session(new_session_id(), owner)
+        return session.copy()
+
+    def save(self, session: Session) -> None:
+        """Merge a request's additions into the stored session."""
+        session_id = session.session_id
+        if self.backend is not None:
+            self.backend.update(session_id, lambda data: session.merged_into(self._stored(data)).to_dict())
+            return
+        with self._lock:
+            merged = session.merged_into(self._live(self._sessions.get(session_id)))
+            self._sessions[session_id] = merged
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store, backed by SQLite when SESSION_STORE_PATH is set."""
+    path = get_settings().session_store_path
+    return SessionStore(SQLiteSessionBackend(path) if path else None)
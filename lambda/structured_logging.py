@@ -0,0 +1,141 @@
+"""
+Structured, low-overhead logging for Food Lens Strands Agent.
+
+Log records are handed to a queue and formatted as compact JSON lines on a
+background thread, so request handling never blocks on formatting or on
+writing to CloudWatch. Messages use lazy %-style arguments, verbose payloads
+(events, prompts, responses) are only logged for a sampled fraction of
+requests, and each request emits one summary record with its key metrics.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Any, Dict, Optional
+
+# Longest payload text written by log_payload
+MAX_PAYLOAD_CHARS = 2000
+
+# Attributes of every LogRecord; anything else was passed via extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue: Optional[queue.Queue] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON line, including fields passed via extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _LazyJson:
+    """Serializes a payload only if and when the record is formatted."""
+
+    __slots__ = ('payload',)
+
+    def __init__(self, payload: Any):
+        self.payload = payload
+
+    def __str__(self) -> str:
+        text = self.payload if isinstance(self.payload, str) else json.dumps(self.payload, default=str)
+        return text if len(text) <= MAX_PAYLOAD_CHARS else text[:MAX_PAYLOAD_CHARS] + '...'
+
+
+def configure_logging(level: str = 'INFO') -> None:
+    """
+    Route all logging through a queue to a background JSON writer.
+
+    Safe to call more than once; later calls only change the level.
+    """
+    global _listener, _queue
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return
+
+    # A Queue, not a SimpleQueue: the listener marks each record done once
+    # written, which flush_logs waits for
+    _queue = queue.Queue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(_queue))
+
+
+def _restart_after_fork() -> None:
+    # The listener thread does not survive fork(); forked workers start their own
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configure_logging(logging.getLevelName(logging.getLogger().level))
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def flush_logs(timeout: float = 0.5) -> None:
+    """
+    Wait briefly for queued records to be written.
+
+    Lambda freezes the sandbox as soon as the handler returns, so the handler
+    calls this before returning to avoid delaying logs to the next request.
+    """
+    log_queue = _queue
+    if log_queue is None:
+        return
+    # Like Queue.join(), with a timeout: done once every record is written,
+    # not merely taken off the queue
+    with log_queue.all_tasks_done:
+        log_queue.all_tasks_done.wait_for(lambda: not log_queue.unfinished_tasks, timeout)
+
+
+def should_sample(rate: float) -> bool:
+    """Decide whether this request's verbose payloads are logged."""
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Any, sampled: bool) -> None:
+    """
+    Log a verbose payload at DEBUG, or at INFO for sampled requests.
+
+    Serialization happens on the logging thread, and only when the record is
+    actually emitted.
+    """
+    level = logging.INFO if sampled else logging.DEBUG
+    if logger.isEnabledFor(level):
+        logger.log(level, '%s: %s', label, _LazyJson(payload))
+
+
+def log_summary(logger: logging.Logger, fields: Dict[str, Any]) -> None:
+    """Emit the single summary record of a request."""
+    logger.info('request completed', extra=fields)
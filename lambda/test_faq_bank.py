@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for the FAQ answer bank.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add current directory to Python path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Set minimal environment variables
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('LOG_LEVEL', 'INFO')
+
+JOLLOF = {
+    'id': 'dish-1',
+    'name': 'Jollof Rice',
+    'price': 12.5,
+    'ingredients': ['rice', 'tomato', 'scotch bonnet'],
+    'description': 'Smoky party jollof',
+    'cuisine': 'Nigerian'
+}
+
+ANSWERS = {
+    'calories': 'A plate of jollof rice has about 450 kcal.',
+    'spiciness': 'It is medium hot, from scotch bonnet peppers.',
+    'allergens': 'It contains no common allergens. Please ask staff if you have an allergy.',
+    'vegetarian': 'Yes, it is vegetarian and vegan.',
+    'ingredients': 'Rice, tomato and scotch bonnet.'
+}
+
+
+def test_intents():
+    """Test that only short single-intent questions are classified."""
+    print("Testing intent classification...")
+
+    from faq_bank import classify_intent
+
+    cases = [
+        ("How many calories are in this?", 'calories'),
+        ("Is it spicy?", 'spiciness'),
+        ("Does it contain nuts?", 'allergens'),
+        ("Is this vegan?", 'vegetarian'),
+        ("What's in it?", 'ingredients'),
+        ("Is it spicy and how many calories?", None),
+        ("Is this ok for my diabetes?", None),
+        ("Should I get this or the egusi soup instead?", None),
+        ("Tell me about this dish", None),
+    ]
+
+    for prompt, expected in cases:
+        intent = classify_intent(prompt)
+        if intent != expected:
+            print(f"❌ {prompt!r} -> {intent}, expected {expected}")
+            return False
+
+    print("✅ Intent test passed")
+    return True
+
+
+def test_bank_invalidation():
+    """Test that answers survive save/load and are dropped when the dish changes."""
+    print("Testing bank storage and invalidation...")
+
+    from faq_bank import FaqBank
+
+    bank = FaqBank()
+    bank.put('rest-1', JOLLOF, ANSWERS)
+
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = os.path.join(directory, 'faq_bank')
+        bank.save(base_path)
+        bank = FaqBank.load(base_path)
+
+    if bank.lookup('rest-1', 'dish-1', 'calories', JOLLOF) != ANSWERS['calories']:
+        print("❌ Stored answer was not returned after reload")
+        return False
+
+    if bank.lookup('rest-1', 'dish-1', 'calories', dict(JOLLOF, price=14.0)) != ANSWERS['calories']:
+        print("❌ A price change invalidated the answers")
+        return False
+
+    changed = dict(JOLLOF, ingredients=['rice', 'tomato', 'scotch bonnet', 'shrimp'])
+    if bank.lookup('rest-1', 'dish-1', 'allergens', changed) is not None or bank.is_current('rest-1', changed):
+        print("❌ Answers were served for a changed dish")
+        return False
+
+    if bank.retain('rest-1', []) != 1 or len(bank):
+        print("❌ Dish removed from the menu was kept")
+        return False
+
+    print("✅ Bank test passed")
+    return True
+
+
+def test_handler_answers_from_bank():
+    """Test that the handler answers a common dish question without the agent."""
+    print("Testing handler FAQ path...")
+
+    import agent_handler
+    from faq_bank import FaqBank
+    from tools.menu_cache import SHARED_MENU_CACHE
+
+    SHARED_MENU_CACHE.put_menu('rest-1', [JOLLOF])
+    bank = FaqBank()
+    bank.put('rest-1', JOLLOF, ANSWERS)
+    agent_handler.SHARED_FAQ_BANK = bank
+
+    result = agent_handler.handler({
+        'prompt': 'Is it spicy?',
+        'context': {'restaurantId': 'rest-1', 'dishId': 'dish-1'}
+    }, None)
+    body = json.loads(result['body'])
+
+    if result['statusCode'] != 200 or body['response'] != ANSWERS['spiciness'] or not body['speechChunks']:
+        print(f"❌ Unexpected response: {result}")
+        return False
+
+    # Stored answers are served as written and only prepared for speech
+    result = agent_handler.handler({
+        'prompt': 'How many calories are in this?',
+        'context': {'restaurantId': 'rest-1', 'dishId': 'dish-1'}
+    }, None)
+    body = json.loads(result['body'])
+    if body['response'] != ANSWERS['calories'] or 'about 450 calories' not in body['speechChunks'][0]['text']:
+        print(f"❌ Unexpected response: {body}")
+        return False
+
+    if bank.stats['hits'] != 2:
+        print(f"❌ Unexpected bank stats: {bank.stats}")
+        return False
+
+    print("✅ Handler FAQ test passed")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("=" * 50)
+    print("FAQ Answer Bank Tests")
+    print("=" * 50)
+
+    tests = [
+        ("Intents", test_intents),
+        ("Bank", test_bank_invalidation),
+        ("Handler", test_handler_answers_from_bank),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n--- {test_name} ---")
+        if test_func():
+            passed += 1
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    print("=" * 50)
+
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
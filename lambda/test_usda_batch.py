@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched USDA FoodData Central fetcher against a local stand-in server.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add current directory to Python path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Set minimal environment variables
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('LOG_LEVEL', 'INFO')
+os.environ.setdefault('USDA_API_KEY', 'test-key')
+
+
+class StandInUSDAHandler(BaseHTTPRequestHandler):
+    """Serves POST /foods in the abridged format, like FoodData Central."""
+
+    requests_seen = []
+    throttle_next = False
+    rate_limit_remaining = 1000
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        cls = type(self)
+
+        if cls.throttle_next:
+            cls.throttle_next = False
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.end_headers()
+            return
+
+        cls.requests_seen.append(body['fdcIds'])
+        cls.rate_limit_remaining -= 1
+        foods = [
+            {
+                'fdcId': fdc_id,
+                'description': f'Stand-in food {fdc_id}',
+                'foodNutrients': [
+                    {'number': '208', 'name': 'Energy', 'amount': float(fdc_id % 500), 'unitName': 'KCAL'},
+                    {'number': '203', 'name': 'Protein', 'amount': 2.5, 'unitName': 'G'},
+                ]
+            }
+            for fdc_id in body['fdcIds']
+        ]
+        payload = json.dumps(foods).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-RateLimit-Remaining', str(cls.rate_limit_remaining))
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in_server():
+    """Start the stand-in USDA server on a free local port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInUSDAHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_batches_and_cache_fill():
+    """Test that IDs are batched, de-duplicated and cached."""
+    print("Testing batched fetch and cache fill...")
+
+    from tools.nutrition_cache import NutritionCache
+    from tools.usda import USDABatchFetcher, FOODS_BATCH_SIZE
+
+    server, base_url = start_stand_in_server()
+    StandInUSDAHandler.requests_seen = []
+
+    try:
+        cache = NutritionCache()
+        fetcher = USDABatchFetcher('test-key', base_url=base_url, cache=cache)
+        fdc_ids = list(range(1000, 1045)) + [1000, 1001]
+
+        records = asyncio.run(fetcher.fetch(fdc_ids))
+        batch_sizes = sorted(len(batch) for batch in StandInUSDAHandler.requests_seen)
+
+        if len(records) != 45 or batch_sizes != [5, FOODS_BATCH_SIZE, FOODS_BATCH_SIZE]:
+            print(f"❌ Unexpected result: {len(records)} records, batches {batch_sizes}")
+            return False
+
+        if records[1001].calories != 1.0 or cache.get_fdc(1001).description != 'Stand-in food 1001':
+            print("❌ Records were not parsed into the cache")
+            return False
+
+        # A second fetch must be served entirely from the cache
+        asyncio.run(fetcher.fetch(fdc_ids))
+        if len(StandInUSDAHandler.requests_seen) != 3:
+            print("❌ Cached IDs were requested again")
+            return False
+
+        print("✅ Batched fetch test passed")
+        return True
+
+    finally:
+        server.shutdown()
+
+
+def test_rate_limit_handling():
+    """Test Retry-After handling and quota exhaustion."""
+    print("Testing rate limit handling...")
+
+    from tools.nutrition_cache import NutritionCache
+    from tools.usda import USDABatchFetcher
+
+    server, base_url = start_stand_in_server()
+    StandInUSDAHandler.requests_seen = []
+
+    try:
+        # A 429 with a short Retry-After is retried
+        StandInUSDAHandler.throttle_next = True
+        fetcher = USDABatchFetcher('test-key', base_url=base_url, max_concurrency=1, cache=NutritionCache())
+        records = asyncio.run(fetcher.fetch([1, 2, 3]))
+        if len(records) != 3:
+            print(f"❌ Throttled batch was not retried: {records}")
+            return False
+
+        # Once the quota is exhausted no further requests are made
+        StandInUSDAHandler.rate_limit_remaining = 1
+        fetcher = USDABatchFetcher('test-key', base_url=base_url, max_concurrency=1, cache=NutritionCache())
+        records = asyncio.run(fetcher.fetch(range(100, 160)))
+        if len(records) != 20 or fetcher.rate_limit_remaining != 0:
+            print(f"❌ Fetcher kept going after quota exhaustion: {len(records)} records")
+            return False
+
+        print("✅ Rate limit handling test passed")
+        return True
+
+    finally:
+        StandInUSDAHandler.rate_limit_remaining = 1000
+        server.shutdown()
+
+
+def test_lookup_resolves_known_query():
+    """Test that a query searched before is answered through the batch fetcher."""
+    print("Testing lookup of a known query...")
+
+    import tools.nutrition_lookup as nutrition_lookup_module
+    from tools.nutrition_cache import SHARED_NUTRITION_CACHE
+    from tools.nutrition_lookup import nutrition_lookup
+    from tools.nutrition_records import NutrientRecord
+    from tools.rate_limit import configure_rate_limits
+
+    server, base_url = start_stand_in_server()
+    StandInUSDAHandler.requests_seen = []
+    # Fresh buckets; the throttling test above drained the USDA one
+    configure_rate_limits()
+    original_base_url = nutrition_lookup_module.USDA_API_BASE_URL
+    nutrition_lookup_module.USDA_API_BASE_URL = base_url
+
+    try:
+        # The query's first result is cached, the second left the cache
+        SHARED_NUTRITION_CACHE.clear()
+        SHARED_NUTRITION_CACHE.put_query('Jollof Rice', [7001, 7002], scope=nutrition_lookup_module.USDA_QUERY_SCOPE)
+        SHARED_NUTRITION_CACHE.put_fdc(7001, NutrientRecord(calories=150.0, description='Rice, cooked'))
+
+        result = asyncio.run(nutrition_lookup(food_name='jollof rice'))
+        if StandInUSDAHandler.requests_seen != [[7002]]:
+            print(f"❌ Unexpected /foods requests: {StandInUSDAHandler.requests_seen}")
+            return False
+
+        # The fetched record is more complete and wins
+        if result['source'] != 'USDA FoodData Central' or result['matched_food'] != 'Stand-in food 7002':
+            print(f"❌ Unexpected result: {result}")
+            return False
+
+        print("✅ Known query test passed")
+        return True
+
+    finally:
+        nutrition_lookup_module.USDA_API_BASE_URL = original_base_url
+        SHARED_NUTRITION_CACHE.clear()
+        server.shutdown()
+
+
+def test_bundle_resolves_known_ingredients():
+    """Test that ingredients matched by an earlier bundle are refetched in one batch."""
+    print("Testing bundled ingredient resolution...")
+
+    import warm_state
+    from tools.nutrition_cache import SHARED_NUTRITION_CACHE
+    from tools.rate_limit import configure_rate_limits
+    from tools.smart_nutrition import USDA_QUERY_SCOPE
+
+    server, base_url = start_stand_in_server()
+    StandInUSDAHandler.requests_seen = []
+    configure_rate_limits()
+    original_base_url = warm_state.USDA_API_BASE_URL
+    warm_state.USDA_API_BASE_URL = base_url
+
+    try:
+        SHARED_NUTRITION_CACHE.clear()
+        SHARED_NUTRITION_CACHE.put_query('Tomato', [8001], scope=USDA_QUERY_SCOPE)
+        SHARED_NUTRITION_CACHE.put_query('Palm oil', [8002], scope=USDA_QUERY_SCOPE)
+        menus = {'r1': [
+            {'id': 'd1', 'ingredients': ['Tomato', 'Rice', 'palm  oil']},
+            {'id': 'd2', 'ingredients': ['tomato']},
+        ]}
+
+        counts = asyncio.run(warm_state.resolve_ingredients(menus))
+        # Rice comes from the tool's built-in table and needs no lookup
+        if counts != {'ingredients': 2, 'fetched': 2, 'searched': 0}:
+            print(f"❌ Unexpected counts: {counts}")
+            return False
+        if StandInUSDAHandler.requests_seen != [[8001, 8002]]:
+            print(f"❌ Unexpected /foods requests: {StandInUSDAHandler.requests_seen}")
+            return False
+
+        cached = SHARED_NUTRITION_CACHE.get('tomato')
+        if cached is None or cached[0].description != 'Stand-in food 8001':
+            print(f"❌ Ingredient not cached by name: {cached}")
+            return False
+
+        print("✅ Bundled ingredient test passed")
+        return True
+
+    finally:
+        warm_state.USDA_API_BASE_URL = original_base_url
+        SHARED_NUTRITION_CACHE.clear()
+        server.shutdown()
+
+
+def main():
+    """Run all tests."""
+    print("=" * 50)
+    print("USDA Batch Fetcher Tests")
+    print("=" * 50)
+
+    tests = [
+        ("Batched Fetch", test_batches_and_cache_fill),
+        ("Rate Limits", test_rate_limit_handling),
+        ("Known Query", test_lookup_resolves_known_query),
+        ("Bundled Ingredients", test_bundle_resolves_known_ingredients),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n--- {test_name} ---")
+        if test_func():
+            passed += 1
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    print("=" * 50)
+
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the voice post-processor.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add current directory to Python path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Set minimal environment variables
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('LOG_LEVEL', 'INFO')
+
+
+def test_normalization():
+    """Test that markup, units, numbers and symbols are spelled out."""
+    print("Testing speech normalization...")
+
+    from voice import normalize_for_speech
+
+    cases = [
+        ("• Protein: 3.50g\n• Sodium: 400mg", "Protein: 3.5 grams. Sodium: 400 milligrams."),
+        ("**Calories**: 155 kcal per 100g", "Calories: 155 calories per 100 grams."),
+        ("About 620 kJ/100g & ~10-15% fat", "About 620 kilojoules per 100 grams and about 10 to 15 percent fat."),
+        ("It costs $12.99 or ₦1,500 🍚", "It costs 12 dollars and 99 cents or 1500 naira."),
+        ("Sodium: 400mg/serving, 250 kcal/day", "Sodium: 400 milligrams per serving, 250 calories per day."),
+        ("Vegetarian and/or vegan", "Vegetarian and/or vegan."),
+        ("Call 555-1234 before 2024-01-15", "Call 555-1234 before 2024-01-15."),
+    ]
+
+    for text, expected in cases:
+        spoken = normalize_for_speech(text)
+        if spoken != expected:
+            print(f"❌ {text!r} -> {spoken!r}, expected {expected!r}")
+            return False
+
+    print("✅ Normalization test passed")
+    return True
+
+
+def test_chunks_and_phrases():
+    """Test sentence chunking and phrase IDs for fixed phrases."""
+    print("Testing speech chunks...")
+
+    from tools.dietary_advice import dietary_advice
+    from voice import prepare_speech, render_phrase
+
+    speech, chunks = prepare_speech(dietary_advice("Is this ok for diabetes?"))
+
+    if chunks[-1].phrase_id != 'medical_disclaimer' or chunks[-1].text != render_phrase('medical_disclaimer'):
+        print(f"❌ Disclaimer was not kept as a single phrase chunk: {chunks[-1]}")
+        return False
+
+    if ' '.join(chunk.text for chunk in chunks) != speech:
+        print("❌ Chunks do not add up to the speech text")
+        return False
+
+    if any(chunk.phrase_id for chunk in chunks[:-1]) or len(chunks) < 2:
+        print(f"❌ Unexpected chunks: {chunks}")
+        return False
+
+    print("✅ Chunking test passed")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("=" * 50)
+    print("Voice Post-Processor Tests")
+    print("=" * 50)
+
+    tests = [
+        ("Normalization", test_normalization),
+        ("Chunks", test_chunks_and_phrases),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n--- {test_name} ---")
+        if test_func():
+            passed += 1
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    print("=" * 50)
+
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,48 @@
+"""
+Non-blocking execution of tools for Food Lens Strands Agent.
+
+Strands runs the tool calls of one model turn concurrently, but blocking tool
+functions are handed to the event loop's default executor, which is sized
+for the host rather than for this Lambda. :func:`as_async` turns a blocking
+tool function into a coroutine function backed by a bounded, container-wide
+thread pool, so independent calls in a turn overlap without oversubscribing
+the function's CPU share.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import inspect
+from typing import Callable
+
+from config import get_settings
+
+# Threads shared by all blocking tool calls in this container
+MAX_TOOL_THREADS = get_settings().max_tool_threads
+
+TOOL_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=MAX_TOOL_THREADS,
+    thread_name_prefix='food-lens-tool'
+)
+
+
+def as_async(func: Callable) -> Callable:
+    """
+    Expose a tool function as a coroutine function.
+
+    Coroutine functions are returned unchanged. Blocking functions run on
+    TOOL_EXECUTOR with the caller's context variables (deadline, tool memo).
+    The wrapper keeps the function's name, docstring and signature, so it
+    can be passed to strands' @tool decorator like the original.
+    """
+    if inspect.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(TOOL_EXECUTOR, call)
+
+    return wrapper
@@ -0,0 +1,116 @@
+"""
+Per-invocation memoization of tool calls for Food Lens Strands Agent.
+
+Within one agent run the model often repeats a tool call with the same
+arguments (e.g. get_dish_info for the same dish). Tools wrapped with
+:func:`memoized` consult the ToolMemo of the current invocation, published in
+a context variable by the handler, and return the earlier result instantly.
+Identical calls that run concurrently share a single upstream call.
+"""
+
+import asyncio
+import functools
+import inspect
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from session_store import tool_call_key
+
+
+class ToolMemo:
+    """Results of the tool calls made during one agent invocation."""
+
+    def __init__(self, seed: Optional[Dict[str, Any]] = None):
+        self.results: Dict[str, Any] = dict(seed or {})
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def record_hit(self, tool_name: str) -> None:
+        self.hits[tool_name] = self.hits.get(tool_name, 0) + 1
+
+    def record_miss(self, tool_name: str) -> None:
+        self.misses[tool_name] = self.misses.get(tool_name, 0) + 1
+
+    def store(self, key: str, result: Any) -> None:
+        """Keep a result unless it reports an error worth retrying."""
+        if not (isinstance(result, dict) and result.get('error')):
+            self.results[key] = result
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts, overall and per tool."""
+        return {
+            'hits': sum(self.hits.values()),
+            'misses': sum(self.misses.values()),
+            'by_tool': {
+                name: {'hits': self.hits.get(name, 0), 'misses': self.misses.get(name, 0)}
+                for name in sorted(set(self.hits) | set(self.misses))
+            }
+        }
+
+
+current_memo: ContextVar[Optional[ToolMemo]] = ContextVar('current_memo', default=None)
+
+
+def memoized(func: Callable) -> Callable:
+    """
+    Wrap a tool function so repeated calls within one invocation are memoized.
+
+    The wrapper keeps the function's name, docstring and signature, so it
+    can be passed to strands' @tool decorator like the original.
+    """
+    signature = inspect.signature(func)
+    tool_name = func.__name__
+
+    def _key(args: tuple, kwargs: dict) -> str:
+        return tool_call_key(tool_name, dict(signature.bind(*args, **kwargs).arguments))
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            memo = current_memo.get()
+            if memo is None:
+                return await func(*args, **kwargs)
+
+            key = _key(args, kwargs)
+            if key in memo.results:
+                memo.record_hit(tool_name)
+                return memo.results[key]
+            if key in memo.pending:
+                memo.record_hit(tool_name)
+                return await asyncio.shield(memo.pending[key])
+
+            memo.record_miss(tool_name)
+            future = asyncio.get_running_loop().create_future()
+            memo.pending[key] = future
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+                future.exception()  # Mark retrieved when nobody else is waiting
+                raise
+            finally:
+                memo.pending.pop(key, None)
+            memo.store(key, result)
+            future.set_result(result)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        memo = current_memo.get()
+        if memo is None:
+            return func(*args, **kwargs)
+
+        key = _key(args, kwargs)
+        if key in memo.results:
+            memo.record_hit(tool_name)
+            return memo.results[key]
+
+        memo.record_miss(tool_name)
+        result = func(*args, **kwargs)
+        memo.store(key, result)
+        return result
+
+    return sync_wrapper
@@ -8,6 +8,9 @@ from strands import tool
 
 logger = logging.getLogger(__name__)
 
+# Standard medical disclaimer appended to all dietary advice
+MEDICAL_DISCLAIMER = "This is general information only. Always consult healthcare providers for medical advice, especially regarding allergies, medications, or health conditions."
+
 
 @tool
 def dietary_advice(query: str, dietary_restrictions: Optional[List[str]] = None, health_conditions: Optional[List[str]] = None) -> str:
@@ -23,9 +26,6 @@ def dietary_advice(query: str, dietary_restrictions: Optional[List[str]] = None,
         String containing dietary advice with medical disclaimers
     """
     try:
-        # Standard medical disclaimer
-        medical_disclaimer = "⚠️ This is general information only. Always consult healthcare providers for medical advice, especially regarding allergies, medications, or health conditions."
-        
         # Analyze query for health-related keywords
         health_keywords = [
             'allergy', 'allergic', 'diabetes', 'diabetic', 'blood pressure', 'hypertension',
@@ -96,14 +96,14 @@ def dietary_advice(query: str, dietary_restrictions: Optional[List[str]] = None,
         main_response = " ".join(response_parts)
         
         # Add disclaimer
-        full_response = f"{main_response}\n\n{medical_disclaimer}"
+        full_response = f"{main_response}\n\n{MEDICAL_DISCLAIMER}"
         
-        logger.info(f"Provided dietary advice for query: {query[:50]}...")
+        logger.debug("Provided dietary advice for query: %.50s", query)
         return full_response
         
     except Exception as e:
         logger.error(f"Error providing dietary advice: {str(e)}")
-        return f"I apologize, but I'm unable to provide specific dietary advice at this time due to technical issues. {medical_disclaimer}"
+        return f"I apologize, but I'm unable to provide specific dietary advice at this time due to technical issues. {MEDICAL_DISCLAIMER}"
 
 
 # Synchronous wrapper for compatibility
@@ -2,18 +2,26 @@
 Tool for fetching detailed menu item information from Food Lens API.
 """
 
-import os
-import json
+import codecs
 import logging
 from typing import Dict, Any, Optional
 import httpx
 from strands import tool
 
+from config import get_menu_api_endpoint, menu_api_base_url
+from deadline import get_deadline
+from .http_client import get_http_client
+from .json_stream import JsonArrayStream
+from .menu_cache import MENU_ITEM_FIELDS, SHARED_MENU_CACHE
+
 logger = logging.getLogger(__name__)
 
+# Minimum remaining request budget (seconds) worth spending on the menu API
+MENU_API_MIN_BUDGET = 1.0
+
 
 @tool
-def get_dish_info(dish_id: str, restaurant_id: str) -> Dict[str, Any]:
+async def get_dish_info(dish_id: str, restaurant_id: str) -> Dict[str, Any]:
     """
     Fetch detailed menu item information from Food Lens API.
     
@@ -24,9 +32,16 @@ def get_dish_info(dish_id: str, restaurant_id: str) -> Dict[str, Any]:
     Returns:
         Dict containing dish information including name, price, ingredients, description
     """
+    # Menus fetched from the same menu API by earlier requests (or restored
+    # at init) are reused
+    api_endpoint = get_menu_api_endpoint()
+    source = menu_api_base_url(api_endpoint)
+    dish = SHARED_MENU_CACHE.get_item(restaurant_id, dish_id, source=source)
+    if dish:
+        logger.debug("Serving dish info for %s from menu cache", dish_id)
+        return _dish_response(dish, dish_id, restaurant_id)
+    
     try:
-        api_endpoint = os.environ.get('FOOD_LENS_API_ENDPOINT')
-        
         if not api_endpoint:
             logger.error("FOOD_LENS_API_ENDPOINT not configured")
             return {
@@ -36,55 +51,67 @@ def get_dish_info(dish_id: str, restaurant_id: str) -> Dict[str, Any]:
             }
         
         # Construct API URL for public menu access
-        # Remove trailing /api if present to avoid double /api/api/menu
-        base_url = api_endpoint.rstrip('/api').rstrip('/')
-        url = f"{base_url}/api/menu"
+        # (the base URL has no trailing /api, to avoid double /api/api/menu)
+        url = f"{source}/api/menu"
         
-        # Make API request to get all menu items for the restaurant
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(
-                url,
-                params={
-                    'restaurantId': restaurant_id,
-                    'public': 'true'
-                }
-            )
-            
+        deadline = get_deadline()
+        if not deadline.allows(MENU_API_MIN_BUDGET):
+            logger.warning(f"Request budget too low to fetch dish info for {dish_id}")
+            return {
+                'error': 'Request budget exhausted',
+                'dish_id': dish_id,
+                'restaurant_id': restaurant_id
+            }
+        
+        # Ask for just this item and the fields the agent uses, bounded by
+        # this tool's share of the request budget. The response is streamed
+        # (compressed when the server supports it) and parsed as it arrives
+        timeout = deadline.timeout(10.0, share=0.5)
+        client = get_http_client()
+        dish = None
+        async with client.stream(
+            'GET',
+            url,
+            params={
+                'restaurantId': restaurant_id,
+                'public': 'true',
+                'itemId': dish_id,
+                'fields': MENU_ITEM_FIELDS
+            },
+            timeout=timeout
+        ) as response:
             if response.status_code == 200:
-                data = response.json()
-                menu_items = data.get('menuItems', [])
-                
-                # Find the specific dish by ID
-                dish = None
-                for item in menu_items:
-                    if item.get('id') == dish_id:
-                        dish = item
-                        break
-                
-                if dish:
-                    logger.info(f"Successfully fetched dish info for {dish_id}")
-                    return {
-                        'success': True,
-                        'dish': dish,
-                        'dish_id': dish_id,
-                        'restaurant_id': restaurant_id
-                    }
-                else:
-                    return {
-                        'error': 'Dish not found in menu',
-                        'dish_id': dish_id,
-                        'restaurant_id': restaurant_id
-                    }
+                dish = await _find_menu_item(response, dish_id)
+            else:
+                await response.aread()
+        
+        if response.status_code == 200:
+            if dish:
+                SHARED_MENU_CACHE.put_item(restaurant_id, dish, source=source)
+                logger.debug("Fetched dish info for %s", dish_id)
+                return _dish_response(dish, dish_id, restaurant_id)
             else:
-                logger.error(f"API request failed with status {response.status_code}: {response.text}")
                 return {
-                    'error': f'API request failed: {response.status_code}',
+                    'error': 'Dish not found in menu',
                     'dish_id': dish_id,
                     'restaurant_id': restaurant_id
                 }
-                
+        else:
+            logger.error(f"API request failed with status {response.status_code}: {response.text}")
+            stale = _stale_dish_response(dish_id, restaurant_id, source)
+            if stale:
+                return stale
+            return {
+                'error': f'API request failed: {response.status_code}',
+                'dish_id': dish_id,
+                'restaurant_id': restaurant_id
+            }
+            
     except httpx.TimeoutException:
         logger.error(f"Timeout fetching dish info for {dish_id}")
+        stale = _stale_dish_response(dish_id, restaurant_id, source)
+        if stale:
+            return stale
         return {
             'error': 'Request timeout',
             'dish_id': dish_id,
@@ -99,6 +126,44 @@ def get_dish_info(dish_id: str, restaurant_id: str) -> Dict[str, Any]:
         }
 
 
+async def _find_menu_item(response: httpx.Response, dish_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read menu items from a streamed menu API response until the dish is found.
+    
+    With itemId support the response holds just the dish and is read to the
+    end, keeping the connection reusable. A server that ignores itemId sends
+    the whole menu; reading then stops at the first item after the dish.
+    """
+    items = JsonArrayStream('menuItems')
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    dish = None
+    async for chunk in response.aiter_bytes():
+        for item in items.feed(decoder.decode(chunk)):
+            if dish is not None:
+                return dish
+            if item.get('id') == dish_id:
+                dish = item
+    return dish
+
+
+def _dish_response(dish: Dict[str, Any], dish_id: str, restaurant_id: str) -> Dict[str, Any]:
+    return {
+        'success': True,
+        'dish': dish,
+        'dish_id': dish_id,
+        'restaurant_id': restaurant_id
+    }
+
+
+def _stale_dish_response(dish_id: str, restaurant_id: str, source: str) -> Optional[Dict[str, Any]]:
+    """Fall back to an expired cached menu when the menu API is unavailable."""
+    dish = SHARED_MENU_CACHE.get_item(restaurant_id, dish_id, allow_stale=True, source=source)
+    if dish is None:
+        return None
+    logger.warning(f"Serving stale cached dish info for {dish_id}")
+    return _dish_response(dish, dish_id, restaurant_id)
+
+
 # Synchronous wrapper for compatibility
 def get_dish_info_sync(dish_id: str, restaurant_id: str) -> Dict[str, Any]:
     """
@@ -0,0 +1,62 @@
+"""
+Shared HTTP client for the tools' upstream requests.
+
+Creating an httpx.AsyncClient per call throws away its connection pool, so
+every request paid for DNS, TCP and TLS setup again. Tools instead share one
+client per event loop (httpx clients must not be used across loops), so
+connections to the menu API, USDA and DuckDuckGo are kept alive across tool
+calls and, when the loop is long-lived, across requests. Timeouts are passed
+per request.
+"""
+
+import asyncio
+import threading
+import weakref
+
+import httpx
+
+# Connection pool limits per event loop
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+
+# Fallback timeout for requests that do not pass one (seconds)
+DEFAULT_TIMEOUT = 10.0
+
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=DEFAULT_TIMEOUT,
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+            )
+            _clients[loop] = client
+        return client
+
+
+async def close_http_client() -> None:
+    """Close the shared client of the running event loop, if any."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def use_http_client(client: httpx.AsyncClient) -> None:
+    """
+    Make the tools use the given client on the running event loop.
+
+    Lets benchmarks and replays route upstream requests to stand-ins (e.g. a
+    client built on httpx.MockTransport) without touching the tools.
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        _clients[loop] = client
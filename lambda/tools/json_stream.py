@@ -0,0 +1,62 @@
+"""
+Incremental decoding of a JSON array inside a streamed response.
+
+Lets a tool look at the elements of e.g. {"menuItems": [...]} as the bytes
+arrive, and stop reading as soon as it has what it needs, instead of
+downloading and parsing the whole document first.
+"""
+
+import json
+import re
+from typing import Any, List
+
+
+class JsonArrayStream:
+    """Decodes the elements of the array stored under a key, chunk by chunk."""
+
+    def __init__(self, key: str):
+        self._key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._in_array = False
+        self.done = False
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Add the next piece of the document.
+
+        Returns:
+            Elements completed by this piece, in order
+        """
+        if self.done:
+            return []
+        self._buffer += text
+
+        if not self._in_array:
+            match = self._key_pattern.search(self._buffer)
+            if match is None:
+                return []
+            self._buffer = self._buffer[match.end():]
+            self._in_array = True
+
+        items = []
+        position = 0
+        while True:
+            while position < len(self._buffer) and self._buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(self._buffer):
+                break
+            if self._buffer[position] == ']':
+                self.done = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, position)
+            except json.JSONDecodeError:
+                break  # Element not complete yet
+            if end == len(self._buffer) and not isinstance(item, (dict, list)):
+                break  # A number or literal may continue in the next piece
+            items.append(item)
+            position = end
+
+        self._buffer = self._buffer[position:]
+        return items
@@ -0,0 +1,109 @@
+"""
+Process-wide cache of restaurant menus fetched from the Food Lens menu API.
+
+Menus change rarely compared to how often customers ask about them, so each
+restaurant's menu is fetched once and reused by later requests handled by the
+same Lambda container. Stale menus are kept as a fallback for when the API is
+unavailable. Menus are keyed by the menu API they came from (its base URL)
+as well as the restaurant ID, so a menu fetched from one API is never served
+to requests that use another.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Seconds a fetched menu is served without re-fetching
+MENU_CACHE_TTL = 5 * 60
+
+# Upper bound on cached restaurants per container
+MAX_CACHED_MENUS = 500
+
+# Menu item fields requested from the menu API (its "fields" parameter);
+# images, QR data and bookkeeping columns are not needed by the tools
+MENU_ITEM_FIELDS = 'id,name,price,ingredients,description,cuisine'
+
+
+class MenuCache:
+    """Least-recently-used cache of menu items, indexed by item ID."""
+
+    def __init__(self, ttl: float = MENU_CACHE_TTL, max_menus: int = MAX_CACHED_MENUS):
+        self.ttl = ttl
+        self.max_menus = max_menus
+        self.version = 0  # Bumped on every change, for snapshotting
+        # (menu API, restaurant ID) -> (menu fetched at, items by ID, fetch
+        # times of items fetched on their own since)
+        self._menus: 'OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Dict[str, Any]], Dict[str, float]]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._menus)
+
+    def get_item(self, restaurant_id: str, item_id: str, allow_stale: bool = False,
+                 source: str = '') -> Optional[Dict[str, Any]]:
+        """
+        Return a cached menu item.
+
+        Args:
+            restaurant_id: Restaurant the item belongs to
+            item_id: Menu item ID
+            allow_stale: Also serve menus older than the TTL
+            source: Base URL of the menu API the menu comes from
+
+        Returns:
+            The menu item, or None when the menu is not cached (or is stale)
+            or does not contain the item
+        """
+        key = (source, restaurant_id)
+        entry = self._menus.get(key)
+        if entry is None:
+            return None
+        fetched_at, items, item_fetched_at = entry
+        if not allow_stale and time.time() - item_fetched_at.get(item_id, fetched_at) > self.ttl:
+            return None
+        self._menus.move_to_end(key)
+        return items.get(item_id)
+
+    def has_fresh_menu(self, restaurant_id: str, source: str = '') -> bool:
+        """Whether the restaurant's menu was fetched within the TTL."""
+        entry = self._menus.get((source, restaurant_id))
+        return entry is not None and time.time() - entry[0] <= self.ttl
+
+    def put_menu(self, restaurant_id: str, menu_items: Iterable[Dict[str, Any]], fetched_at: Optional[float] = None,
+                 source: str = '') -> None:
+        """Store a restaurant's full list of menu items, as served by the menu API at source."""
+        key = (source, restaurant_id)
+        items = {item['id']: item for item in menu_items if item.get('id')}
+        self._menus[key] = (time.time() if fetched_at is None else fetched_at, items, {})
+        self._menus.move_to_end(key)
+        if len(self._menus) > self.max_menus:
+            self._menus.popitem(last=False)
+        self.version += 1
+
+    def put_item(self, restaurant_id: str, item: Dict[str, Any], source: str = '') -> None:
+        """
+        Store a single menu item fetched on its own.
+
+        The item joins the restaurant's cached menu, fresh or stale, and is
+        fresh itself for one TTL; the other items keep their age, so a stale
+        menu remains available as a fallback for them. Without a cached menu
+        it starts a new (partial) menu entry.
+        """
+        key = (source, restaurant_id)
+        entry = self._menus.get(key)
+        if entry is None:
+            self.put_menu(restaurant_id, [item], source=source)
+            return
+        _, items, item_fetched_at = entry
+        items[item['id']] = item
+        item_fetched_at[item['id']] = time.time()
+        self._menus.move_to_end(key)
+        self.version += 1
+
+    def entries(self) -> List[Tuple[str, float, List[Dict[str, Any]], str]]:
+        """(restaurant ID, fetched at, menu items, menu API) for every cached menu, oldest first."""
+        return [(restaurant_id, fetched_at, list(items.values()), source)
+                for (source, restaurant_id), (fetched_at, items, _) in self._menus.items()]
+
+
+# Shared by every tool in the container
+SHARED_MENU_CACHE = MenuCache()
@@ -0,0 +1,112 @@
+"""
+Process-wide nutrition cache shared by the nutrition lookup tools.
+
+Entries survive across requests handled by the same Lambda container and
+are keyed both by normalized food name and by USDA FDC ID. USDA search
+queries map to the FDC IDs they returned, so a repeated query is answered
+from the FDC records without searching again. Each tool searches with its
+own page size and ranking, so queries are kept per tool (scope).
+"""
+
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from .nutrition_records import NutrientRecord
+
+# Upper bound on cached foods per container
+MAX_CACHE_ENTRIES = 10000
+
+
+def normalize_food_name(food_name: str) -> str:
+    """Normalize a food name into a cache key."""
+    return ' '.join(food_name.lower().split())
+
+
+class NutritionCache:
+    """Least-recently-used cache of nutrient records."""
+
+    def __init__(self, max_entries: int = MAX_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.version = 0  # Bumped on every change, for snapshotting
+        self._by_name: 'OrderedDict[str, Tuple[NutrientRecord, str]]' = OrderedDict()
+        self._by_fdc_id: 'OrderedDict[int, NutrientRecord]' = OrderedDict()
+        self._fdc_ids_by_query: 'OrderedDict[Tuple[str, str], List[int]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def get(self, food_name: str) -> Optional[Tuple[NutrientRecord, str]]:
+        """Return (record, source) for a food name, or None."""
+        key = normalize_food_name(food_name)
+        entry = self._by_name.get(key)
+        if entry is not None:
+            self._by_name.move_to_end(key)
+        return entry
+
+    def put(self, food_name: str, record: NutrientRecord, source: str) -> None:
+        """Store the record for a food name."""
+        key = normalize_food_name(food_name)
+        self._by_name[key] = (record, source)
+        self._by_name.move_to_end(key)
+        if len(self._by_name) > self.max_entries:
+            self._by_name.popitem(last=False)
+        self.version += 1
+
+    def get_fdc(self, fdc_id: int) -> Optional[NutrientRecord]:
+        """Return the record for a USDA FDC ID, or None."""
+        record = self._by_fdc_id.get(fdc_id)
+        if record is not None:
+            self._by_fdc_id.move_to_end(fdc_id)
+        return record
+
+    def put_fdc(self, fdc_id: int, record: NutrientRecord) -> None:
+        """Store the record for a USDA FDC ID."""
+        self._by_fdc_id[fdc_id] = record
+        self._by_fdc_id.move_to_end(fdc_id)
+        if len(self._by_fdc_id) > self.max_entries:
+            self._by_fdc_id.popitem(last=False)
+        self.version += 1
+
+    def get_query(self, query: str, *, scope: str) -> Optional[List[int]]:
+        """Return the FDC IDs a scope's USDA search query returned (best first), or None."""
+        key = (scope, normalize_food_name(query))
+        fdc_ids = self._fdc_ids_by_query.get(key)
+        if fdc_ids is not None:
+            self._fdc_ids_by_query.move_to_end(key)
+        return fdc_ids
+
+    def put_query(self, query: str, fdc_ids: Iterable[int], *, scope: str) -> None:
+        """Store the FDC IDs a scope's USDA search query returned, best first."""
+        key = (scope, normalize_food_name(query))
+        self._fdc_ids_by_query[key] = list(fdc_ids)
+        self._fdc_ids_by_query.move_to_end(key)
+        if len(self._fdc_ids_by_query) > self.max_entries:
+            self._fdc_ids_by_query.popitem(last=False)
+        self.version += 1
+
+    def missing_fdc_ids(self, fdc_ids: Iterable[int]) -> list:
+        """Unique FDC IDs (in order) that are not cached yet."""
+        return [fdc_id for fdc_id in dict.fromkeys(fdc_ids) if fdc_id not in self._by_fdc_id]
+
+    def clear(self) -> None:
+        """Drop every cached record."""
+        self._by_name.clear()
+        self._by_fdc_id.clear()
+        self._fdc_ids_by_query.clear()
+        self.version += 1
+
+    def entries(self) -> List[Tuple[str, NutrientRecord, str]]:
+        """(normalized name, record, source) for every cached food, oldest first."""
+        return [(key, record, source) for key, (record, source) in self._by_name.items()]
+
+    def fdc_entries(self) -> List[Tuple[int, NutrientRecord]]:
+        """(FDC ID, record) for every cached FDC ID, oldest first."""
+        return list(self._by_fdc_id.items())
+
+    def query_entries(self) -> List[Tuple[str, List[int], str]]:
+        """(normalized query, FDC IDs, scope) for every cached USDA search, oldest first."""
+        return [(query, fdc_ids, scope) for (scope, query), fdc_ids in self._fdc_ids_by_query.items()]
+
+
+# Shared by every tool in the container
+SHARED_NUTRITION_CACHE = NutritionCache()
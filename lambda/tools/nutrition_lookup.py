@@ -2,15 +2,34 @@
 Tool for fetching nutritional information using USDA FoodData Central API.
 """
 
-import os
 import json
 import logging
+from dataclasses import replace
 from typing import Dict, Any, List, Optional
 import httpx
 from strands import tool
 
+from config import USDA_API_BASE_URL, get_settings
+from deadline import get_deadline
+from .http_client import get_http_client
+from .nutrition_cache import SHARED_NUTRITION_CACHE
+from .nutrition_records import NutrientRecord, render_nutrition_text
+from .rate_limit import get_limiter, observe_response
+from .smart_nutrition import _generate_smart_estimate
+from .usda import USDABatchFetcher, parse_foods
+
 logger = logging.getLogger(__name__)
 
+# Minimum remaining request budget (seconds) worth spending on the USDA API;
+# below it the lookup degrades to the local estimate
+USDA_MIN_BUDGET = 2.0
+
+# Longest time (seconds) to queue for a USDA token before falling back
+RATE_LIMIT_MAX_WAIT = 0.5
+
+# Query cache scope of this tool's searches (top 3 results, ranked)
+USDA_QUERY_SCOPE = 'nutrition_lookup'
+
 
 @tool
 async def nutrition_lookup(food_name: str, ingredients: Optional[List[str]] = None) -> Dict[str, Any]:
@@ -25,7 +44,7 @@ async def nutrition_lookup(food_name: str, ingredients: Optional[List[str]] = No
         Dict containing nutritional information and disclaimers
     """
     try:
-        usda_api_key = os.environ.get('USDA_API_KEY')
+        usda_api_key = get_settings().usda_api_key
         
         if not usda_api_key:
             logger.warning("USDA_API_KEY not configured, returning generic response")
@@ -36,14 +55,32 @@ async def nutrition_lookup(food_name: str, ingredients: Optional[List[str]] = No
                 'source': 'unavailable'
             }
         
+        deadline = get_deadline()
+        if not deadline.allows(USDA_MIN_BUDGET):
+            logger.info(f"Request budget too low for USDA lookup, estimating {food_name}")
+            return _generate_smart_estimate(food_name)
+        
         # Prepare search query
         search_query = food_name
         if ingredients:
             # Include main ingredients in search for better results
             search_query = f"{food_name} {' '.join(ingredients[:3])}"  # Limit to first 3 ingredients
         
+        # A query searched before is resolved from its FDC IDs; only records
+        # that left the cache are fetched, in one /foods batch
+        fdc_ids = SHARED_NUTRITION_CACHE.get_query(search_query, scope=USDA_QUERY_SCOPE)
+        if fdc_ids:
+            fetcher = USDABatchFetcher(usda_api_key, USDA_API_BASE_URL, max_queue_wait=RATE_LIMIT_MAX_WAIT)
+            records = await fetcher.fetch(fdc_ids, timeout=deadline.timeout(10.0, share=0.5))
+            if records:
+                return _usda_response(food_name, _best_record(fdc_ids, records))
+        
+        if not await get_limiter('usda').acquire(max_wait=RATE_LIMIT_MAX_WAIT):
+            logger.info(f"USDA rate limit reached, estimating {food_name}")
+            return _generate_smart_estimate(food_name)
+        
         # USDA FoodData Central API endpoint
-        url = "https://api.nal.usda.gov/fdc/v1/foods/search"
+        url = f"{USDA_API_BASE_URL}/foods/search"
         
         params = {
             'query': search_query,
@@ -54,85 +91,48 @@ async def nutrition_lookup(food_name: str, ingredients: Optional[List[str]] = No
             'sortOrder': 'asc'
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
+        client = get_http_client()
+        response = await client.get(url, params=params, timeout=deadline.timeout(10.0, share=0.5))
+        observe_response('usda', response.status_code, response.headers.get('Retry-After'))
+        
+        if response.status_code == 200:
+            data = response.json()
+            foods = data.get('foods', [])
             
-            if response.status_code == 200:
-                data = response.json()
-                foods = data.get('foods', [])
-                
-                if not foods:
-                    return {
-                        'food_name': food_name,
-                        'nutritional_info': f'No specific nutritional data found for "{food_name}". This may be a prepared dish with multiple ingredients.',
-                        'disclaimer': 'Nutritional content can vary significantly based on preparation method and ingredients. Consult with restaurant staff for specific dietary information.',
-                        'source': 'USDA FoodData Central (no results)'
-                    }
-                
-                # Process the best match (first result)
-                best_match = foods[0]
-                food_nutrients = best_match.get('foodNutrients', [])
-                
-                # Extract key nutrients
-                nutrients = {}
-                nutrient_map = {
-                    'Energy': 'calories',
-                    'Protein': 'protein',
-                    'Total lipid (fat)': 'fat',
-                    'Carbohydrate, by difference': 'carbohydrates',
-                    'Fiber, total dietary': 'fiber',
-                    'Sugars, total including NLEA': 'sugars',
-                    'Sodium, Na': 'sodium',
-                    'Calcium, Ca': 'calcium',
-                    'Iron, Fe': 'iron'
-                }
-                
-                for nutrient in food_nutrients:
-                    nutrient_name = nutrient.get('nutrientName', '')
-                    nutrient_value = nutrient.get('value', 0)
-                    nutrient_unit = nutrient.get('unitName', '')
-                    
-                    for usda_name, simple_name in nutrient_map.items():
-                        if usda_name.lower() in nutrient_name.lower():
-                            nutrients[simple_name] = {
-                                'value': nutrient_value,
-                                'unit': nutrient_unit
-                            }
-                            break
-                
-                # Format nutritional information
-                nutrition_text = f"Nutritional information for {best_match.get('description', food_name)} (per 100g):\n"
-                
-                if 'calories' in nutrients:
-                    nutrition_text += f"• Calories: {nutrients['calories']['value']:.0f} {nutrients['calories']['unit']}\n"
-                if 'protein' in nutrients:
-                    nutrition_text += f"• Protein: {nutrients['protein']['value']:.1f}g\n"
-                if 'fat' in nutrients:
-                    nutrition_text += f"• Fat: {nutrients['fat']['value']:.1f}g\n"
-                if 'carbohydrates' in nutrients:
-                    nutrition_text += f"• Carbohydrates: {nutrients['carbohydrates']['value']:.1f}g\n"
-                if 'fiber' in nutrients:
-                    nutrition_text += f"• Fiber: {nutrients['fiber']['value']:.1f}g\n"
-                if 'sodium' in nutrients:
-                    nutrition_text += f"• Sodium: {nutrients['sodium']['value']:.0f}mg\n"
-                
-                return {
-                    'food_name': food_name,
-                    'matched_food': best_match.get('description', ''),
-                    'nutritional_info': nutrition_text.strip(),
-                    'raw_nutrients': nutrients,
-                    'disclaimer': 'Nutritional values are approximate and based on USDA data. Actual values may vary based on preparation methods, portion sizes, and specific ingredients used.',
-                    'source': 'USDA FoodData Central'
-                }
-            else:
-                logger.error(f"USDA API request failed with status {response.status_code}")
+            if not foods:
                 return {
                     'food_name': food_name,
-                    'nutritional_info': 'Unable to retrieve nutritional information at this time.',
-                    'disclaimer': 'Please consult nutrition labels or healthcare providers for accurate nutritional information.',
-                    'source': f'USDA API error ({response.status_code})'
+                    'nutritional_info': f'No specific nutritional data found for "{food_name}". This may be a prepared dish with multiple ingredients.',
+                    'disclaimer': 'Nutritional content can vary significantly based on preparation method and ingredients. Consult with restaurant staff for specific dietary information.',
+                    'source': 'USDA FoodData Central (no results)'
                 }
-                
+            
+            # Parse every result in one pass and keep the most complete
+            # match (search order breaks ties)
+            matrix = parse_foods(foods)
+            best_index = matrix.best_index()
+            record = replace(matrix.record(best_index), description=matrix.descriptions[best_index])
+            
+            # Every parsed result is worth keeping for later lookups, and
+            # the query remembers them in search order
+            search_ids = []
+            for fdc_id, description, parsed in matrix.records():
+                if fdc_id is not None:
+                    SHARED_NUTRITION_CACHE.put_fdc(fdc_id, replace(parsed, description=description))
+                    search_ids.append(fdc_id)
+            if search_ids:
+                SHARED_NUTRITION_CACHE.put_query(search_query, search_ids, scope=USDA_QUERY_SCOPE)
+            
+            return _usda_response(food_name, record)
+        else:
+            logger.error(f"USDA API request failed with status {response.status_code}")
+            return {
+                'food_name': food_name,
+                'nutritional_info': 'Unable to retrieve nutritional information at this time.',
+                'disclaimer': 'Please consult nutrition labels or healthcare providers for accurate nutritional information.',
+                'source': f'USDA API error ({response.status_code})'
+            }
+            
     except httpx.TimeoutException:
         logger.error(f"Timeout looking up nutrition for {food_name}")
         return {
@@ -151,6 +151,24 @@ async def nutrition_lookup(food_name: str, ingredients: Optional[List[str]] = No
         }
 
 
+def _best_record(fdc_ids: List[int], records: Dict[int, NutrientRecord]) -> NutrientRecord:
+    """Most complete of the resolved records; earlier (better ranked) IDs win ties."""
+    resolved = [records[fdc_id] for fdc_id in fdc_ids if fdc_id in records]
+    return max(reversed(resolved), key=lambda record: len(record.as_dict()))
+
+
+def _usda_response(food_name: str, record: NutrientRecord) -> Dict[str, Any]:
+    """Tool response for a USDA record; its description names the matched USDA food."""
+    return {
+        'food_name': food_name,
+        'matched_food': record.description,
+        'nutritional_info': render_nutrition_text(food_name, record),
+        'raw_nutrients': record.as_dict(),
+        'disclaimer': 'Nutritional values are approximate and based on USDA data. Actual values may vary based on preparation methods, portion sizes, and specific ingredients used.',
+        'source': 'USDA FoodData Central'
+    }
+
+
 # Synchronous wrapper for compatibility
 def nutrition_lookup_sync(food_name: str, ingredients: Optional[List[str]] = None) -> Dict[str, Any]:
     """
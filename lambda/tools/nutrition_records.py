@@ -0,0 +1,121 @@
+"""
+Compact nutrient records shared by the nutrition lookup tools.
+
+Nutrition tables and lookup results are held as slotted, immutable records
+rather than per-food dicts. Human-readable text is only rendered when a
+result is actually returned to the agent, and repeated renders are cached.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+# Display order, label and unit of each nutrient in formatted responses
+NUTRIENT_LABELS = (
+    ('calories', 'Calories', ''),
+    ('protein', 'Protein', 'g'),
+    ('fat', 'Fat', 'g'),
+    ('carbs', 'Carbohydrates', 'g'),
+    ('fiber', 'Fiber', 'g'),
+    ('sugars', 'Sugars', 'g'),
+    ('sodium', 'Sodium', 'mg'),
+    ('calcium', 'Calcium', 'mg'),
+    ('iron', 'Iron', 'mg'),
+)
+
+# Nutrients that are always listed, even when unknown
+REQUIRED_NUTRIENTS = frozenset(['calories', 'protein', 'fat', 'carbs'])
+
+
+@dataclass(frozen=True, slots=True)
+class NutrientRecord:
+    """Nutrient values per 100g; None marks a nutrient that is not known."""
+
+    calories: Optional[float] = None
+    protein: Optional[float] = None
+    fat: Optional[float] = None
+    carbs: Optional[float] = None
+    fiber: Optional[float] = None
+    sodium: Optional[float] = None
+    sugars: Optional[float] = None
+    calcium: Optional[float] = None
+    iron: Optional[float] = None
+    description: str = ''
+
+    @classmethod
+    def from_mapping(cls, values: Dict[str, Any], description: str = '') -> 'NutrientRecord':
+        """Build a record from a dict keyed by nutrient name, ignoring unknown keys."""
+        return cls(
+            description=description,
+            **{name: float(values[name]) for name, _, _ in NUTRIENT_LABELS if values.get(name) is not None}
+        )
+
+    def is_empty(self) -> bool:
+        """Whether no nutrient value is known."""
+        return all(getattr(self, name) is None for name, _, _ in NUTRIENT_LABELS)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Known nutrient values keyed by name (the tools' raw_nutrients shape)."""
+        values = {}
+        for name, _, _ in NUTRIENT_LABELS:
+            value = getattr(self, name)
+            if value is not None:
+                values[name] = value
+        return values
+
+
+@dataclass(frozen=True, slots=True)
+class NutritionResult:
+    """A lookup result whose response text is rendered on demand."""
+
+    food_name: str
+    nutrients: NutrientRecord
+    source: str
+    description: str = ''
+    summary: str = ''  # Replaces the nutrient listing when set (e.g. web search)
+
+    def to_response(self) -> Dict[str, Any]:
+        """Render the result into the dict returned to the agent."""
+        if self.summary:
+            text = self.summary
+        else:
+            text = render_nutrition_text(self.food_name, self.nutrients, self.description)
+
+        return {
+            'food_name': self.food_name,
+            'nutritional_info': text,
+            'raw_nutrients': self.nutrients.as_dict(),
+            'source': self.source,
+            'success': True
+        }
+
+
+def _format_value(value: Optional[float]) -> str:
+    return 'N/A' if value is None else f"{value:g}"
+
+
+@lru_cache(maxsize=1024)
+def render_nutrition_text(food_name: str, nutrients: NutrientRecord, description: str = '') -> str:
+    """
+    Render the per-100g nutrition listing for a food.
+
+    Args:
+        food_name: Name shown in the heading
+        nutrients: Nutrient values to list
+        description: Optional description shown under the heading
+
+    Returns:
+        Formatted multi-line text
+    """
+    lines = [f"Nutritional information for {food_name} (per 100g):"]
+
+    description = description or nutrients.description
+    if description:
+        lines.append(f"{description}\n")
+
+    for name, label, unit in NUTRIENT_LABELS:
+        value = getattr(nutrients, name)
+        if value or name in REQUIRED_NUTRIENTS:
+            lines.append(f"• {label}: {_format_value(value)}{unit if value is not None else ''}")
+
+    return '\n'.join(lines)
@@ -0,0 +1,116 @@
+"""
+Extraction of nutrition facts from free-text search results.
+
+A single precompiled pattern scans the text once and recognizes both
+"13 g of protein" and "Protein: 13 g" phrasings for calories, protein, fat,
+carbohydrates, fiber, sodium and sugars, along with any serving size. Values
+are normalized to kcal, grams and milligrams and scaled to per-100g.
+"""
+
+import re
+from typing import Dict, Optional
+
+_NUMBER = r'\d{1,3}(?:,\d{3})+(?!\d)|\d+(?:\.\d+)?'
+
+_UNIT = r'kcal|kj|kilojoules?|kilocalories?|cal(?:ories)?|mg|milligrams?|g|grams?'
+
+# Nutrient names; "fat" is not matched as part of "saturated fat", "trans fat"
+# or "calories from fat"
+_NUTRIENT = (
+    r'calories|energy|protein|'
+    r'(?<!saturated )(?<!trans )(?<!from )(?:total )?fat|'
+    r'(?:total )?carbohydrates?|carbs|'
+    r'(?:dietary )?fib(?:er|re)|sodium|(?:total )?sugars?'
+)
+
+_NUTRITION_PATTERN = re.compile(
+    # Serving size: "per 30 g", "per 30g serving", "30 g serving", "serving size: 30 g"
+    rf'(?:per|serving size:?)\s*(?P<serving_a>{_NUMBER})\s*(?:g|grams?)\b'
+    rf'|(?P<serving_b>{_NUMBER})\s*(?:g|grams?)\s+serving\b'
+    # Value first: "155 calories", "13 g of protein", "620 kJ of energy"
+    rf'|(?P<value_a>{_NUMBER})\s*(?P<unit_a>{_UNIT})?\b\s*(?:of\s+)?(?P<nutrient_a>{_NUTRIENT})\b'
+    # Bare energy amounts: "about 155 kcal"
+    rf'|(?P<value_c>{_NUMBER})\s*(?P<unit_c>kcal|kj|kilojoules?|kilocalories?)\b'
+    # Label first: "Protein: 13 g", "Energy 620 kJ", "sodium - 400mg"
+    rf'|\b(?P<nutrient_b>{_NUTRIENT})\s*[:\-]?\s*(?P<value_b>{_NUMBER})\s*(?P<unit_b>{_UNIT})?\b'
+)
+
+KJ_PER_KCAL = 4.184
+
+
+def _field_for(nutrient: str) -> str:
+    """Map a matched nutrient phrase to a NutrientRecord field name."""
+    nutrient = nutrient.split()[-1]
+    if nutrient in ('calories', 'energy'):
+        return 'calories'
+    if nutrient.startswith('carb'):
+        return 'carbs'
+    if nutrient.startswith('fib'):
+        return 'fiber'
+    if nutrient.startswith('sugar'):
+        return 'sugars'
+    return nutrient
+
+
+def _parse_number(number: str) -> float:
+    return float(number.replace(',', ''))
+
+
+def _normalize(field: str, value: float, unit: Optional[str]) -> Optional[float]:
+    """Convert a value to the unit NutrientRecord uses for the field."""
+    unit = unit or ''
+    if field == 'calories':
+        if unit in ('kj', 'kilojoule', 'kilojoules'):
+            return value / KJ_PER_KCAL
+        if unit in ('mg', 'milligram', 'milligrams', 'g', 'gram', 'grams'):
+            return None
+        return value
+    if unit.startswith('k') or unit.startswith('cal'):
+        return None
+    if field == 'sodium':
+        return value * 1000.0 if unit in ('g', 'gram', 'grams') else value
+    return value / 1000.0 if unit in ('mg', 'milligram', 'milligrams') else value
+
+
+def extract_nutrition_from_text(text: str) -> Dict[str, float]:
+    """
+    Extract nutrition values from free text.
+
+    Args:
+        text: Search result text
+
+    Returns:
+        Dict of NutrientRecord field name to per-100g value; the first mention
+        of each nutrient wins
+    """
+    nutrition: Dict[str, float] = {}
+    serving = None
+    lowered = text.lower()
+
+    for match in _NUTRITION_PATTERN.finditer(lowered):
+        groups = match.groupdict()
+        serving_size = groups['serving_a'] or groups['serving_b']
+        if serving_size:
+            if serving is None:
+                serving = _parse_number(serving_size)
+            continue
+
+        if groups['nutrient_a']:
+            nutrient, number, unit = groups['nutrient_a'], groups['value_a'], groups['unit_a']
+        elif groups['value_c']:
+            nutrient, number, unit = 'energy', groups['value_c'], groups['unit_c']
+        else:
+            nutrient, number, unit = groups['nutrient_b'], groups['value_b'], groups['unit_b']
+
+        field = _field_for(nutrient)
+        if field in nutrition:
+            continue
+        value = _normalize(field, _parse_number(number), unit)
+        if value is not None:
+            nutrition[field] = value
+
+    if serving and serving != 100:
+        scale = 100.0 / serving
+        nutrition = {field: value * scale for field, value in nutrition.items()}
+
+    return {field: round(value, 2) for field, value in nutrition.items()}
@@ -0,0 +1,192 @@
+"""
+Token-bucket rate limiting for upstream APIs (USDA FoodData Central, DuckDuckGo).
+
+One bucket per upstream is shared by every coroutine and thread in the
+container. Bucket state lives in a pluggable store: in memory by default, or
+a lock-protected file so that several worker processes on one host share the
+same budget. Callers either queue briefly for a token or fall back right away.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upstream name -> (tokens per second, burst capacity)
+UPSTREAM_LIMITS = {
+    'usda': (1000 / 3600.0, 30),  # api.data.gov keys allow 1,000 requests per hour
+    'duckduckgo': (1.0, 3),
+}
+
+# Back-off applied when a throttled upstream sends no usable Retry-After
+DEFAULT_THROTTLE_SECONDS = 30.0
+
+# Bucket state: (available tokens, wall-clock time of last refill)
+BucketState = Tuple[float, float]
+
+
+class MemoryBucketStore:
+    """Keeps bucket state in process memory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, BucketState] = {}
+
+    def update(self, name: str, update: Callable[[Optional[BucketState]], BucketState]) -> BucketState:
+        """Atomically replace the state of a bucket and return the new state."""
+        with self._lock:
+            state = update(self._states.get(name))
+            self._states[name] = state
+            return state
+
+
+class FileBucketStore:
+    """Keeps bucket state in a JSON file guarded by an exclusive flock."""
+
+    def __init__(self, path: str = '/tmp/food-lens-rate-limits.json'):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def update(self, name: str, update: Callable[[Optional[BucketState]], BucketState]) -> BucketState:
+        """Atomically replace the state of a bucket and return the new state."""
+        with self._lock, open(self.path, 'a+') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                try:
+                    states = json.loads(handle.read() or '{}')
+                except ValueError:
+                    states = {}
+
+                previous = states.get(name)
+                state = update(tuple(previous) if previous else None)
+                states[name] = list(state)
+
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(states))
+                handle.flush()
+                return state
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class TokenBucket:
+    """Token bucket for a single upstream."""
+
+    def __init__(self, name: str, rate: float, capacity: float, store=None):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.store = store or MemoryBucketStore()
+
+    def _refill(self, state: Optional[BucketState], now: float) -> float:
+        if state is None:
+            return self.capacity
+        tokens, updated_at = state
+        return min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0.0 when a token was taken, otherwise seconds until one is available
+        """
+        wait = 0.0
+
+        def update(state: Optional[BucketState]) -> BucketState:
+            nonlocal wait
+            now = time.time()
+            tokens = self._refill(state, now)
+            if tokens >= 1.0:
+                return tokens - 1.0, now
+            wait = (1.0 - tokens) / self.rate
+            return tokens, now
+
+        self.store.update(self.name, update)
+        return wait
+
+    async def acquire(self, max_wait: float = 0.0) -> bool:
+        """
+        Take a token, queueing for at most max_wait seconds.
+
+        Args:
+            max_wait: Longest time the caller is willing to wait
+
+        Returns:
+            True when a token was taken, False when the caller should fall back
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                logger.info(f"Rate limit reached for {self.name}, falling back")
+                return False
+            await asyncio.sleep(wait)
+
+    def throttle(self, retry_after: float) -> None:
+        """Drain the bucket so the next token becomes available after retry_after seconds."""
+        self.store.update(self.name, lambda state: (1.0 - retry_after * self.rate, time.time()))
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+_store = None
+
+
+def configure_rate_limits(store=None) -> None:
+    """
+    Select the bucket store shared by all upstreams.
+
+    Args:
+        store: MemoryBucketStore, FileBucketStore or any object with the same
+            update() method; None selects FileBucketStore when
+            RATE_LIMIT_STATE_FILE is set, otherwise in-memory state
+    """
+    global _store
+    state_file = get_settings().rate_limit_state_file
+    if store is None and state_file:
+        store = FileBucketStore(state_file)
+    with _buckets_lock:
+        _store = store or MemoryBucketStore()
+        _buckets.clear()
+
+
+def get_limiter(upstream: str) -> TokenBucket:
+    """Return the shared token bucket for an upstream listed in UPSTREAM_LIMITS."""
+    with _buckets_lock:
+        bucket = _buckets.get(upstream)
+        if bucket is None:
+            rate, capacity = UPSTREAM_LIMITS[upstream]
+            bucket = _buckets[upstream] = TokenBucket(upstream, rate, capacity, _store)
+        return bucket
+
+
+def observe_response(upstream: str, status_code: int, retry_after: Optional[str] = None) -> None:
+    """
+    Let the upstream's bucket react to a response.
+
+    A 429 drains the shared bucket for the Retry-After period so that every
+    concurrent caller backs off instead of hammering the throttled API.
+    """
+    if status_code != 429:
+        return
+    try:
+        seconds = float(retry_after) if retry_after else DEFAULT_THROTTLE_SECONDS
+    except ValueError:
+        seconds = DEFAULT_THROTTLE_SECONDS
+    logger.warning(f"{upstream} throttled requests, backing off for {seconds:.0f}s")
+    get_limiter(upstream).throttle(seconds)
+
+
+configure_rate_limits()
@@ -2,47 +2,71 @@
 Smart nutrition lookup with fast cache + API fallback for comprehensive coverage.
 """
 
-import os
 import json
 import logging
 import asyncio
 from typing import Dict, Any, Optional, List
-import httpx
 from strands import tool
 
+from config import get_settings
+from deadline import get_deadline
+from .http_client import get_http_client
+from .nutrition_cache import SHARED_NUTRITION_CACHE
+from .nutrition_records import NutrientRecord, NutritionResult
+from .rate_limit import get_limiter, observe_response
+from .usda import extract_nutrients
+from .web_search import fetch_search_record, get_cached_search
+
 logger = logging.getLogger(__name__)
 
+# Minimum remaining request budget (seconds) worth spending on each upstream;
+# below it the lookup degrades to the local estimate
+USDA_MIN_BUDGET = 2.0
+WEB_SEARCH_MIN_BUDGET = 1.5
+
+# Query context used for nutrition-focused web searches
+WEB_SEARCH_CONTEXT = 'nutrition facts calories'
+
+# Nutrients a web result must yield (calories included) before it is cached
+WEB_NUTRIENTS_CACHE_MIN_FIELDS = 3
+
+# Longest time (seconds) to queue for a rate-limited upstream before falling back
+RATE_LIMIT_MAX_WAIT = 0.25
+
+# Query cache scope of this tool's USDA searches (top result only)
+USDA_QUERY_SCOPE = 'smart_nutrition'
+
 # Fast cache for common foods (per 100g) - same as before but smaller
 NUTRITION_CACHE = {
-    'pizza': {'calories': 266, 'protein': 11.0, 'fat': 10.4, 'carbs': 33.0, 'fiber': 2.3, 'sodium': 598},
-    'chicken': {'calories': 165, 'protein': 31.0, 'fat': 3.6, 'carbs': 0, 'fiber': 0, 'sodium': 74},
-    'rice': {'calories': 130, 'protein': 2.7, 'fat': 0.3, 'carbs': 28.0, 'fiber': 0.4, 'sodium': 1},
-    'beans': {'calories': 127, 'protein': 8.7, 'fat': 0.5, 'carbs': 23.0, 'fiber': 6.4, 'sodium': 2},
-    'black beans': {'calories': 132, 'protein': 8.9, 'fat': 0.5, 'carbs': 24.0, 'fiber': 8.7, 'sodium': 2},
-    'bread': {'calories': 265, 'protein': 9.0, 'fat': 3.2, 'carbs': 49.0, 'fiber': 2.7, 'sodium': 491},
-    'beef': {'calories': 250, 'protein': 26.0, 'fat': 15.0, 'carbs': 0, 'fiber': 0, 'sodium': 72},
-    'fish': {'calories': 206, 'protein': 22.0, 'fat': 12.0, 'carbs': 0, 'fiber': 0, 'sodium': 59},
-    'egg': {'calories': 155, 'protein': 13.0, 'fat': 11.0, 'carbs': 1.1, 'fiber': 0, 'sodium': 124},
-    'milk': {'calories': 42, 'protein': 3.4, 'fat': 1.0, 'carbs': 5.0, 'fiber': 0, 'sodium': 44},
+    'pizza': NutrientRecord(266, 11.0, 10.4, 33.0, 2.3, 598),
+    'chicken': NutrientRecord(165, 31.0, 3.6, 0, 0, 74),
+    'rice': NutrientRecord(130, 2.7, 0.3, 28.0, 0.4, 1),
+    'beans': NutrientRecord(127, 8.7, 0.5, 23.0, 6.4, 2),
+    'black beans': NutrientRecord(132, 8.9, 0.5, 24.0, 8.7, 2),
+    'bread': NutrientRecord(265, 9.0, 3.2, 49.0, 2.7, 491),
+    'beef': NutrientRecord(250, 26.0, 15.0, 0, 0, 72),
+    'fish': NutrientRecord(206, 22.0, 12.0, 0, 0, 59),
+    'egg': NutrientRecord(155, 13.0, 11.0, 1.1, 0, 124),
+    'milk': NutrientRecord(42, 3.4, 1.0, 5.0, 0, 44),
 }
 
 # Regional/cultural foods with basic info
 REGIONAL_FOODS = {
-    'amala': {'calories': 118, 'protein': 1.2, 'fat': 0.2, 'carbs': 27.0, 'fiber': 3.5, 'sodium': 5,
-              'description': 'Nigerian staple made from yam flour, rich in carbohydrates and fiber'},
-    'fufu': {'calories': 267, 'protein': 1.9, 'fat': 0.2, 'carbs': 65.0, 'fiber': 1.4, 'sodium': 15,
-             'description': 'West African staple made from cassava, high in carbohydrates'},
-    'jollof rice': {'calories': 150, 'protein': 3.5, 'fat': 2.0, 'carbs': 30.0, 'fiber': 1.0, 'sodium': 400,
-                    'description': 'Popular West African rice dish with tomatoes and spices'},
-    'plantain': {'calories': 122, 'protein': 1.3, 'fat': 0.4, 'carbs': 32.0, 'fiber': 2.3, 'sodium': 4,
-                 'description': 'Starchy fruit similar to banana, rich in potassium'},
-    'yam': {'calories': 118, 'protein': 1.5, 'fat': 0.2, 'carbs': 28.0, 'fiber': 4.1, 'sodium': 9,
-            'description': 'Root vegetable high in carbohydrates and fiber'},
+    'amala': NutrientRecord(118, 1.2, 0.2, 27.0, 3.5, 5,
+        description='Nigerian staple made from yam flour, rich in carbohydrates and fiber'),
+    'fufu': NutrientRecord(267, 1.9, 0.2, 65.0, 1.4, 15,
+        description='West African staple made from cassava, high in carbohydrates'),
+    'jollof rice': NutrientRecord(150, 3.5, 2.0, 30.0, 1.0, 400,
+        description='Popular West African rice dish with tomatoes and spices'),
+    'plantain': NutrientRecord(122, 1.3, 0.4, 32.0, 2.3, 4,
+        description='Starchy fruit similar to banana, rich in potassium'),
+    'yam': NutrientRecord(118, 1.5, 0.2, 28.0, 4.1, 9,
+        description='Root vegetable high in carbohydrates and fiber'),
 }
 
 
 @tool
-def smart_nutrition_lookup(food_name: str) -> Dict[str, Any]:
+async def smart_nutrition_lookup(food_name: str) -> Dict[str, Any]:
     """
     Smart nutrition lookup: fast cache first, then USDA API, then web search.
     
@@ -52,70 +76,64 @@ def smart_nutrition_lookup(food_name: str) -> Dict[str, Any]:
     Returns:
         Dict containing nutritional information from the best available source
     """
-    async def _async_lookup():
+    try:
+        food_key = food_name.lower().strip()
+        
+        # Step 1: Check fast cache for instant response
+        if food_key in NUTRITION_CACHE:
+            return NutritionResult(food_name, NUTRITION_CACHE[food_key], 'USDA Database (Cached)').to_response()
+        
+        # Step 2: Check regional foods
+        if food_key in REGIONAL_FOODS:
+            return NutritionResult(food_name, REGIONAL_FOODS[food_key], 'Nutritional Database').to_response()
+        
+        # Step 2b: Check foods already resolved by earlier requests
+        cached = SHARED_NUTRITION_CACHE.get(food_name)
+        if cached is not None:
+            nutrients, source = cached
+            return NutritionResult(food_name, nutrients, f'{source} (Cached)').to_response()
+        
+        # Step 3 & 4: Try both USDA API and web search in parallel for speed,
+        # each bounded by its share of the remaining request budget. Sources
+        # that cannot finish within the budget are skipped.
+        deadline = get_deadline()
+        lookups = []
+        if deadline.allows(USDA_MIN_BUDGET):
+            lookups.append(_try_usda_api(food_name, timeout=deadline.timeout(8.0, share=0.5)))
+        if deadline.allows(WEB_SEARCH_MIN_BUDGET):
+            lookups.append(_try_web_search(food_name, timeout=deadline.timeout(6.0, share=0.5)))
+        
+        if not lookups:
+            logger.info(f"Request budget too low for upstream lookups, estimating {food_name}")
+        
         try:
-            food_key = food_name.lower().strip()
-            
-            # Step 1: Check fast cache for instant response
-            if food_key in NUTRITION_CACHE:
-                nutrition = NUTRITION_CACHE[food_key]
-                return _format_nutrition_response(food_name, nutrition, 'USDA Database (Cached)')
-            
-            # Step 2: Check regional foods
-            if food_key in REGIONAL_FOODS:
-                nutrition = dict(REGIONAL_FOODS[food_key])  # Make a copy to avoid modifying original
-                description = nutrition.pop('description', '')
-                return _format_nutrition_response(food_name, nutrition, 'Nutritional Database', description)
-            
-            # Step 3 & 4: Try both USDA API and web search in parallel for speed
-            try:
-                usda_result, web_result = await asyncio.gather(
-                    _try_usda_api(food_name, timeout=8.0),
-                    _try_web_search(food_name, timeout=6.0),
-                    return_exceptions=True
-                )
+            # Results come back in order: USDA (more reliable) before web search;
+            # only the winning result is rendered
+            for result in await asyncio.gather(*lookups, return_exceptions=True):
+                if isinstance(result, NutritionResult):
+                    return result.to_response()
                 
-                # Check USDA result first (more reliable)
-                if isinstance(usda_result, dict) and usda_result.get('success'):
-                    return usda_result
-                
-                # Check web search result
-                if isinstance(web_result, dict) and web_result.get('success'):
-                    return web_result
-                    
-            except Exception as e:
-                logger.warning(f"Parallel lookup failed: {str(e)}")
-            
-            # Step 5: Generate intelligent estimate based on food category
-            return _generate_smart_estimate(food_name)
-            
         except Exception as e:
-            logger.error(f"Error in smart nutrition lookup: {str(e)}")
-            return _generate_smart_estimate(food_name)
-    
-    # Run async code synchronously
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # If there's already a running loop, create a new one in a thread
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, _async_lookup())
-                return future.result(timeout=15)
-        else:
-            return loop.run_until_complete(_async_lookup())
-    except RuntimeError:
-        # No event loop, create a new one
-        return asyncio.run(_async_lookup())
+            logger.warning(f"Parallel lookup failed: {str(e)}")
+        
+        # Step 5: Generate intelligent estimate based on food category
+        return _generate_smart_estimate(food_name)
+        
+    except Exception as e:
+        logger.error(f"Error in smart nutrition lookup: {str(e)}")
+        return _generate_smart_estimate(food_name)
 
 
-async def _try_usda_api(food_name: str, timeout: float = 8.0) -> Optional[Dict[str, Any]]:
+async def _try_usda_api(food_name: str, timeout: float = 8.0) -> Optional[NutritionResult]:
     """Try USDA API with fast timeout."""
     try:
-        usda_api_key = os.environ.get('USDA_API_KEY')
+        usda_api_key = get_settings().usda_api_key
         if not usda_api_key:
             return None
         
+        if not await get_limiter('usda').acquire(max_wait=RATE_LIMIT_MAX_WAIT):
+            return None
+        
         url = "https://api.nal.usda.gov/fdc/v1/foods/search"
         params = {
             'query': food_name,
@@ -124,18 +142,23 @@ async def _try_usda_api(food_name: str, timeout: float = 8.0) -> Optional[Dict[s
             'dataType': ['Foundation', 'SR Legacy']
         }
         
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.get(url, params=params)
+        client = get_http_client()
+        response = await client.get(url, params=params, timeout=timeout)
+        observe_response('usda', response.status_code, response.headers.get('Retry-After'))
+        
+        if response.status_code == 200:
+            data = response.json()
+            foods = data.get('foods', [])
             
-            if response.status_code == 200:
-                data = response.json()
-                foods = data.get('foods', [])
-                
-                if foods:
-                    food_data = foods[0]
-                    nutrients = _extract_usda_nutrients(food_data)
-                    if nutrients:
-                        return _format_nutrition_response(food_name, nutrients, 'USDA FoodData Central')
+            if foods:
+                food_data = foods[0]
+                nutrients = _extract_usda_nutrients(food_data)
+                if not nutrients.is_empty():
+                    SHARED_NUTRITION_CACHE.put(food_name, nutrients, 'USDA FoodData Central')
+                    if food_data.get('fdcId') is not None:
+                        SHARED_NUTRITION_CACHE.put_fdc(food_data['fdcId'], nutrients)
+                        SHARED_NUTRITION_CACHE.put_query(food_name, [food_data['fdcId']], scope=USDA_QUERY_SCOPE)
+                    return NutritionResult(food_name, nutrients, 'USDA FoodData Central')
         
         return None
         
@@ -144,43 +167,32 @@ async def _try_usda_api(food_name: str, timeout: float = 8.0) -> Optional[Dict[s
         return None
 
 
-async def _try_web_search(food_name: str, timeout: float = 6.0) -> Optional[Dict[str, Any]]:
-    """Try web search with fast timeout."""
+async def _try_web_search(food_name: str, timeout: float = 6.0) -> Optional[NutritionResult]:
+    """Try web search with fast timeout, reusing cached search records."""
     try:
-        # Use DuckDuckGo Instant Answer API
-        url = "https://api.duckduckgo.com/"
-        params = {
-            'q': f"{food_name} nutrition facts calories",
-            'format': 'json',
-            'no_html': '1',
-            'skip_disambig': '1'
-        }
+        record = get_cached_search(food_name, WEB_SEARCH_CONTEXT)
+        if record is None:
+            if not await get_limiter('duckduckgo').acquire(max_wait=RATE_LIMIT_MAX_WAIT):
+                return None
+            record = await fetch_search_record(food_name, WEB_SEARCH_CONTEXT, timeout=timeout)
         
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.get(url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Extract any useful information
-                info_sources = [
-                    data.get('Abstract', ''),
-                    data.get('Answer', ''),
-                    data.get('Definition', '')
-                ]
-                
-                combined_info = ' '.join([info for info in info_sources if info]).strip()
-                
-                if combined_info and len(combined_info) > 20:
-                    # Try to extract numbers from the text
-                    estimated_nutrition = _extract_nutrition_from_text(combined_info)
-                    return {
-                        'food_name': food_name,
-                        'nutritional_info': f"Based on available information: {combined_info[:200]}...",
-                        'raw_nutrients': estimated_nutrition,
-                        'source': 'Web Search',
-                        'success': True
-                    }
+        if record is None:
+            return None
+        
+        # Structured per-100g values good enough to answer from later
+        nutrients = record.nutrients
+        if nutrients.calories is not None and len(nutrients.as_dict()) >= WEB_NUTRIENTS_CACHE_MIN_FIELDS:
+            SHARED_NUTRITION_CACHE.put(food_name, nutrients, 'Web Search')
+        
+        # Extract any useful information
+        combined_info = record.summary()
+        if combined_info and len(combined_info) > 20:
+            return NutritionResult(
+                food_name,
+                record.nutrients,
+                'Web Search',
+                summary=f"Based on available information: {combined_info[:200]}..."
+            )
         
         return None
         
@@ -189,47 +201,9 @@ async def _try_web_search(food_name: str, timeout: float = 6.0) -> Optional[Dict
         return None
 
 
-def _extract_usda_nutrients(food_data: Dict) -> Dict[str, float]:
+def _extract_usda_nutrients(food_data: Dict) -> NutrientRecord:
     """Extract key nutrients from USDA food data."""
-    nutrients = {}
-    nutrient_map = {
-        'Energy': 'calories',
-        'Protein': 'protein',
-        'Total lipid (fat)': 'fat',
-        'Carbohydrate, by difference': 'carbs',
-        'Fiber, total dietary': 'fiber',
-        'Sodium, Na': 'sodium'
-    }
-    
-    for nutrient in food_data.get('foodNutrients', []):
-        nutrient_name = nutrient.get('nutrientName', '')
-        nutrient_value = nutrient.get('value', 0)
-        
-        for usda_name, simple_name in nutrient_map.items():
-            if usda_name.lower() in nutrient_name.lower():
-                nutrients[simple_name] = nutrient_value
-                break
-    
-    return nutrients
-
-
-def _extract_nutrition_from_text(text: str) -> Dict[str, float]:
-    """Try to extract nutrition numbers from text."""
-    import re
-    
-    nutrition = {}
-    
-    # Look for calorie patterns
-    calorie_match = re.search(r'(\d+)\s*(?:calories|kcal|cal)', text.lower())
-    if calorie_match:
-        nutrition['calories'] = float(calorie_match.group(1))
-    
-    # Look for protein patterns
-    protein_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:g|grams?)\s*(?:of\s+)?protein', text.lower())
-    if protein_match:
-        nutrition['protein'] = float(protein_match.group(1))
-    
-    return nutrition
+    return extract_nutrients(food_data)
 
 
 def _generate_smart_estimate(food_name: str) -> Dict[str, Any]:
@@ -238,62 +212,33 @@ def _generate_smart_estimate(food_name: str) -> Dict[str, Any]:
     
     # Analyze food name for clues
     if any(grain in food_lower for grain in ['rice', 'bread', 'pasta', 'wheat', 'oats', 'quinoa', 'cereal', 'flour']):
-        nutrition = {'calories': 150, 'protein': 4.0, 'fat': 1.0, 'carbs': 30.0, 'fiber': 2.0, 'sodium': 5}
+        nutrition = NutrientRecord(150, 4.0, 1.0, 30.0, 2.0, 5)
         category = "grain/carbohydrate"
         
     elif any(protein in food_lower for protein in ['chicken', 'beef', 'fish', 'turkey', 'pork', 'meat', 'salmon', 'tuna']):
-        nutrition = {'calories': 200, 'protein': 25.0, 'fat': 10.0, 'carbs': 0, 'fiber': 0, 'sodium': 70}
+        nutrition = NutrientRecord(200, 25.0, 10.0, 0, 0, 70)
         category = "protein/meat"
         
     elif any(legume in food_lower for legume in ['beans', 'lentils', 'chickpeas', 'peas', 'legume']):
-        nutrition = {'calories': 130, 'protein': 9.0, 'fat': 0.5, 'carbs': 23.0, 'fiber': 7.0, 'sodium': 2}
+        nutrition = NutrientRecord(130, 9.0, 0.5, 23.0, 7.0, 2)
         category = "legume/plant protein"
         
     elif any(veg in food_lower for veg in ['vegetable', 'broccoli', 'spinach', 'carrot', 'tomato', 'lettuce', 'cabbage']):
-        nutrition = {'calories': 25, 'protein': 2.0, 'fat': 0.2, 'carbs': 5.0, 'fiber': 2.0, 'sodium': 20}
+        nutrition = NutrientRecord(25, 2.0, 0.2, 5.0, 2.0, 20)
         category = "vegetable"
         
     elif any(fruit in food_lower for fruit in ['apple', 'banana', 'orange', 'berry', 'fruit', 'mango', 'grape']):
-        nutrition = {'calories': 60, 'protein': 0.5, 'fat': 0.2, 'carbs': 15.0, 'fiber': 2.5, 'sodium': 1}
+        nutrition = NutrientRecord(60, 0.5, 0.2, 15.0, 2.5, 1)
         category = "fruit"
         
     elif any(dairy in food_lower for dairy in ['milk', 'cheese', 'yogurt', 'dairy']):
-        nutrition = {'calories': 80, 'protein': 6.0, 'fat': 4.0, 'carbs': 6.0, 'fiber': 0, 'sodium': 100}
+        nutrition = NutrientRecord(80, 6.0, 4.0, 6.0, 0, 100)
         category = "dairy"
         
     else:
-        nutrition = {'calories': 100, 'protein': 3.0, 'fat': 2.0, 'carbs': 15.0, 'fiber': 2.0, 'sodium': 50}
+        nutrition = NutrientRecord(100, 3.0, 2.0, 15.0, 2.0, 50)
         category = "mixed food"
     
     info = f"{food_name} appears to be a {category}. Based on similar foods, here's the estimated nutritional profile per 100g. For specific dietary needs, please verify with restaurant staff or nutrition labels."
     
-    return _format_nutrition_response(food_name, nutrition, 'Estimated (Smart Analysis)', info)
-
-
-def _format_nutrition_response(food_name: str, nutrition: Dict[str, Any], source: str, description: str = "") -> Dict[str, Any]:
-    """Format nutrition data into a readable response."""
-    
-    nutrition_text = f"Nutritional information for {food_name} (per 100g):\n"
-    
-    if description:
-        nutrition_text += f"{description}\n\n"
-    
-    nutrition_text += f"• Calories: {nutrition.get('calories', 'N/A')}\n"
-    nutrition_text += f"• Protein: {nutrition.get('protein', 'N/A')}g\n"
-    nutrition_text += f"• Fat: {nutrition.get('fat', 'N/A')}g\n"
-    nutrition_text += f"• Carbohydrates: {nutrition.get('carbs', 'N/A')}g\n"
-    
-    if nutrition.get('fiber'):
-        nutrition_text += f"• Fiber: {nutrition['fiber']}g\n"
-    if nutrition.get('sodium'):
-        nutrition_text += f"• Sodium: {nutrition['sodium']}mg\n"
-    
-    return {
-        'food_name': food_name,
-        'nutritional_info': nutrition_text.strip(),
-        'raw_nutrients': nutrition,
-        'source': source,
-        'success': True
-    }
-
-
+    return NutritionResult(food_name, nutrition, 'Estimated (Smart Analysis)', info).to_response()
@@ -0,0 +1,273 @@
+"""
+USDA FoodData Central response parsing and batch fetching.
+
+Nutrients are matched by their FoodData Central nutrient ID through a
+precomputed lookup table, and a page of foods is parsed into a single
+nutrient matrix in one pass so that ranking several results or filling a
+cache from them does not need any per-field string matching.
+"""
+
+import asyncio
+import logging
+import math
+from array import array
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from config import USDA_API_BASE_URL
+from .http_client import get_http_client
+from .nutrition_cache import SHARED_NUTRITION_CACHE, NutritionCache
+from .nutrition_records import NutrientRecord
+from .rate_limit import get_limiter, observe_response
+
+logger = logging.getLogger(__name__)
+
+# FoodData Central accepts at most 20 FDC IDs per /foods request
+FOODS_BATCH_SIZE = 20
+
+# Concurrent /foods requests per fetch
+MAX_BATCH_CONCURRENCY = 4
+
+# Longest time (seconds) a batch queues for a USDA rate-limit token
+MAX_QUEUE_WAIT = 5.0
+
+# Matrix columns, in NutrientRecord field order
+NUTRIENT_FIELDS = ('calories', 'protein', 'fat', 'carbs', 'fiber', 'sodium', 'sugars', 'calcium', 'iron')
+
+# FoodData Central nutrient ID -> (column, is_fallback). Fallback IDs only
+# fill a column the primary ID left empty (e.g. Foundation foods report
+# energy as Atwater factors instead of nutrient 1008).
+_NUTRIENT_ID_COLUMNS = {
+    1008: ('calories', False),  # Energy (kcal)
+    2047: ('calories', True),   # Energy (Atwater General Factors), kcal
+    2048: ('calories', True),   # Energy (Atwater Specific Factors), kcal
+    1003: ('protein', False),   # Protein
+    1004: ('fat', False),       # Total lipid (fat)
+    1005: ('carbs', False),     # Carbohydrate, by difference
+    1050: ('carbs', True),      # Carbohydrate, by summation
+    1079: ('fiber', False),     # Fiber, total dietary
+    2000: ('sugars', False),    # Sugars, total including NLEA
+    1063: ('sugars', True),     # Sugars, Total
+    1093: ('sodium', False),    # Sodium, Na
+    1087: ('calcium', False),   # Calcium, Ca
+    1089: ('iron', False),      # Iron, Fe
+}
+
+# Legacy SR nutrient numbers used by the abridged /foods format
+_NUTRIENT_NUMBER_IDS = {
+    '208': 1008, '957': 2047, '958': 2048, '203': 1003, '204': 1004, '205': 1005,
+    '205.2': 1050, '291': 1079, '269': 2000, '269.3': 1063, '307': 1093, '301': 1087, '303': 1089,
+}
+
+# Nutrient ID -> (column index, is_fallback), resolved once at import
+NUTRIENT_ID_INDEX = {
+    nutrient_id: (NUTRIENT_FIELDS.index(field), is_fallback)
+    for nutrient_id, (field, is_fallback) in _NUTRIENT_ID_COLUMNS.items()
+}
+
+_WIDTH = len(NUTRIENT_FIELDS)
+_MISSING = math.nan
+
+
+def _nutrient_id_and_value(nutrient: Dict[str, Any]) -> Tuple[Optional[int], Any]:
+    """Read the nutrient ID and amount from any FoodData Central nutrient shape."""
+    # /foods/search: {"nutrientId": 1003, "value": 3.2}
+    nutrient_id = nutrient.get('nutrientId')
+    if nutrient_id is not None:
+        return nutrient_id, nutrient.get('value')
+
+    # /food(s) full format: {"nutrient": {"id": 1003}, "amount": 3.2}
+    nested = nutrient.get('nutrient')
+    if isinstance(nested, dict):
+        return nested.get('id'), nutrient.get('amount')
+
+    # /food(s) abridged format: {"number": "203", "amount": 3.2}
+    return _NUTRIENT_NUMBER_IDS.get(str(nutrient.get('number'))), nutrient.get('amount')
+
+
+class NutrientMatrix:
+    """Nutrient values for a page of foods, one row per food."""
+
+    __slots__ = ('fdc_ids', 'descriptions', 'values')
+
+    def __init__(self, fdc_ids: List[Optional[int]], descriptions: List[str], values: array):
+        self.fdc_ids = fdc_ids
+        self.descriptions = descriptions
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.fdc_ids)
+
+    def row(self, index: int) -> array:
+        """Raw values of one food (NaN marks a missing nutrient)."""
+        return self.values[index * _WIDTH:(index + 1) * _WIDTH]
+
+    def completeness(self, index: int) -> int:
+        """Number of known nutrients for one food."""
+        return sum(1 for value in self.row(index) if not math.isnan(value))
+
+    def best_index(self) -> int:
+        """Index of the most complete food; earlier (better ranked) results win ties."""
+        return max(range(len(self)), key=lambda index: (self.completeness(index), -index))
+
+    def record(self, index: int) -> NutrientRecord:
+        """Build a NutrientRecord for one food."""
+        return NutrientRecord(*(None if math.isnan(value) else value for value in self.row(index)))
+
+    def records(self) -> Iterable[Tuple[Optional[int], str, NutrientRecord]]:
+        """Yield (fdc_id, description, record) for every food."""
+        for index in range(len(self)):
+            yield self.fdc_ids[index], self.descriptions[index], self.record(index)
+
+
+def parse_foods(foods: List[Dict[str, Any]]) -> NutrientMatrix:
+    """
+    Parse a list of FoodData Central foods into a nutrient matrix.
+
+    Args:
+        foods: Foods from a /foods/search page or a /foods batch response
+
+    Returns:
+        NutrientMatrix with one row per food
+    """
+    values = array('d', [_MISSING]) * (len(foods) * _WIDTH)
+    fdc_ids = []
+    descriptions = []
+
+    for row, food in enumerate(foods):
+        fdc_ids.append(food.get('fdcId'))
+        descriptions.append(food.get('description', ''))
+        offset = row * _WIDTH
+
+        for nutrient in food.get('foodNutrients', []):
+            nutrient_id, amount = _nutrient_id_and_value(nutrient)
+            column = NUTRIENT_ID_INDEX.get(nutrient_id)
+            if column is None or amount is None:
+                continue
+
+            index, is_fallback = column
+            if is_fallback and not math.isnan(values[offset + index]):
+                continue
+            values[offset + index] = amount
+
+    return NutrientMatrix(fdc_ids, descriptions, values)
+
+
+def extract_nutrients(food: Dict[str, Any]) -> NutrientRecord:
+    """Extract the key nutrients of a single FoodData Central food."""
+    return parse_foods([food]).record(0)
+
+
+# Nutrient numbers requested from /foods so responses only carry what we parse
+_REQUESTED_NUTRIENT_NUMBERS = [int(number) for number in _NUTRIENT_NUMBER_IDS if number.isdigit()]
+
+
+class USDABatchFetcher:
+    """
+    Fetch nutrient records for many FDC IDs through the /foods batch endpoint.
+
+    Pending IDs are de-duplicated against the shared nutrition cache, grouped
+    into batches of FOODS_BATCH_SIZE and requested with bounded concurrency.
+    Every request takes a token from the shared USDA rate limiter; a throttled
+    batch is retried once after Retry-After when that is short. The fetcher
+    also tracks the X-RateLimit-Remaining header and stops issuing requests
+    once the key's hourly quota is exhausted instead of hammering the API.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = USDA_API_BASE_URL,
+        max_concurrency: int = MAX_BATCH_CONCURRENCY,
+        cache: NutritionCache = SHARED_NUTRITION_CACHE,
+        max_queue_wait: float = MAX_QUEUE_WAIT
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.max_queue_wait = max_queue_wait
+        self.rate_limit_remaining: Optional[int] = None
+
+    def _quota_exhausted(self) -> bool:
+        return self.rate_limit_remaining is not None and self.rate_limit_remaining <= 0
+
+    async def fetch(self, fdc_ids: Iterable[int], timeout: float = 10.0) -> Dict[int, NutrientRecord]:
+        """
+        Resolve nutrient records for FDC IDs, filling the shared cache.
+
+        Args:
+            fdc_ids: FDC IDs to resolve (duplicates are ignored)
+            timeout: Per-request timeout in seconds
+
+        Returns:
+            Dict mapping each resolved FDC ID to its nutrient record
+        """
+        fdc_ids = list(dict.fromkeys(fdc_ids))
+        pending = self.cache.missing_fdc_ids(fdc_ids)
+        batches = [pending[i:i + FOODS_BATCH_SIZE] for i in range(0, len(pending), FOODS_BATCH_SIZE)]
+
+        if batches:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            client = get_http_client()
+            await asyncio.gather(*(self._fetch_batch(client, semaphore, batch, timeout) for batch in batches))
+
+        records = {}
+        for fdc_id in fdc_ids:
+            record = self.cache.get_fdc(fdc_id)
+            if record is not None:
+                records[fdc_id] = record
+        return records
+
+    async def _fetch_batch(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, batch: List[int],
+                           timeout: float) -> None:
+        async with semaphore:
+            for attempt in range(2):
+                if self._quota_exhausted():
+                    logger.warning(f"USDA rate limit exhausted, skipping batch of {len(batch)} foods")
+                    return
+
+                if not await get_limiter('usda').acquire(max_wait=self.max_queue_wait):
+                    return
+
+                try:
+                    response = await client.post(
+                        f"{self.base_url}/foods",
+                        params={'api_key': self.api_key},
+                        json={
+                            'fdcIds': batch,
+                            'format': 'abridged',
+                            'nutrients': _REQUESTED_NUTRIENT_NUMBERS
+                        },
+                        timeout=timeout
+                    )
+                except httpx.HTTPError as e:
+                    logger.warning(f"USDA batch request failed: {str(e)}")
+                    return
+
+                observe_response('usda', response.status_code, response.headers.get('Retry-After'))
+                remaining = response.headers.get('X-RateLimit-Remaining')
+                if remaining is not None and remaining.isdigit():
+                    self.rate_limit_remaining = int(remaining)
+
+                if response.status_code == 429:
+                    # The limiter now holds callers back for Retry-After;
+                    # retry once if that fits within the queueing limit
+                    logger.warning("USDA batch request throttled")
+                    continue
+
+                if response.status_code != 200:
+                    logger.warning(f"USDA batch request failed with status {response.status_code}")
+                    return
+
+                self._store(response.json())
+                return
+
+    def _store(self, foods: List[Dict[str, Any]]) -> None:
+        """Parse a /foods response and fill the cache by FDC ID."""
+        for fdc_id, description, record in parse_foods(foods).records():
+            if fdc_id is not None:
+                self.cache.put_fdc(fdc_id, replace(record, description=description))
+
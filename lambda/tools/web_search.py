@@ -1,16 +1,209 @@
 """
 Tool for web search to find information about food items when other sources fail.
+
+DuckDuckGo responses are parsed once into structured search records, with
+nutrition numbers and key facts pre-extracted, and cached per normalized food
+name and query context. Repeat lookups are served locally and the text shown
+to the agent is only rendered when a record is actually returned.
 """
 
 import os
 import json
 import logging
-from typing import Dict, Any, Optional
-import httpx
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from strands import tool
 
+from deadline import get_deadline
+from .http_client import get_http_client
+from .nutrition_cache import normalize_food_name
+from .nutrition_records import NutrientRecord
+from .nutrition_text import extract_nutrition_from_text
+from .rate_limit import get_limiter, observe_response
+
 logger = logging.getLogger(__name__)
 
+# Minimum remaining request budget (seconds) worth spending on a web search
+WEB_SEARCH_MIN_BUDGET = 1.5
+
+# Longest time (seconds) to queue for a DuckDuckGo token before giving up
+RATE_LIMIT_MAX_WAIT = 1.0
+
+# How long cached search records stay fresh (seconds); empty results are
+# retried sooner in case the upstream was having a bad moment
+SEARCH_CACHE_TTL = 24 * 3600
+EMPTY_SEARCH_CACHE_TTL = 3600
+MAX_SEARCH_CACHE_ENTRIES = 2000
+
+
+@dataclass(frozen=True, slots=True)
+class WebSearchRecord:
+    """Structured content of one DuckDuckGo Instant Answer response."""
+
+    food_name: str
+    query: str
+    answer: str = ''
+    abstract: str = ''
+    definition: str = ''
+    related: Tuple[str, ...] = ()
+    facts: Tuple[Tuple[str, str], ...] = ()
+    nutrients: NutrientRecord = NutrientRecord()
+    fetched_at: float = 0.0
+
+    @classmethod
+    def from_response(cls, food_name: str, query: str, data: Dict[str, Any]) -> 'WebSearchRecord':
+        """Parse a DuckDuckGo Instant Answer JSON response."""
+        related = tuple(
+            topic['Text'] for topic in (data.get('RelatedTopics') or [])[:3]  # Limit to first 3
+            if isinstance(topic, dict) and topic.get('Text')
+        )
+        
+        # Infobox data (often contains nutritional info)
+        infobox = data.get('Infobox') or {}
+        facts = tuple(
+            (str(item['label']), str(item['value'])) for item in (infobox.get('content') or [])[:5]  # Limit to first 5
+            if isinstance(item, dict) and item.get('label') and item.get('value')
+        )
+        
+        answer = str(data.get('Answer') or '')
+        abstract = str(data.get('Abstract') or '')
+        definition = str(data.get('Definition') or '')
+        text = ' '.join([answer, abstract, definition] + [f"{label}: {value}" for label, value in facts])
+        
+        return cls(
+            food_name=food_name,
+            query=query,
+            answer=answer,
+            abstract=abstract,
+            definition=definition,
+            related=related,
+            facts=facts,
+            nutrients=NutrientRecord.from_mapping(extract_nutrition_from_text(text)),
+            fetched_at=time.time()
+        )
+
+    def has_content(self) -> bool:
+        """Whether the response carried any usable information."""
+        return bool(self.answer or self.abstract or self.definition or self.related or self.facts)
+
+    def summary(self) -> str:
+        """Primary text of the result (answer, abstract and definition)."""
+        return ' '.join(info for info in [self.abstract, self.answer, self.definition] if info).strip()
+
+
+@lru_cache(maxsize=256)
+def render_search_results(record: WebSearchRecord) -> str:
+    """Render a search record into the text block returned to the agent."""
+    sections = []
+    
+    # Primary sources of information
+    if record.answer:
+        sections.append(record.answer)
+    if record.abstract:
+        sections.append(record.abstract)
+    if record.definition:
+        sections.append(f"Definition: {record.definition}")
+    
+    # Related topics and results
+    if record.related:
+        sections.append("Additional Information:\n" + "\n".join(f"• {info}" for info in record.related))
+    
+    if record.facts:
+        sections.append("Key Facts:\n" + "\n".join(f"• {label}: {value}" for label, value in record.facts))
+    
+    return "\n\n".join(sections)
+
+
+_search_cache: 'OrderedDict[Tuple[str, str], WebSearchRecord]' = OrderedDict()
+
+
+def get_cached_search(food_name: str, query_context: str = "") -> Optional[WebSearchRecord]:
+    """
+    Return a fresh cached search record, if any.
+    
+    Args:
+        food_name: Name of the food item
+        query_context: Query context the record was fetched with
+        
+    Returns:
+        Cached WebSearchRecord or None
+    """
+    key = (normalize_food_name(food_name), normalize_food_name(query_context))
+    record = _search_cache.get(key)
+    if record is None:
+        return None
+    
+    ttl = SEARCH_CACHE_TTL if record.has_content() else EMPTY_SEARCH_CACHE_TTL
+    if time.time() - record.fetched_at > ttl:
+        del _search_cache[key]
+        return None
+    
+    _search_cache.move_to_end(key)
+    return record
+
+
+def clear_search_cache() -> None:
+    """Drop every cached search record."""
+    _search_cache.clear()
+
+
+def build_search_query(food_name: str, query_context: str = "") -> str:
+    """Build the DuckDuckGo query for a food and optional context."""
+    if query_context:
+        return f"{food_name} {query_context}"
+    return f"{food_name} food information nutrition facts"
+
+
+async def fetch_search_record(food_name: str, query_context: str = "", timeout: float = 15.0) -> Optional[WebSearchRecord]:
+    """
+    Query DuckDuckGo and cache the parsed record.
+    
+    Callers are expected to have checked the cache and taken a rate-limit token.
+    
+    Args:
+        food_name: Name of the food item
+        query_context: Additional context for the search
+        timeout: Request timeout in seconds
+        
+    Returns:
+        Parsed WebSearchRecord, or None when the request failed
+    """
+    search_query = build_search_query(food_name, query_context)
+    logger.debug("Searching for: %s", search_query)
+    
+    # Use DuckDuckGo Instant Answer API (no API key required)
+    url = "https://api.duckduckgo.com/"
+    params = {
+        'q': search_query,
+        'format': 'json',
+        'no_html': '1',
+        'skip_disambig': '1'
+    }
+    
+    client = get_http_client()
+    response = await client.get(url, params=params, timeout=timeout)
+    observe_response('duckduckgo', response.status_code, response.headers.get('Retry-After'))
+    
+    if response.status_code != 200:
+        logger.warning(f"DuckDuckGo request failed with status {response.status_code}")
+        return None
+    
+    data = response.json()
+    logger.debug("DuckDuckGo response keys: %s", data.keys())
+    
+    record = WebSearchRecord.from_response(food_name, search_query, data)
+    
+    key = (normalize_food_name(food_name), normalize_food_name(query_context))
+    _search_cache[key] = record
+    _search_cache.move_to_end(key)
+    if len(_search_cache) > MAX_SEARCH_CACHE_ENTRIES:
+        _search_cache.popitem(last=False)
+    
+    return record
+
 
 @tool
 async def web_search_food_info(food_name: str, query_context: str = "") -> Dict[str, Any]:
@@ -25,71 +218,48 @@ async def web_search_food_info(food_name: str, query_context: str = "") -> Dict[
         Dict containing search results and food information
     """
     try:
-        # Build search query based on context
-        if query_context:
-            search_query = f"{food_name} {query_context}"
-        else:
-            search_query = f"{food_name} food information nutrition facts"
+        search_query = build_search_query(food_name, query_context)
         
-        logger.info(f"Searching for: {search_query}")
+        # Serve repeat lookups from the local cache
+        record = get_cached_search(food_name, query_context)
+        cached = record is not None
         
-        # Use DuckDuckGo Instant Answer API (no API key required)
-        url = "https://api.duckduckgo.com/"
-        params = {
-            'q': search_query,
-            'format': 'json',
-            'no_html': '1',
-            'skip_disambig': '1'
-        }
-        
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(url, params=params)
+        if record is None:
+            deadline = get_deadline()
+            if not deadline.allows(WEB_SEARCH_MIN_BUDGET):
+                logger.info(f"Request budget too low for web search on {food_name}")
+                return {
+                    'food_name': food_name,
+                    'search_results': f"I don't have time to search for more details about {food_name} right now.",
+                    'source': 'Search skipped - request budget exhausted',
+                    'success': False,
+                    'query_used': search_query
+                }
+            
+            if not await get_limiter('duckduckgo').acquire(max_wait=RATE_LIMIT_MAX_WAIT):
+                return {
+                    'food_name': food_name,
+                    'search_results': f"Web search is busy right now, so I couldn't look up more details about {food_name}.",
+                    'source': 'Search skipped - rate limited',
+                    'success': False,
+                    'query_used': search_query
+                }
             
-            if response.status_code == 200:
-                data = response.json()
-                logger.info(f"DuckDuckGo response keys: {list(data.keys())}")
-                
-                # Extract all available information
-                search_info = ""
-                
-                # Primary sources of information
-                if data.get('Answer'):
-                    search_info += f"{data['Answer']}\n\n"
-                
-                if data.get('Abstract'):
-                    search_info += f"{data['Abstract']}\n\n"
-                
-                if data.get('Definition'):
-                    search_info += f"Definition: {data['Definition']}\n\n"
-                
-                # Related topics and results
-                if data.get('RelatedTopics'):
-                    related_info = []
-                    for topic in data['RelatedTopics'][:3]:  # Limit to first 3
-                        if isinstance(topic, dict) and topic.get('Text'):
-                            related_info.append(topic['Text'])
-                    
-                    if related_info:
-                        search_info += "Additional Information:\n" + "\n".join(f"• {info}" for info in related_info) + "\n\n"
-                
-                # Infobox data (often contains nutritional info)
-                if data.get('Infobox') and data['Infobox'].get('content'):
-                    infobox_items = []
-                    for item in data['Infobox']['content'][:5]:  # Limit to first 5 items
-                        if item.get('label') and item.get('value'):
-                            infobox_items.append(f"{item['label']}: {item['value']}")
-                    
-                    if infobox_items:
-                        search_info += "Key Facts:\n" + "\n".join(f"• {item}" for item in infobox_items) + "\n\n"
-                
-                if search_info.strip():
-                    return {
-                        'food_name': food_name,
-                        'search_results': search_info.strip(),
-                        'source': 'DuckDuckGo Search API',
-                        'success': True,
-                        'query_used': search_query
-                    }
+            record = await fetch_search_record(food_name, query_context, timeout=deadline.timeout(15.0, share=0.5))
+        
+        if record is not None and record.has_content():
+            result = {
+                'food_name': food_name,
+                'search_results': render_search_results(record),
+                'source': 'DuckDuckGo Search API (Cached)' if cached else 'DuckDuckGo Search API',
+                'success': True,
+                'query_used': record.query
+            }
+            if record.facts:
+                result['key_facts'] = dict(record.facts)
+            if not record.nutrients.is_empty():
+                result['raw_nutrients'] = record.nutrients.as_dict()
+            return result
         
         # If DuckDuckGo doesn't return useful info, indicate search was attempted but no results
         logger.warning(f"No useful information found for {food_name}")
@@ -0,0 +1,234 @@
+"""
+Voice post-processing for Food Lens Strands Agent responses.
+
+Responses are spoken by a text-to-speech service, so before they leave the
+Lambda they are normalized deterministically: markdown, bullets and emoji are
+dropped, unit abbreviations and symbols are spelled out, and the text is split
+into sentence-sized chunks that can be synthesized incrementally. Fixed
+phrases (disclaimers, templates) are rendered once and tagged with a phrase ID
+so their audio can be cached downstream.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from tools.dietary_advice import MEDICAL_DISCLAIMER
+
+# Longest chunk handed to TTS in one piece
+MAX_CHUNK_CHARS = 250
+
+# Fixed phrases, by phrase ID
+PHRASES: Dict[str, str] = {
+    'medical_disclaimer': MEDICAL_DISCLAIMER,
+    'partial_intro': "Here's what I found so far.",
+    'empty_response': (
+        "I apologize, but I'm having trouble processing your request right now. Please try rephrasing "
+        "your question, and I'll do my best to help you with nutritional information or menu guidance."
+    ),
+}
+
+_EMOJI = re.compile('[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\uFE0F\u200D]')
+_MARKUP = re.compile(r'\*\*|__|`|^#+\s*', re.MULTILINE)
+_LIST_MARKER = re.compile(r'^\s*(?:[•\-*‣▪●]|\d+[.)])\s+', re.MULTILINE)
+_INLINE_BULLET = re.compile(r'\s*[•‣▪●]\s*')
+
+_ABBREVIATIONS = [
+    (re.compile(r'\be\.g\.', re.IGNORECASE), 'for example'),
+    (re.compile(r'\bi\.e\.', re.IGNORECASE), 'that is'),
+    (re.compile(r'\bvs\.?(?=\s)', re.IGNORECASE), 'versus'),
+    (re.compile(r'\bapprox\.', re.IGNORECASE), 'approximately'),
+    (re.compile(r'\betc\.'), 'and so on.'),
+]
+
+_MONEY = re.compile(r'([$₦£€])\s?(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d{2}))?\b')
+_CURRENCY_NAMES = {
+    '$': (('dollar', 'dollars'), ('cent', 'cents')),
+    '₦': (('naira', 'naira'), ('kobo', 'kobo')),
+    '£': (('pound', 'pounds'), ('penny', 'pence')),
+    '€': (('euro', 'euros'), ('cent', 'cents')),
+}
+
+_NUMBER = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+_UNITS = r'kcal|kj|mg|mcg|µg|kg|g|oz|lbs?|ml|cal'
+_UNIT = re.compile(rf'(?<![\w.])({_NUMBER})\s?({_UNITS})\b', re.IGNORECASE)
+
+# Ranges and "per" are only rewritten in unit context, so that phone numbers,
+# dates and "and/or" are left alone: a range needs a unit or percent sign
+# after it ("10-15 g", "5-10%"); "/" needs a unit before it and a unit or
+# portion after it ("g/100g", "mg/serving", "kcal/day")
+_RANGE = re.compile(
+    rf'(?<![\d.,/-])({_NUMBER})\s?[-–]\s?({_NUMBER})(?![\d/-])'
+    rf'(?=\s?(?:(?:{_UNITS}|calories|grams|milligrams|servings|minutes|hours|percent)\b|%|°))',
+    re.IGNORECASE
+)
+_PER = re.compile(
+    rf'((?:{_NUMBER})\s?(?:{_UNITS})|\b(?:{_UNITS}))\s*/\s*'
+    rf'(?=(?:\d+\s?)?(?:{_UNITS}|servings?|portions?|day|week|cup|piece|slice|plate|bowl|meal)\b)',
+    re.IGNORECASE
+)
+_UNIT_NAMES = {
+    'kcal': ('calorie', 'calories'),
+    'cal': ('calorie', 'calories'),
+    'kj': ('kilojoule', 'kilojoules'),
+    'mg': ('milligram', 'milligrams'),
+    'mcg': ('microgram', 'micrograms'),
+    'µg': ('microgram', 'micrograms'),
+    'kg': ('kilogram', 'kilograms'),
+    'g': ('gram', 'grams'),
+    'oz': ('ounce', 'ounces'),
+    'lb': ('pound', 'pounds'),
+    'lbs': ('pound', 'pounds'),
+    'ml': ('milliliter', 'milliliters'),
+}
+_SYMBOLS = [
+    (re.compile(r'(?<=\d)\s?%'), ' percent'),
+    (re.compile(r'\s?°\s?C\b'), ' degrees Celsius'),
+    (re.compile(r'\s?°\s?F\b'), ' degrees Fahrenheit'),
+    (re.compile(r'\s*&\s*'), ' and '),
+    (re.compile(r'[~≈]\s?'), 'about '),
+    (re.compile(r'\s*(?:→|->)\s*'), ', then '),
+]
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=["\'(]?[A-Z0-9])')
+_CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+
+@dataclass(frozen=True, slots=True)
+class SpeechChunk:
+    """A piece of a response to synthesize on its own."""
+
+    text: str
+    phrase_id: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, str]:
+        chunk = {'text': self.text}
+        if self.phrase_id:
+            chunk['phraseId'] = self.phrase_id
+        return chunk
+
+
+def _spoken_number(number: str) -> str:
+    """Drop thousands separators and trailing decimal zeros."""
+    number = number.replace(',', '')
+    if '.' in number:
+        number = number.rstrip('0').rstrip('.')
+    return number
+
+
+def _spell_money(match: re.Match) -> str:
+    (major_singular, major_plural), (minor_singular, minor_plural) = _CURRENCY_NAMES[match.group(1)]
+    major, minor = _spoken_number(match.group(2)), int(match.group(3) or 0)
+    spoken = f"{major} {major_singular if major == '1' else major_plural}"
+    if minor:
+        spoken += f" and {minor} {minor_singular if minor == 1 else minor_plural}"
+    return spoken
+
+
+def _spell_unit(match: re.Match) -> str:
+    number = _spoken_number(match.group(1))
+    singular, plural = _UNIT_NAMES[match.group(2).lower()]
+    return f"{number} {singular if number == '1' else plural}"
+
+
+def normalize_for_speech(text: str) -> str:
+    """
+    Rewrite a response so a TTS engine reads it naturally.
+
+    Args:
+        text: Response text, possibly with markdown, bullets and emoji
+
+    Returns:
+        Plain text with units, numbers and symbols spelled out
+    """
+    text = _EMOJI.sub('', text)
+    text = _MARKUP.sub('', text)
+    text = _LIST_MARKER.sub('', text)
+    text = _INLINE_BULLET.sub(', ', text)
+
+    # List items and paragraphs become sentences
+    lines = [line.strip() for line in text.splitlines()]
+    text = ' '.join(line if line[-1] in '.!?:,;' else line + '.' for line in lines if line)
+
+    for pattern, replacement in _ABBREVIATIONS:
+        text = pattern.sub(replacement, text)
+
+    text = _MONEY.sub(_spell_money, text)
+    text = _RANGE.sub(r'\1 to \2', text)
+    text = _PER.sub(r'\1 per ', text)
+    text = _UNIT.sub(_spell_unit, text)
+    for pattern, replacement in _SYMBOLS:
+        text = pattern.sub(replacement, text)
+
+    text = re.sub(r'\s+([.,!?;:])', r'\1', text)
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=None)
+def render_phrase(phrase_id: str) -> str:
+    """Speech-ready text of a fixed phrase, rendered once per container."""
+    return normalize_for_speech(PHRASES[phrase_id])
+
+
+@lru_cache(maxsize=1)
+def _phrase_index() -> Tuple[Dict[str, str], Optional[re.Pattern]]:
+    """Rendered phrase text -> phrase ID, and a pattern matching any phrase."""
+    index = {render_phrase(phrase_id): phrase_id for phrase_id in PHRASES}
+    alternatives = sorted(index, key=len, reverse=True)
+    pattern = re.compile('(' + '|'.join(map(re.escape, alternatives)) + ')') if alternatives else None
+    return index, pattern
+
+
+def _split_long(sentence: str) -> List[str]:
+    """Split a sentence longer than MAX_CHUNK_CHARS at clause boundaries."""
+    if len(sentence) <= MAX_CHUNK_CHARS:
+        return [sentence]
+
+    chunks, current = [], ''
+    for clause in _CLAUSE_END.split(sentence):
+        if current and len(current) + len(clause) + 1 > MAX_CHUNK_CHARS:
+            chunks.append(current)
+            current = clause
+        else:
+            current = f"{current} {clause}" if current else clause
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_speech_chunks(text: str) -> List[SpeechChunk]:
+    """
+    Split normalized text into chunks for incremental synthesis.
+
+    Known phrases are kept whole and carry their phrase ID; other text is
+    split into sentences, and overly long sentences at clause boundaries.
+    """
+    index, pattern = _phrase_index()
+    segments = pattern.split(text) if pattern else [text]
+
+    chunks = []
+    for segment in segments:
+        segment = segment.strip()
+        if not segment:
+            continue
+        if segment in index:
+            chunks.append(SpeechChunk(segment, index[segment]))
+            continue
+        for sentence in _SENTENCE_END.split(segment):
+            chunks.extend(SpeechChunk(piece) for piece in _split_long(sentence.strip()) if piece)
+    return chunks
+
+
+def prepare_speech(text: str) -> Tuple[str, List[SpeechChunk]]:
+    """
+    Normalize a response for speech and split it into chunks.
+
+    Args:
+        text: Agent response text
+
+    Returns:
+        Tuple of (speech-ready text, chunks)
+    """
+    speech = normalize_for_speech(text)
+    return speech, split_speech_chunks(speech)
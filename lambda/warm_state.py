@@ -0,0 +1,337 @@
+"""
+Warm-state snapshots for Food Lens Strands Agent Lambda function.
+
+The menu and nutrition caches are filled by requests, so a cold container
+starts empty: the first question per restaurant pays a full menu fetch and
+the first question per food a USDA call. The caches are therefore persisted
+as a compact snapshot (msgpack when available, JSON otherwise) in /tmp and
+restored during the Lambda init phase, from /tmp when the sandbox survived a
+runtime restart or from a snapshot bundled with the deployment package.
+
+Restored menus keep the time they were fetched, so they are only served
+while still within the menu cache TTL; after that they are the fallback for
+when the menu API is unavailable, never a substitute for live menu data.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import USDA_API_BASE_URL, get_settings, menu_api_base_url
+from tools.menu_cache import MENU_ITEM_FIELDS, SHARED_MENU_CACHE
+from tools.nutrition_cache import SHARED_NUTRITION_CACHE, normalize_food_name
+from tools.nutrition_records import NutrientRecord
+
+try:
+    import msgpack
+except ImportError:  # JSON fallback when msgpack is not bundled
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Snapshot written by this container, and the one bundled with the package
+TMP_SNAPSHOT_PATH = get_settings().warm_snapshot_path
+BUNDLED_SNAPSHOT_PATH = str(Path(__file__).parent / 'warm_state')
+
+# /tmp snapshots older than this are not restored (seconds)
+MAX_SNAPSHOT_AGE = 24 * 60 * 60
+
+# Minimum time between snapshot writes (seconds)
+SNAPSHOT_INTERVAL = 60
+
+_last_saved = {'time': 0.0, 'versions': (0, 0)}
+
+# Background snapshot writes, one at a time
+_SNAPSHOT_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix='warm-state')
+_background: Dict[str, Optional[Future]] = {'future': None}
+
+
+def _encode_record(record: NutrientRecord) -> List[Any]:
+    return [record.as_dict(), record.description]
+
+
+def _decode_record(data: List[Any]) -> NutrientRecord:
+    values, description = data
+    return NutrientRecord.from_mapping(values, description=description)
+
+
+def capture() -> Dict[str, Any]:
+    """Snapshot of the shared menu and nutrition caches."""
+    return {
+        'version': SNAPSHOT_VERSION,
+        'created_at': time.time(),
+        'menus': [[restaurant_id, fetched_at, items, source]
+                  for restaurant_id, fetched_at, items, source in SHARED_MENU_CACHE.entries()],
+        'foods': [[name, _encode_record(record), source] for name, record, source in SHARED_NUTRITION_CACHE.entries()],
+        'fdc': [[fdc_id, _encode_record(record)] for fdc_id, record in SHARED_NUTRITION_CACHE.fdc_entries()],
+        'queries': SHARED_NUTRITION_CACHE.query_entries()
+    }
+
+
+def restore(snapshot: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Load a snapshot into the shared caches.
+
+    Restored menus keep their original fetch time, so older ones are only
+    used as the stale fallback of the menu cache.
+
+    Returns:
+        Number of menus, foods and FDC records restored
+    """
+    for restaurant_id, fetched_at, items, *source in snapshot.get('menus', []):
+        # Snapshots written before menus were keyed by their menu API have no source
+        SHARED_MENU_CACHE.put_menu(restaurant_id, items, fetched_at=fetched_at, source=source[0] if source else '')
+    for name, record, source in snapshot.get('foods', []):
+        SHARED_NUTRITION_CACHE.put(name, _decode_record(record), source)
+    for fdc_id, record in snapshot.get('fdc', []):
+        SHARED_NUTRITION_CACHE.put_fdc(int(fdc_id), _decode_record(record))
+    _restore_queries(snapshot)
+
+    return {
+        'menus': len(snapshot.get('menus', [])),
+        'foods': len(snapshot.get('foods', [])),
+        'fdc': len(snapshot.get('fdc', []))
+    }
+
+
+def _restore_queries(snapshot: Dict[str, Any]) -> None:
+    for query, fdc_ids, *scope in snapshot.get('queries', []):
+        # Searches saved before queries were kept per tool mix page sizes; drop them
+        if scope:
+            SHARED_NUTRITION_CACHE.put_query(query, [int(fdc_id) for fdc_id in fdc_ids], scope=scope[0])
+
+
+def _snapshot_files(base_path: str) -> List[str]:
+    return [f"{base_path}.msgpack", f"{base_path}.json"]
+
+
+def read_snapshot(base_path: str, version: int = SNAPSHOT_VERSION) -> Optional[Dict[str, Any]]:
+    """Read the snapshot of the given format version stored at base_path (.msgpack or .json), if any."""
+    for path in _snapshot_files(base_path):
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'rb') as handle:
+                if path.endswith('.msgpack'):
+                    if msgpack is None:
+                        continue
+                    snapshot = msgpack.unpackb(handle.read(), strict_map_key=False)
+                else:
+                    snapshot = json.loads(handle.read())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+            continue
+        if snapshot.get('version') == version:
+            return snapshot
+    return None
+
+
+def write_snapshot(base_path: str, snapshot: Dict[str, Any]) -> str:
+    """Atomically write a snapshot next to base_path and return the file path."""
+    if msgpack is not None:
+        path, data = f"{base_path}.msgpack", msgpack.packb(snapshot, use_bin_type=True)
+    else:
+        path, data = f"{base_path}.json", json.dumps(snapshot, separators=(',', ':'), default=str).encode()
+
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as handle:
+        handle.write(data)
+    os.replace(temporary_path, path)
+    return path
+
+
+def warm_up() -> Dict[str, int]:
+    """
+    Restore the most recent usable snapshot into the shared caches.
+
+    Called once during the Lambda init phase. A /tmp snapshot is only used
+    while younger than MAX_SNAPSHOT_AGE; the bundled snapshot was built for
+    this deployment and is always eligible.
+    """
+    snapshots = []
+    tmp_snapshot = read_snapshot(TMP_SNAPSHOT_PATH)
+    if tmp_snapshot and time.time() - tmp_snapshot.get('created_at', 0) <= MAX_SNAPSHOT_AGE:
+        snapshots.append(tmp_snapshot)
+    bundled_snapshot = read_snapshot(BUNDLED_SNAPSHOT_PATH)
+    if bundled_snapshot:
+        snapshots.append(bundled_snapshot)
+    if not snapshots:
+        return {'menus': 0, 'foods': 0, 'fdc': 0}
+
+    snapshot = max(snapshots, key=lambda candidate: candidate['created_at'])
+    counts = restore(snapshot)
+    _last_saved['versions'] = (SHARED_MENU_CACHE.version, SHARED_NUTRITION_CACHE.version)
+    logger.info(f"Warm state restored: {counts['menus']} menus, {counts['foods']} foods, {counts['fdc']} FDC records")
+    return counts
+
+
+def _unsaved_versions(force: bool) -> Optional[Tuple[int, int]]:
+    """Cache versions to snapshot, or None when unchanged or saved too recently."""
+    versions = (SHARED_MENU_CACHE.version, SHARED_NUTRITION_CACHE.version)
+    if versions == _last_saved['versions']:
+        return None
+    if not force and time.time() - _last_saved['time'] < SNAPSHOT_INTERVAL:
+        return None
+    return versions
+
+
+def _write(snapshot: Dict[str, Any], versions: Tuple[int, int]) -> Optional[str]:
+    try:
+        path = write_snapshot(TMP_SNAPSHOT_PATH, snapshot)
+    except OSError as e:
+        logger.warning(f"Failed to write warm state snapshot: {e}")
+        return None
+
+    _last_saved['time'] = time.time()
+    _last_saved['versions'] = versions
+    return path
+
+
+def save_if_changed(force: bool = False) -> Optional[str]:
+    """
+    Write a snapshot to /tmp when the caches changed since the last write.
+
+    Writes are rate-limited to one per SNAPSHOT_INTERVAL unless forced.
+
+    Returns:
+        Path of the written snapshot, or None when nothing was written
+    """
+    versions = _unsaved_versions(force)
+    if versions is None:
+        return None
+    return _write(capture(), versions)
+
+
+def save_in_background(force: bool = False) -> Optional[Future]:
+    """
+    Like save_if_changed, but only the snapshot is taken on the calling thread.
+
+    Encoding and writing the file happen on a background thread, so request
+    handlers return without waiting for the disk. Skipped while an earlier
+    write is still running.
+
+    Returns:
+        Future of the written path, or None when nothing is written
+    """
+    pending = _background['future']
+    if pending is not None and not pending.done():
+        return None
+    versions = _unsaved_versions(force)
+    if versions is None:
+        return None
+
+    # Until the write finishes, later calls see a recent save and skip
+    _last_saved['time'] = time.time()
+    future = _SNAPSHOT_WRITER.submit(_write, capture(), versions)
+    _background['future'] = future
+    return future
+
+
+def fetch_menus(menu_api_endpoint: str, restaurant_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Fetch the given restaurants' public menus (the fields the tools use) from the menu API."""
+    import httpx
+
+    base_url = menu_api_base_url(menu_api_endpoint)
+
+    menus = {}
+    with httpx.Client(timeout=30.0) as client:
+        for restaurant_id in restaurant_ids:
+            response = client.get(f"{base_url}/api/menu", params={
+                'restaurantId': restaurant_id,
+                'public': 'true',
+                'fields': MENU_ITEM_FIELDS
+            })
+            response.raise_for_status()
+            menus[restaurant_id] = response.json().get('menuItems', [])
+    return menus
+
+
+async def resolve_ingredients(menus: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+    """
+    Resolve the menus' ingredients to USDA records the way smart_nutrition_lookup does.
+
+    Ingredients with a remembered FDC ID are fetched through the /foods batch
+    endpoint, FOODS_BATCH_SIZE per request; the rest are searched one by one
+    and left for a later build once the USDA rate limit is used up.
+
+    Returns:
+        Number of distinct ingredients, and of those fetched and searched
+    """
+    from tools.http_client import close_http_client
+    from tools.smart_nutrition import NUTRITION_CACHE, REGIONAL_FOODS, USDA_QUERY_SCOPE, _try_usda_api
+    from tools.usda import USDABatchFetcher
+
+    # Foods the tool answers from its built-in tables need no lookup
+    ingredients = [
+        name for name in dict.fromkeys(
+            normalize_food_name(str(ingredient))
+            for items in menus.values() for item in items for ingredient in item.get('ingredients') or []
+        )
+        if name and name not in NUTRITION_CACHE and name not in REGIONAL_FOODS
+    ]
+    counts = {'ingredients': len(ingredients), 'fetched': 0, 'searched': 0}
+    usda_api_key = get_settings().usda_api_key
+    if not usda_api_key or not ingredients:
+        return counts
+
+    try:
+        known = {}
+        for name in ingredients:
+            fdc_ids = SHARED_NUTRITION_CACHE.get_query(name, scope=USDA_QUERY_SCOPE)
+            if fdc_ids:
+                known[name] = fdc_ids[0]
+        records = await USDABatchFetcher(usda_api_key, USDA_API_BASE_URL).fetch(known.values())
+        for name, fdc_id in known.items():
+            if fdc_id in records:
+                SHARED_NUTRITION_CACHE.put(name, records[fdc_id], 'USDA FoodData Central')
+                counts['fetched'] += 1
+
+        unknown = [name for name in ingredients if name not in known]
+        results = await asyncio.gather(*(_try_usda_api(name, timeout=10.0) for name in unknown))
+        counts['searched'] = sum(result is not None for result in results)
+    finally:
+        await close_http_client()
+    return counts
+
+
+def build_bundled_snapshot(menu_api_endpoint: str, restaurant_ids: List[str]) -> str:
+    """
+    Fetch the given restaurants' menus and write them as the bundled snapshot.
+
+    Run before packaging so new containers start with these menus cached,
+    together with USDA records for their ingredients. Ingredients matched by
+    the previous bundle keep their FDC IDs and only have their records
+    refetched, in batches.
+    """
+    previous = read_snapshot(BUNDLED_SNAPSHOT_PATH)
+    if previous:
+        _restore_queries(previous)
+
+    menus = fetch_menus(menu_api_endpoint, restaurant_ids)
+    for restaurant_id, items in menus.items():
+        SHARED_MENU_CACHE.put_menu(restaurant_id, items, source=menu_api_base_url(menu_api_endpoint))
+
+    counts = asyncio.run(resolve_ingredients(menus))
+    logger.info(f"Resolved {counts['fetched'] + counts['searched']} of {counts['ingredients']} ingredients "
+                f"({counts['fetched']} batch-fetched, {counts['searched']} searched)")
+
+    return write_snapshot(BUNDLED_SNAPSHOT_PATH, capture())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build the warm-state snapshot bundled with the Lambda package')
+    parser.add_argument('--menu-api', required=True, help='Food Lens API base URL, e.g. https://example.com/api')
+    parser.add_argument('restaurant_ids', nargs='+', help='Restaurants whose menus to bundle')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"Wrote {build_bundled_snapshot(args.menu_api, args.restaurant_ids)}")
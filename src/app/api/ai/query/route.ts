@@ -1,6 +1,8 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { LambdaClient, InvokeCommand } from '@aws-sdk/client-lambda'
+import { randomUUID } from 'crypto'
 import { textToSpeech } from '@/lib/elevenlabs'
+import { createClient } from '@/utils/supabase/server'
 
 // Factory function to create Lambda client
 function createLambdaClient(): LambdaClient {
@@ -13,6 +15,43 @@ function createLambdaClient(): LambdaClient {
   });
 }
 
+// Alias invoked unless the function name already carries a qualifier; the
+// deployment keeps provisioned concurrency on it. STRANDS_LAMBDA_ALIAS=""
+// invokes $LATEST instead.
+function lambdaQualifier(functionName: string): string | undefined {
+  // name:alias, account:function:name:alias or a qualified ARN
+  const qualified = [2, 4, 8].includes(functionName.split(':').length)
+  const alias = process.env.STRANDS_LAMBDA_ALIAS ?? 'live'
+  return qualified || !alias ? undefined : alias
+}
+
+// HttpOnly cookie identifying a diner who is not signed in
+const CALLER_COOKIE = 'food-lens-caller'
+const CALLER_COOKIE_MAX_AGE = 30 * 24 * 60 * 60
+
+// Caller the agent binds conversation sessions to: the signed-in Supabase
+// user, else the anonymous ID in the caller cookie (issued on first use).
+// Never taken from the request body, so a session ID alone cannot be
+// replayed by someone else.
+async function resolveCaller(request: NextRequest): Promise<{ callerId: string; newCookie?: string }> {
+  try {
+    const supabase = await createClient()
+    const { data: { user } } = await supabase.auth.getUser()
+    if (user) {
+      return { callerId: `user:${user.id}` }
+    }
+  } catch (authError) {
+    console.warn('Could not read the signed-in user, using the anonymous caller:', authError)
+  }
+
+  const existing = request.cookies.get(CALLER_COOKIE)?.value
+  if (existing) {
+    return { callerId: `anon:${existing}` }
+  }
+  const newCookie = randomUUID()
+  return { callerId: `anon:${newCookie}`, newCookie }
+}
+
 interface AIQueryRequest {
   query: string
   dishContext?: {
@@ -20,11 +59,19 @@ interface AIQueryRequest {
     name: string
   }
   restaurantId: string
+  sessionId?: string
+}
+
+interface SpeechChunk {
+  text: string
+  phraseId?: string
 }
 
 interface AIQueryResponse {
   textResponse: string
   audioUrl?: string
+  sessionId?: string
+  speechChunks?: SpeechChunk[]
   nutritionData?: Record<string, unknown>
 }
 
@@ -32,7 +79,7 @@ export async function POST(request: NextRequest) {
   try {
     // Parse request body
     const body: AIQueryRequest = await request.json()
-    const { query, dishContext, restaurantId } = body
+    const { query, dishContext, restaurantId, sessionId } = body
 
     // Validate required fields
     if (!query || !restaurantId) {
@@ -42,9 +89,13 @@ export async function POST(request: NextRequest) {
       )
     }
 
+    const { callerId, newCookie } = await resolveCaller(request)
+
     // Prepare Lambda payload
     const lambdaPayload = {
       prompt: query,
+      ...(sessionId && { sessionId }),
+      callerId,
       context: {
         restaurantId,
         ...(dishContext && {
@@ -59,8 +110,10 @@ export async function POST(request: NextRequest) {
 
     // Invoke Lambda function
     const lambdaClient = createLambdaClient();
+    const functionName = process.env.STRANDS_LAMBDA_FUNCTION_NAME || 'food-lens-strands-agent'
     const command = new InvokeCommand({
-      FunctionName: process.env.STRANDS_LAMBDA_FUNCTION_NAME || 'food-lens-strands-agent',
+      FunctionName: functionName,
+      Qualifier: lambdaQualifier(functionName),
       Payload: JSON.stringify(lambdaPayload),
       InvocationType: 'RequestResponse'
     })
@@ -83,10 +136,14 @@ export async function POST(request: NextRequest) {
 
     // Extract response from Lambda
     let textResponse: string
+    let responseSessionId: string | undefined
+    let speechChunks: SpeechChunk[] | undefined
 
     if (responsePayload.body) {
       // Lambda returned HTTP response format
       const parsedBody = JSON.parse(responsePayload.body)
+      responseSessionId = parsedBody.sessionId
+      speechChunks = parsedBody.speechChunks
       textResponse = parsedBody.response || parsedBody.textResponse || 'I apologize, but I encountered an issue processing your request. Please try asking about specific nutritional information or menu items, and I\'ll do my best to help.'
     } else {
       // Lambda returned direct response
@@ -102,7 +159,12 @@ export async function POST(request: NextRequest) {
     let audioUrl: string | undefined;
     try {
       console.log('Generating TTS for AI response...');
-      const audioBuffer = await textToSpeech(textResponse);
+      // The speech chunks carry the spoken form (markdown stripped, prices
+      // and units written out); the raw text is only a fallback
+      const speechText = speechChunks?.length
+        ? speechChunks.map((chunk) => chunk.text).join(' ')
+        : textResponse
+      const audioBuffer = await textToSpeech(speechText);
       
       // Create a blob URL for the audio (in a real app, you might want to store this in S3)
       // For now, we'll return the audio as base64 data URL
@@ -119,11 +181,23 @@ export async function POST(request: NextRequest) {
     const apiResponse: AIQueryResponse = {
       textResponse,
       audioUrl,
+      sessionId: responseSessionId,
+      speechChunks,
       // TODO: Extract nutrition data if available
       // nutritionData: context.nutritionData
     }
 
-    return NextResponse.json(apiResponse)
+    const response = NextResponse.json(apiResponse)
+    if (newCookie) {
+      response.cookies.set(CALLER_COOKIE, newCookie, {
+        httpOnly: true,
+        sameSite: 'lax',
+        secure: process.env.NODE_ENV === 'production',
+        path: '/api/ai',
+        maxAge: CALLER_COOKIE_MAX_AGE
+      })
+    }
+    return response
 
   } catch (error) {
     console.error('Error processing AI query:', error)
@@ -164,6 +238,7 @@ export async function GET() {
       status: 'ok',
       service: 'AI Query Service',
       lambdaFunction: functionName,
+      lambdaQualifier: lambdaQualifier(functionName),
       region: awsRegion,
       timestamp: new Date().toISOString()
     })
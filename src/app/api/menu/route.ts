@@ -2,6 +2,12 @@ import { NextRequest, NextResponse } from 'next/server'
 import { createServiceRoleClient, createPublicClient } from '@/lib/supabase'
 import { getAuthenticatedUserFromCookies } from '@/lib/auth'
 
+// Columns that public callers may select with ?fields=id,name,...
+const PUBLIC_MENU_FIELDS = [
+  'id', 'restaurant_id', 'name', 'price', 'ingredients', 'description', 'cuisine',
+  'image_url', 'image_generation_status', 'created_at', 'updated_at'
+]
+
 // Background image generation function
 async function triggerImageGeneration(itemId: string, itemName: string, description?: string) {
   try {
@@ -55,6 +61,8 @@ async function triggerImageGeneration(itemId: string, itemName: string, descript
 }
 
 // GET /api/menu - Get menu items (authenticated for restaurant owners, public for customers)
+// Public requests may narrow the response with ?itemId= (a single item) and
+// ?fields= (a comma-separated subset of PUBLIC_MENU_FIELDS)
 export async function GET(request: NextRequest) {
   try {
     const { searchParams } = new URL(request.url)
@@ -64,11 +72,21 @@ export async function GET(request: NextRequest) {
     if (isPublic && restaurantId) {
       // Public access - use public client for menu items
       const supabase = createPublicClient()
+      const itemId = searchParams.get('itemId')
+      const fields = (searchParams.get('fields') || '')
+        .split(',')
+        .map(field => field.trim())
+        .filter(field => PUBLIC_MENU_FIELDS.includes(field))
       
-      const { data: menuItems, error: menuError } = await supabase
+      let query = supabase
         .from('menu_items')
-        .select('*')
+        .select(fields.length > 0 ? fields.join(',') : '*')
         .eq('restaurant_id', restaurantId)
+      if (itemId) {
+        query = query.eq('id', itemId)
+      }
+      
+      const { data: menuItems, error: menuError } = await query
         .order('created_at', { ascending: false })
 
       if (menuError) {